@@ -0,0 +1,43 @@
+import copy
+import threading
+import time
+from django.conf import settings
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.settings import api_settings
+
+
+# Utilisateurs déjà authentifiés par ce processus : {id: (expiration, user)}
+_users = {}
+_lock = threading.Lock()
+
+
+def forget(user_id):
+    with _lock:
+        _users.pop(str(user_id), None)
+
+
+class CachedJWTAuthentication(JWTAuthentication):
+    # Le jeton signé identifie l'utilisateur (user_id, rôle, nom, voir
+    # UserTokenObtainPairSerializer) ; la ligne accounts_user n'est relue
+    # qu'à l'expiration de AUTH_USER_CACHE_SECONDS. Une modification de
+    # l'utilisateur (mot de passe, rôle, désactivation) vide l'entrée du
+    # processus courant par signal ; les autres workers la relisent au plus
+    # tard à l'expiration.
+
+    def get_user(self, validated_token):
+        timeout = settings.AUTH_USER_CACHE_SECONDS
+        user_id = validated_token.get(api_settings.USER_ID_CLAIM)
+        if not timeout or user_id is None:
+            return super().get_user(validated_token)
+
+        now = time.monotonic()
+        entry = _users.get(str(user_id))
+        if entry is None or entry[0] <= now:
+            # Contrôles de simplejwt (utilisateur inexistant, inactif)
+            user = super().get_user(validated_token)
+            with _lock:
+                _users[str(user_id)] = (now + timeout, user)
+        else:
+            user = entry[1]
+        # Copie par requête : une vue peut modifier request.user
+        return copy.copy(user)
@@ -1,4 +1,6 @@
 from rest_framework import serializers
+from rest_framework_simplejwt.serializers import TokenObtainPairSerializer, TokenRefreshSerializer
+from rest_framework_simplejwt.settings import api_settings
 from django.contrib.auth import get_user_model
 
 User = get_user_model()
@@ -28,3 +30,31 @@ class UserCreateSerializer(serializers.ModelSerializer):
 
 class ChangePasswordSerializer(serializers.Serializer):
     new_password = serializers.CharField(min_length=8, write_only=True)
+
+
+def set_user_claims(token, user):
+    # Profil lu par le frontend sans appel à /users/me/
+    token['username'] = user.username
+    token['first_name'] = user.first_name
+    token['last_name'] = user.last_name
+    token['email'] = user.email
+    token['role'] = user.role
+    token['is_active'] = user.is_active
+    return token
+
+
+class UserTokenObtainPairSerializer(TokenObtainPairSerializer):
+    @classmethod
+    def get_token(cls, user):
+        return set_user_claims(super().get_token(user), user)
+
+
+class UserTokenRefreshSerializer(TokenRefreshSerializer):
+    def validate(self, attrs):
+        # Claims relus à chaque rafraîchissement : un changement de rôle ou
+        # de nom est repris dans le nouveau jeton d'accès
+        refresh = self.token_class(attrs['refresh'])
+        user = User.objects.filter(pk=refresh.get(api_settings.USER_ID_CLAIM)).first()
+        if user is not None:
+            attrs = dict(attrs, refresh=str(set_user_claims(refresh, user)))
+        return super().validate(attrs)
@@ -0,0 +1,19 @@
+from django.db import transaction
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+from apps.invoices import response_cache
+from . import authentication
+from .models import User
+
+
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+def bump_response_cache(sender, instance, **kwargs):
+    response_cache.bump(sender)
+
+
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+def forget_authenticated_user(sender, instance, **kwargs):
+    pk = instance.pk
+    transaction.on_commit(lambda: authentication.forget(pk))
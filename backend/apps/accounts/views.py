@@ -3,13 +3,15 @@ from rest_framework.decorators import action
 from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated, AllowAny
 from django.contrib.auth import get_user_model
+from apps.invoices.mixins import CachedResponseMixin
 from .serializers import UserSerializer, UserCreateSerializer, ChangePasswordSerializer
 
 User = get_user_model()
 
 
-class UserViewSet(viewsets.ModelViewSet):
+class UserViewSet(CachedResponseMixin, viewsets.ModelViewSet):
     queryset = User.objects.all()
+    cache_models = (User,)
     permission_classes = [IsAuthenticated]
     
     def get_serializer_class(self):
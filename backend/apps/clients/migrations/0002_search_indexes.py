@@ -0,0 +1,33 @@
+# Generated by Django 5.2.18 on 2026-10-18 10:44
+
+import django.contrib.postgres.indexes
+import django.db.models.functions.text
+from django.db import migrations
+from apps.invoices.search import PostgresAddIndex, PostgresTrigramExtension
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('clients', '0001_initial'),
+    ]
+
+    operations = [
+        PostgresTrigramExtension(),
+        PostgresAddIndex(
+            model_name='client',
+            index=django.contrib.postgres.indexes.GinIndex(django.contrib.postgres.indexes.OpClass(django.db.models.functions.text.Upper('name'), name='gin_trgm_ops'), name='client_name_trgm_idx'),
+        ),
+        PostgresAddIndex(
+            model_name='client',
+            index=django.contrib.postgres.indexes.GinIndex(django.contrib.postgres.indexes.OpClass(django.db.models.functions.text.Upper('phone'), name='gin_trgm_ops'), name='client_phone_trgm_idx'),
+        ),
+        PostgresAddIndex(
+            model_name='client',
+            index=django.contrib.postgres.indexes.GinIndex(django.contrib.postgres.indexes.OpClass(django.db.models.functions.text.Upper('email'), name='gin_trgm_ops'), name='client_email_trgm_idx'),
+        ),
+        PostgresAddIndex(
+            model_name='client',
+            index=django.contrib.postgres.indexes.GinIndex(django.contrib.postgres.indexes.OpClass(django.db.models.functions.text.Upper('ninea'), name='gin_trgm_ops'), name='client_ninea_trgm_idx'),
+        ),
+    ]
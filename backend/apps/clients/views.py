@@ -1,13 +1,36 @@
 from rest_framework import viewsets, filters
 from rest_framework.permissions import IsAuthenticated
+from apps.invoices.mixins import (
+    AsyncReadMixin, CachedResponseMixin, ConditionalRetrieveMixin, ExportMixin, ImportMixin,
+)
+from apps.invoices.search import RankedSearchFilter
 from .models import Client
 from .serializers import ClientSerializer
 
 
-class ClientViewSet(viewsets.ModelViewSet):
+class ClientViewSet(ExportMixin, ImportMixin, AsyncReadMixin, CachedResponseMixin, ConditionalRetrieveMixin,
+                    viewsets.ModelViewSet):
     queryset = Client.objects.all()
+    cache_models = (Client,)
     serializer_class = ClientSerializer
     permission_classes = [IsAuthenticated]
-    filter_backends = [filters.SearchFilter, filters.OrderingFilter]
+    filter_backends = [RankedSearchFilter, filters.OrderingFilter]
     search_fields = ['name', 'phone', 'email', 'ninea']
     ordering_fields = ['name', 'created_at']
+    export_fields = (
+        ('name', 'Nom'),
+        ('phone', 'Téléphone'),
+        ('email', 'Email'),
+        ('address', 'Adresse'),
+        ('ninea', 'NINEA'),
+        ('created_at', 'Créé le'),
+    )
+    export_name = 'clients'
+    import_columns = {
+        'name': ('nom', 'client', 'raison sociale', "nom de l'entreprise / client"),
+        'phone': ('telephone', 'tel'),
+        'email': ('e-mail', 'courriel'),
+        'address': ('adresse',),
+        'ninea': (),
+    }
+    import_key_fields = ('ninea', 'name')
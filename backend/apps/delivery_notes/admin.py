@@ -1,4 +1,5 @@
 from django.contrib import admin
+from apps.invoices.admin import DocumentAdmin
 from .models import DeliveryNote, DeliveryNoteItem
 
 
@@ -8,9 +9,10 @@ class DeliveryNoteItemInline(admin.TabularInline):
 
 
 @admin.register(DeliveryNote)
-class DeliveryNoteAdmin(admin.ModelAdmin):
+class DeliveryNoteAdmin(DocumentAdmin):
     list_display = ['number', 'client', 'date', 'payment_method', 'delivered_by', 'created_by']
     list_filter = ['payment_method', 'date', 'created_at']
     search_fields = ['number', 'client__name', 'delivered_by']
+    list_select_related = ['client', 'created_by']
     inlines = [DeliveryNoteItemInline]
     readonly_fields = ['number']
@@ -0,0 +1,20 @@
+# Generated by Django 5.2.18 on 2026-10-18 10:38
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('clients', '0001_initial'),
+        ('delivery_notes', '0001_initial'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='deliverynote',
+            index=models.Index(fields=['-date', '-created_at', '-id'], name='delivery_note_keyset_idx'),
+        ),
+    ]
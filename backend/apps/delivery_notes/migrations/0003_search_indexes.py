@@ -0,0 +1,30 @@
+# Generated by Django 5.2.18 on 2026-10-18 10:44
+
+import django.contrib.postgres.indexes
+import django.contrib.postgres.search
+import django.db.models.functions.text
+from django.db import migrations
+from apps.invoices.search import PostgresAddIndex, PostgresTrigramExtension
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('delivery_notes', '0002_keyset_index'),
+    ]
+
+    operations = [
+        PostgresTrigramExtension(),
+        PostgresAddIndex(
+            model_name='deliverynote',
+            index=django.contrib.postgres.indexes.GinIndex(django.contrib.postgres.indexes.OpClass(django.db.models.functions.text.Upper('number'), name='gin_trgm_ops'), name='delivery_note_number_trgm_idx'),
+        ),
+        PostgresAddIndex(
+            model_name='deliverynote',
+            index=django.contrib.postgres.indexes.GinIndex(django.contrib.postgres.indexes.OpClass(django.db.models.functions.text.Upper('delivered_by'), name='gin_trgm_ops'), name='delivery_note_by_trgm_idx'),
+        ),
+        PostgresAddIndex(
+            model_name='deliverynoteitem',
+            index=django.contrib.postgres.indexes.GinIndex(django.contrib.postgres.search.SearchVector('description', config='french'), name='delivery_note_item_fts_idx'),
+        ),
+    ]
@@ -1,10 +1,16 @@
+from django.contrib.postgres.indexes import GinIndex, OpClass
+from django.contrib.postgres.search import SearchVector
 from django.db import models
 from django.conf import settings
+from django.db.models.functions import Upper
 from apps.clients.models import Client
 from apps.products.models import Product
+from apps.invoices.models import NumberedDocumentMixin
 
 
-class DeliveryNote(models.Model):
+class DeliveryNote(NumberedDocumentMixin, models.Model):
+    number_prefix = 'BL'
+    
     PAYMENT_CHOICES = [
         ('cash', 'Espèces'),
         ('check', 'Chèque'),
@@ -33,27 +39,14 @@ class DeliveryNote(models.Model):
         verbose_name = "Bordereau de livraison"
         verbose_name_plural = "Bordereaux de livraison"
         ordering = ['-date', '-created_at']
+        indexes = [
+            models.Index(fields=['-date', '-created_at', '-id'], name='delivery_note_keyset_idx'),
+            GinIndex(OpClass(Upper('number'), name='gin_trgm_ops'), name='delivery_note_number_trgm_idx'),
+            GinIndex(OpClass(Upper('delivered_by'), name='gin_trgm_ops'), name='delivery_note_by_trgm_idx'),
+        ]
     
     def __str__(self):
         return f"{self.number} - {self.client.name}"
-    
-    def save(self, *args, **kwargs):
-        if not self.number:
-            self.number = self.generate_number()
-        super().save(*args, **kwargs)
-    
-    @classmethod
-    def generate_number(cls):
-        from django.utils import timezone
-        year = timezone.now().year
-        prefix = f"BL-{year}-"
-        last_note = cls.objects.filter(number__startswith=prefix).order_by('-number').first()
-        if last_note:
-            last_num = int(last_note.number.split('-')[-1])
-            new_num = last_num + 1
-        else:
-            new_num = 1
-        return f"{prefix}{new_num:03d}"
 
 
 class DeliveryNoteItem(models.Model):
@@ -66,6 +59,9 @@ class DeliveryNoteItem(models.Model):
     class Meta:
         verbose_name = "Ligne de bordereau"
         verbose_name_plural = "Lignes de bordereau"
+        indexes = [
+            GinIndex(SearchVector('description', config='french'), name='delivery_note_item_fts_idx'),
+        ]
     
     def __str__(self):
         return f"{self.description} x {self.quantity}"
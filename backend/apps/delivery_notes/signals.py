@@ -0,0 +1,23 @@
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+from .models import DeliveryNote, DeliveryNoteItem
+from apps.invoices import pdf_cache, response_cache
+
+
+@receiver(post_save, sender=DeliveryNoteItem)
+@receiver(post_delete, sender=DeliveryNoteItem)
+def invalidate_pdf_on_item_change(sender, instance, **kwargs):
+    pdf_cache.invalidate('delivery_note', instance.delivery_note_id)
+
+
+@receiver(post_delete, sender=DeliveryNote)
+def invalidate_pdf_on_delete(sender, instance, **kwargs):
+    pdf_cache.invalidate('delivery_note', instance.pk)
+
+
+@receiver(post_save, sender=DeliveryNote)
+@receiver(post_delete, sender=DeliveryNote)
+@receiver(post_save, sender=DeliveryNoteItem)
+@receiver(post_delete, sender=DeliveryNoteItem)
+def bump_response_cache(sender, instance, **kwargs):
+    response_cache.bump(sender)
@@ -3,25 +3,54 @@ from rest_framework.decorators import action
 from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated
 from django.http import HttpResponse
+from apps.accounts.models import User
+from apps.clients.models import Client
+from apps.products.models import Product
 from .models import DeliveryNote, DeliveryNoteItem
-from .serializers import DeliveryNoteSerializer, DeliveryNoteCreateSerializer
-from apps.invoices.pdf_generator import generate_delivery_note_pdf
+from .serializers import DeliveryNoteSerializer, DeliveryNoteListSerializer, DeliveryNoteCreateSerializer
+from apps.invoices import pdf_cache
+from apps.invoices.mixins import (
+    AsyncReadMixin, CachedResponseMixin, ConditionalRetrieveMixin, DocumentFieldsMixin, ExportMixin,
+    EmailOutboxMixin, PdfJobMixin, PdfExportMixin,
+)
+from apps.invoices.pagination import DocumentPagination
+from apps.invoices.search import RankedSearchFilter
 
 
-class DeliveryNoteViewSet(viewsets.ModelViewSet):
+class DeliveryNoteViewSet(ExportMixin, AsyncReadMixin, CachedResponseMixin, ConditionalRetrieveMixin,
+                          DocumentFieldsMixin, PdfJobMixin, EmailOutboxMixin, PdfExportMixin, viewsets.ModelViewSet):
+    pdf_document_type = 'delivery_note'
     queryset = DeliveryNote.objects.all()
+    cache_models = (DeliveryNote, DeliveryNoteItem, Client, Product, User)
+    list_serializer_class = DeliveryNoteListSerializer
     permission_classes = [IsAuthenticated]
-    filter_backends = [filters.SearchFilter, filters.OrderingFilter]
+    pagination_class = DocumentPagination
+    filter_backends = [RankedSearchFilter, filters.OrderingFilter]
     search_fields = ['number', 'client__name', 'delivered_by']
+    search_text_fields = ['items__description']
     ordering_fields = ['date', 'number', 'created_at']
+    export_fields = (
+        ('number', 'Numéro'),
+        ('date', 'Date de livraison'),
+        ('client__name', 'Client'),
+        ('client__ninea', 'NINEA'),
+        ('payment_method', 'Mode de paiement'),
+        ('delivered_by', 'Livré par'),
+        ('notes', 'Observations'),
+        ('created_by__username', 'Créé par'),
+        ('created_at', 'Créé le'),
+    )
+    export_name = 'bordereaux'
     
     def get_serializer_class(self):
+        if self.use_list_serializer():
+            return self.list_serializer_class
         if self.action in ['create', 'update', 'partial_update']:
             return DeliveryNoteCreateSerializer
         return DeliveryNoteSerializer
     
     def get_queryset(self):
-        queryset = DeliveryNote.objects.select_related('client', 'created_by').prefetch_related('items')
+        queryset = self.prefetch_items(DeliveryNote.objects.select_related('client', 'created_by'))
         
         client_id = self.request.query_params.get('client')
         if client_id:
@@ -39,7 +68,12 @@ class DeliveryNoteViewSet(viewsets.ModelViewSet):
     @action(detail=True, methods=['get'])
     def pdf(self, request, pk=None):
         delivery_note = self.get_object()
-        pdf_content = generate_delivery_note_pdf(delivery_note)
-        response = HttpResponse(pdf_content, content_type='application/pdf')
-        response['Content-Disposition'] = f'attachment; filename="{delivery_note.number}.pdf"'
-        return response
+        
+        def build_response():
+            pdf_content = pdf_cache.get_pdf('delivery_note', delivery_note)
+            response = HttpResponse(pdf_content, content_type='application/pdf')
+            response['Content-Disposition'] = f'attachment; filename="{delivery_note.number}.pdf"'
+            return response
+        
+        etag = pdf_cache.build_key('delivery_note', delivery_note)
+        return self.conditional_response(request, etag, self.get_last_modified(delivery_note), build_response)
@@ -1,5 +1,16 @@
 from django.contrib import admin
-from .models import Invoice, InvoiceItem
+from django.utils import timezone
+from .models import Invoice, InvoiceItem, PdfJob, OutboxEmail, DocumentSequence, MonthlyDocumentStats
+
+
+class DocumentAdmin(admin.ModelAdmin):
+    # Lignes enregistrées après le document : updated_at (Last-Modified,
+    # clé des PDF en cache) avance si elles ont changé
+    
+    def save_related(self, request, form, formsets, change):
+        super().save_related(request, form, formsets, change)
+        if change and any(formset.has_changed() for formset in formsets):
+            type(form.instance).objects.filter(pk=form.instance.pk).update(updated_at=timezone.now())
 
 
 class InvoiceItemInline(admin.TabularInline):
@@ -8,9 +19,36 @@ class InvoiceItemInline(admin.TabularInline):
 
 
 @admin.register(Invoice)
-class InvoiceAdmin(admin.ModelAdmin):
+class InvoiceAdmin(DocumentAdmin):
     list_display = ['number', 'client', 'date', 'status', 'total_ttc', 'created_by']
     list_filter = ['status', 'date', 'created_at']
     search_fields = ['number', 'client__name']
+    list_select_related = ['client', 'created_by']
     inlines = [InvoiceItemInline]
     readonly_fields = ['number', 'total_ht', 'total_tva', 'total_ttc']
+
+
+@admin.register(PdfJob)
+class PdfJobAdmin(admin.ModelAdmin):
+    list_display = ['document_type', 'object_id', 'status', 'requested_by', 'created_at', 'finished_at']
+    list_filter = ['document_type', 'status', 'created_at']
+    readonly_fields = ['created_at', 'started_at', 'finished_at']
+
+
+@admin.register(OutboxEmail)
+class OutboxEmailAdmin(admin.ModelAdmin):
+    list_display = ['document_type', 'object_id', 'recipient', 'status', 'attempts', 'created_at', 'sent_at']
+    list_filter = ['document_type', 'status', 'created_at']
+    search_fields = ['recipient']
+    readonly_fields = ['created_at', 'started_at', 'sent_at']
+
+@admin.register(DocumentSequence)
+class DocumentSequenceAdmin(admin.ModelAdmin):
+    list_display = ['prefix', 'year', 'last_value']
+    list_filter = ['prefix', 'year']
+
+
+@admin.register(MonthlyDocumentStats)
+class MonthlyDocumentStatsAdmin(admin.ModelAdmin):
+    list_display = ['document_type', 'year', 'month', 'status', 'count', 'total_ttc']
+    list_filter = ['document_type', 'year', 'status']
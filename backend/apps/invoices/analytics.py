@@ -0,0 +1,205 @@
+from decimal import Decimal
+import hashlib
+import json
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Count, DecimalField, F, Func, IntegerField, Sum, Value, Window
+from django.db.models.functions import (
+    Coalesce, Rank, TruncDay, TruncMonth, TruncQuarter, TruncWeek, TruncYear,
+)
+from django.utils.dateparse import parse_date
+from apps.clients.models import Client
+from apps.products.models import Product
+from .models import Invoice, InvoiceItem
+from . import response_cache
+
+
+class WindowSum(Func):
+    # SUM(SUM(...)) OVER (...) : total de l'agrégat sur la fenêtre
+    function = 'SUM'
+    window_compatible = True
+
+
+class WindowCount(Func):
+    function = 'COUNT'
+    window_compatible = True
+
+
+TIME_DIMENSIONS = {
+    'day': TruncDay,
+    'week': TruncWeek,
+    'month': TruncMonth,
+    'quarter': TruncQuarter,
+    'year': TruncYear,
+}
+# Dimensions et métriques qui imposent de passer par les lignes de facture
+ITEM_DIMENSIONS = {'product'}
+ITEM_METRICS = {'quantity', 'line_count'}
+DIMENSIONS = {'client', 'product', 'status'} | set(TIME_DIMENSIONS)
+GROUP_PREFIX = 'group_'
+METRICS = {'total_ht', 'total_tva', 'total_ttc', 'quantity', 'invoice_count', 'line_count'}
+
+
+class AnalyticsError(ValueError):
+    pass
+
+
+def parse_params(query_params):
+    group_by = [name.strip() for name in query_params.get('group_by', 'month').split(',') if name.strip()]
+    unknown = [name for name in group_by if name not in DIMENSIONS]
+    if unknown:
+        raise AnalyticsError(f"Regroupement inconnu : {', '.join(unknown)}")
+    if not group_by or len(group_by) > 3 or len(set(group_by)) != len(group_by):
+        raise AnalyticsError("group_by accepte de 1 à 3 dimensions distinctes")
+    if len([name for name in group_by if name in TIME_DIMENSIONS]) > 1:
+        raise AnalyticsError("Une seule dimension temporelle est autorisée")
+
+    metric = query_params.get('metric', 'total_ttc')
+    if metric not in METRICS:
+        raise AnalyticsError(f"Métrique inconnue : {metric}")
+
+    dates = {}
+    for name in ('start', 'end'):
+        value = query_params.get(name)
+        if value:
+            # parse_date lève ValueError pour une date bien formée mais
+            # inexistante (2026-02-30)
+            try:
+                dates[name] = parse_date(value)
+            except ValueError:
+                dates[name] = None
+            if dates[name] is None:
+                raise AnalyticsError(f"Date invalide pour {name} : {value}")
+
+    statuses = query_params.get('status')
+    statuses = sorted(s for s in statuses.split(',') if s) if statuses else None
+
+    client = query_params.get('client') or None
+    if client is not None:
+        try:
+            client = int(client)
+        except ValueError:
+            raise AnalyticsError("client doit être un entier")
+
+    max_rows = settings.ANALYTICS_MAX_ROWS
+    try:
+        limit = int(query_params.get('limit', 100))
+    except ValueError:
+        raise AnalyticsError("limit doit être un entier")
+    if not 1 <= limit <= max_rows:
+        raise AnalyticsError(f"limit doit être compris entre 1 et {max_rows}")
+
+    return {
+        'group_by': group_by,
+        'metric': metric,
+        'start': dates.get('start'),
+        'end': dates.get('end'),
+        'status': statuses,
+        'client': client,
+        'limit': limit,
+    }
+
+
+def build_queryset(params):
+    group_by, metric = params['group_by'], params['metric']
+    item_level = bool(ITEM_DIMENSIONS & set(group_by)) or metric in ITEM_METRICS
+    # Sans dimension ou métrique de ligne, on agrège directement les factures
+    prefix = 'invoice__' if item_level else ''
+    queryset = (InvoiceItem if item_level else Invoice).objects.all()
+
+    if params['start']:
+        queryset = queryset.filter(**{f'{prefix}date__gte': params['start']})
+    if params['end']:
+        queryset = queryset.filter(**{f'{prefix}date__lte': params['end']})
+    if params['status']:
+        queryset = queryset.filter(**{f'{prefix}status__in': params['status']})
+    else:
+        queryset = queryset.exclude(**{f'{prefix}status': 'cancelled'})
+    if params['client']:
+        queryset = queryset.filter(**{f'{prefix}client_id': params['client']})
+
+    fields, time_expression = {}, None
+    for name in group_by:
+        if name == 'client':
+            fields['client_id'] = F(f'{prefix}client_id')
+            fields['client_name'] = F(f'{prefix}client__name')
+        elif name == 'product':
+            fields['product_id'] = F('product_id')
+            fields['product_name'] = Coalesce('product__name', 'description')
+        elif name == 'status':
+            fields['status'] = F(f'{prefix}status')
+        else:
+            time_expression = TIME_DIMENSIONS[name](f'{prefix}date')
+            fields[name] = time_expression
+
+    if metric == 'invoice_count':
+        aggregate = Count('invoice_id', distinct=True) if item_level else Count('id')
+    elif metric == 'line_count':
+        aggregate = Count('id')
+    else:
+        aggregate = Sum(metric)
+    if metric in ('invoice_count', 'line_count'):
+        output_field = IntegerField()
+    else:
+        output_field = DecimalField(max_digits=20, decimal_places=2)
+    partition = [time_expression] if time_expression is not None else None
+
+    # Alias préfixés pour ne pas entrer en conflit avec les champs du modèle
+    fields = {f'{GROUP_PREFIX}{name}': expression for name, expression in fields.items()}
+    queryset = queryset.values(**fields).annotate(value=aggregate).annotate(
+        rank=Window(Rank(), partition_by=partition, order_by=aggregate.copy().desc()),
+        period_total=Window(WindowSum(aggregate.copy(), output_field=output_field), partition_by=partition),
+        grand_total=Window(WindowSum(aggregate.copy(), output_field=output_field)),
+        total_groups=Window(WindowCount(Value(1), output_field=IntegerField())),
+    )
+    ordering = [f'{GROUP_PREFIX}{name}' for name in group_by if name in TIME_DIMENSIONS] + ['rank'] + list(fields)
+    return queryset.order_by(*ordering)
+
+
+def _json_value(value):
+    if isinstance(value, Decimal):
+        return value.quantize(Decimal('0.01'))
+    if hasattr(value, 'date') and callable(value.date):
+        return value.date()
+    return value
+
+
+def run(params):
+    limit = params['limit']
+    rows = list(build_queryset(params)[:limit])
+    total_groups = rows[0]['total_groups'] if rows else 0
+    grand_total = rows[0]['grand_total'] if rows else 0
+
+    results = []
+    for row in rows:
+        period_total = row.pop('period_total') or 0
+        row.pop('grand_total')
+        row.pop('total_groups')
+        row['share'] = float(round(row['value'] / period_total, 4)) if period_total else 0
+        results.append({key.removeprefix(GROUP_PREFIX): _json_value(value) for key, value in row.items()})
+
+    return {
+        'group_by': params['group_by'],
+        'metric': params['metric'],
+        'start': params['start'],
+        'end': params['end'],
+        'status': params['status'],
+        'total': _json_value(grand_total or 0),
+        'total_groups': total_groups,
+        'truncated': total_groups > limit,
+        'results': results,
+    }
+
+
+def get_analytics(query_params):
+    params = parse_params(query_params)
+    # Versions des modèles lus (voir response_cache) : une écriture, même
+    # groupée (bulk_transition, conversion de proformas), change la clé
+    versions = response_cache.get_versions((Invoice, InvoiceItem, Client, Product))
+    key_source = json.dumps([params, versions], sort_keys=True, default=str)
+    key = 'invoice-analytics:' + hashlib.sha1(key_source.encode('utf-8')).hexdigest()
+    data = cache.get(key)
+    if data is None:
+        data = run(params)
+        cache.set(key, data, settings.ANALYTICS_CACHE_SECONDS)
+    return data
@@ -0,0 +1,165 @@
+from contextlib import suppress
+from datetime import timedelta
+from html import unescape
+import re
+import smtplib
+from django.apps import apps
+from django.conf import settings
+from django.core.mail import EmailMultiAlternatives, get_connection
+from django.db import transaction
+from django.template.loader import render_to_string
+from django.utils import timezone
+from django.utils.html import strip_tags
+from .models import OutboxEmail
+from .pdf_generator import get_company_context
+from .pdf_jobs import DOCUMENT_MODELS
+from . import pdf_cache
+
+
+EMAIL_TEMPLATES = {
+    # type : (template, objet)
+    'invoice': ('emails/invoice_email.html', 'Facture {number} - Moultazam Distribution'),
+    'proforma': ('emails/proforma_email.html', 'Devis {number} - Moultazam Distribution'),
+    'delivery_note': ('emails/delivery_note_email.html', 'Bon de Livraison {number} - Moultazam Distribution'),
+}
+
+_HTML_HEAD = re.compile(r'<head.*?</head>', re.DOTALL | re.IGNORECASE)
+
+# Un envoi « sending » depuis plus longtemps a perdu son worker
+STALE_MINUTES = 15
+
+
+def enqueue(document_type, document, recipient, user=None):
+    # Un envoi déjà en attente pour ce document et ce destinataire est
+    # réutilisé ; bloqué par l'arrêt brutal de son worker, il est remis en
+    # attente plutôt que doublé
+    email = OutboxEmail.objects.filter(
+        document_type=document_type,
+        object_id=document.pk,
+        recipient=recipient,
+        status__in=['pending', 'sending'],
+    ).first()
+    if email and email.status == 'sending' and email.started_at < timezone.now() - timedelta(minutes=STALE_MINUTES):
+        requeue_stale(pk=email.pk)
+        email.refresh_from_db()
+    if email:
+        return email
+    return OutboxEmail.objects.create(
+        document_type=document_type,
+        object_id=document.pk,
+        recipient=recipient,
+        requested_by=user,
+    )
+
+
+def claim_emails(limit):
+    with transaction.atomic():
+        ids = list(
+            OutboxEmail.objects.select_for_update(skip_locked=True)
+            .filter(status='pending', next_attempt_at__lte=timezone.now())
+            .order_by('next_attempt_at')
+            .values_list('id', flat=True)[:limit]
+        )
+        if ids:
+            OutboxEmail.objects.filter(id__in=ids).update(status='sending', started_at=timezone.now())
+    return ids
+
+
+def requeue_stale(minutes=STALE_MINUTES, **filters):
+    # Relance les envois restés bloqués après l'arrêt brutal d'un worker
+    limit = timezone.now() - timedelta(minutes=minutes)
+    return OutboxEmail.objects.filter(status='sending', started_at__lt=limit, **filters).update(
+        status='pending', started_at=None,
+    )
+
+
+def get_documents(emails):
+    # Une requête par type de document pour tout le lot
+    documents = {}
+    for document_type, model_name in DOCUMENT_MODELS.items():
+        ids = {email.object_id for email in emails if email.document_type == document_type}
+        if ids:
+            model = apps.get_model(model_name)
+            queryset = model.objects.select_related('client', 'created_by').prefetch_related('items')
+            for document in queryset.filter(pk__in=ids):
+                documents[document_type, document.pk] = document
+    return documents
+
+
+def html_to_text(html):
+    # Version texte de l'email : sans l'en-tête HTML (styles), une ligne par bloc
+    text = unescape(strip_tags(_HTML_HEAD.sub('', html)))
+    lines = (' '.join(line.split()) for line in text.splitlines())
+    return re.sub(r'\n{3,}', '\n\n', '\n'.join(lines)).strip()
+
+
+def build_message(email, document):
+    template, subject = EMAIL_TEMPLATES[email.document_type]
+    html = render_to_string(template, {
+        email.document_type: document,
+        'company': get_company_context(),
+    })
+    content = pdf_cache.get_pdf(email.document_type, document)
+    if not content:
+        raise ValueError("La génération du PDF a échoué")
+    message = EmailMultiAlternatives(
+        subject=subject.format(number=document.number),
+        body=html_to_text(html),
+        from_email=settings.DEFAULT_FROM_EMAIL,
+        to=[email.recipient],
+    )
+    message.attach_alternative(html, 'text/html')
+    message.attach(f"{document.number}.pdf", content, 'application/pdf')
+    return message
+
+
+def retry_later(email, error):
+    # Délai doublé à chaque échec : EMAIL_RETRY_SECONDS, x2, x4...
+    email.attempts += 1
+    email.error = error
+    email.started_at = None
+    if email.attempts >= settings.EMAIL_MAX_ATTEMPTS:
+        email.status = 'failed'
+    else:
+        email.status = 'pending'
+        delay = settings.EMAIL_RETRY_SECONDS * 2 ** (email.attempts - 1)
+        email.next_attempt_at = timezone.now() + timedelta(seconds=delay)
+    email.save(update_fields=['attempts', 'error', 'started_at', 'status', 'next_attempt_at'])
+
+
+def send_emails(email_ids):
+    # Une seule connexion SMTP pour tout le lot, rouverte après une erreur
+    emails = list(OutboxEmail.objects.filter(pk__in=email_ids).order_by('pk'))
+    documents = get_documents(emails)
+    results = []
+    connection = get_connection()
+    try:
+        for email in emails:
+            document = documents.get((email.document_type, email.object_id))
+            if document is None:
+                email.status = 'failed'
+                email.error = "Document introuvable"
+                email.save(update_fields=['status', 'error'])
+                results.append((email.id, email.status))
+                continue
+            try:
+                message = build_message(email, document)
+                connection.open()
+                connection.send_messages([message])
+            except Exception as exc:
+                if isinstance(exc, (smtplib.SMTPException, OSError)):
+                    with suppress(smtplib.SMTPException, OSError):
+                        connection.close()
+                retry_later(email, str(exc) or exc.__class__.__name__)
+                results.append((email.id, email.status))
+                continue
+            # Marqué tout de suite : un worker arrêté en cours de lot ne
+            # renverra pas les emails déjà partis
+            OutboxEmail.objects.filter(pk=email.pk).update(
+                status='sent', sent_at=timezone.now(), error='', started_at=None,
+            )
+            results.append((email.id, 'sent'))
+    finally:
+        with suppress(smtplib.SMTPException, OSError):
+            connection.close()
+    return results
@@ -0,0 +1,228 @@
+from datetime import date, datetime
+from decimal import Decimal
+import csv
+import io
+import re
+import zipfile
+from xml.sax.saxutils import escape
+from django.db import models
+from django.utils import timezone
+from rest_framework.renderers import BaseRenderer
+from .pdf_export import ZipStream
+
+
+EXPORT_FORMATS = ('csv', 'xlsx')
+
+# Texte lu comme une formule par Excel / LibreOffice (injection CSV) :
+# préfixé d'une apostrophe, retirée à l'import (voir imports.Importer)
+FORMULA_PREFIXES = ('=', '+', '-', '@', '\t', '\r')
+
+
+class CSVRenderer(BaseRenderer):
+    # Ne sert qu'à la négociation de ?format=csv : l'export est un
+    # StreamingHttpResponse et les erreurs sont rendues en JSON
+    media_type = 'text/csv'
+    format = 'csv'
+
+
+class XLSXRenderer(BaseRenderer):
+    media_type = 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
+    format = 'xlsx'
+    charset = None
+    render_style = 'binary'
+
+
+def export_rows(queryset, columns, chunk_size):
+    # values_list() et iterator() : ni instances ni cache du queryset,
+    # la mémoire reste constante quel que soit le nombre de lignes
+    lookups = [lookup for lookup, _ in columns]
+    choices = {}
+    for index, lookup in enumerate(lookups):
+        field = _resolve_field(queryset.model, lookup)
+        # Libellés des statuts ; les taux de TVA restent numériques
+        if field.choices and isinstance(field, models.CharField):
+            choices[index] = dict(field.flatchoices)
+    rows = queryset.prefetch_related(None).values_list(*lookups).iterator(chunk_size=chunk_size)
+    for row in rows:
+        if choices:
+            row = list(row)
+            for index, labels in choices.items():
+                row[index] = labels.get(row[index], row[index])
+        yield row
+
+
+def _resolve_field(model, lookup):
+    *relations, name = lookup.split('__')
+    for relation in relations:
+        model = model._meta.get_field(relation).related_model
+    return model._meta.get_field(name)
+
+
+def neutralize_formula(text):
+    if text.startswith(FORMULA_PREFIXES):
+        return "'" + text
+    return text
+
+
+def _csv_value(value):
+    # Séparateur décimal français, lu tel quel par Excel et LibreOffice
+    if isinstance(value, Decimal):
+        return str(value).replace('.', ',')
+    if isinstance(value, datetime):
+        return timezone.localtime(value).strftime('%Y-%m-%d %H:%M:%S')
+    if value is None:
+        return ''
+    if isinstance(value, str):
+        return neutralize_formula(value)
+    return value
+
+
+def stream_csv(headers, rows, batch_size):
+    buffer = io.StringIO()
+    writer = csv.writer(buffer, delimiter=';')
+    # BOM : Excel détecte l'UTF-8 (accents des noms de clients)
+    buffer.write('\ufeff')
+    writer.writerow(headers)
+    for count, row in enumerate(rows, 1):
+        writer.writerow([_csv_value(value) for value in row])
+        if count % batch_size == 0:
+            yield buffer.getvalue().encode('utf-8')
+            buffer.seek(0)
+            buffer.truncate()
+    yield buffer.getvalue().encode('utf-8')
+
+
+# Caractères interdits en XML 1.0
+_INVALID_XML = re.compile('[\x00-\x08\x0b\x0c\x0e-\x1f]')
+_EXCEL_EPOCH = datetime(1899, 12, 30)
+
+XLSX_PARTS = {
+    '[Content_Types].xml': (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+        '<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">'
+        '<Default Extension="rels" ContentType="application/vnd.openxmlformats-package.relationships+xml"/>'
+        '<Default Extension="xml" ContentType="application/xml"/>'
+        '<Override PartName="/xl/workbook.xml" '
+        'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet.main+xml"/>'
+        '<Override PartName="/xl/worksheets/sheet1.xml" '
+        'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.worksheet+xml"/>'
+        '<Override PartName="/xl/styles.xml" '
+        'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.styles+xml"/>'
+        '</Types>'
+    ),
+    '_rels/.rels': (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+        '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+        '<Relationship Id="rId1" '
+        'Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/officeDocument" '
+        'Target="xl/workbook.xml"/>'
+        '</Relationships>'
+    ),
+    'xl/_rels/workbook.xml.rels': (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+        '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+        '<Relationship Id="rId1" '
+        'Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/worksheet" '
+        'Target="worksheets/sheet1.xml"/>'
+        '<Relationship Id="rId2" '
+        'Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/styles" '
+        'Target="styles.xml"/>'
+        '</Relationships>'
+    ),
+    # Styles : 1 date, 2 date et heure, 3 en-tête en gras
+    'xl/styles.xml': (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+        '<styleSheet xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main">'
+        '<numFmts count="1"><numFmt numFmtId="164" formatCode="dd/mm/yyyy hh:mm"/></numFmts>'
+        '<fonts count="2"><font><sz val="11"/><name val="Calibri"/></font>'
+        '<font><b/><sz val="11"/><name val="Calibri"/></font></fonts>'
+        '<fills count="2"><fill><patternFill patternType="none"/></fill>'
+        '<fill><patternFill patternType="gray125"/></fill></fills>'
+        '<borders count="1"><border><left/><right/><top/><bottom/><diagonal/></border></borders>'
+        '<cellStyleXfs count="1"><xf numFmtId="0" fontId="0" fillId="0" borderId="0"/></cellStyleXfs>'
+        '<cellXfs count="4">'
+        '<xf numFmtId="0" fontId="0" fillId="0" borderId="0" xfId="0"/>'
+        '<xf numFmtId="14" fontId="0" fillId="0" borderId="0" xfId="0" applyNumberFormat="1"/>'
+        '<xf numFmtId="164" fontId="0" fillId="0" borderId="0" xfId="0" applyNumberFormat="1"/>'
+        '<xf numFmtId="0" fontId="1" fillId="0" borderId="0" xfId="0" applyFont="1"/>'
+        '</cellXfs>'
+        '</styleSheet>'
+    ),
+}
+
+
+def _workbook_xml(title):
+    return (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+        '<workbook xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main" '
+        'xmlns:r="http://schemas.openxmlformats.org/officeDocument/2006/relationships">'
+        f'<sheets><sheet name="{escape(title[:31], {chr(34): "&quot;"})}" sheetId="1" r:id="rId1"/></sheets>'
+        '</workbook>'
+    )
+
+
+def _column_letter(index):
+    letters = ''
+    index += 1
+    while index:
+        index, remainder = divmod(index - 1, 26)
+        letters = chr(65 + remainder) + letters
+    return letters
+
+
+def _xlsx_cell(ref, value, style=0):
+    if value is None or value == '':
+        return ''
+    if isinstance(value, bool):
+        return f'<c r="{ref}" t="b"><v>{int(value)}</v></c>'
+    if isinstance(value, (int, float, Decimal)):
+        return f'<c r="{ref}"><v>{value}</v></c>'
+    if isinstance(value, datetime):
+        value = timezone.localtime(value).replace(tzinfo=None) if timezone.is_aware(value) else value
+        serial = (value - _EXCEL_EPOCH).total_seconds() / 86400
+        return f'<c r="{ref}" s="2"><v>{serial:.6f}</v></c>'
+    if isinstance(value, date):
+        return f'<c r="{ref}" s="1"><v>{(value - _EXCEL_EPOCH.date()).days}</v></c>'
+    text = escape(_INVALID_XML.sub('', neutralize_formula(str(value))))
+    style = f' s="{style}"' if style else ''
+    return f'<c r="{ref}" t="inlineStr"{style}><is><t xml:space="preserve">{text}</t></is></c>'
+
+
+def stream_xlsx(title, headers, rows, batch_size):
+    # Classeur écrit à la main, feuille en chaînes en ligne : aucune table
+    # de chaînes partagées à garder en mémoire, l'archive part au fil de
+    # l'eau (même flux que l'export ZIP des PDF)
+    stream = ZipStream()
+    letters = [_column_letter(index) for index in range(len(headers))]
+
+    with zipfile.ZipFile(stream, 'w', zipfile.ZIP_DEFLATED) as archive:
+        for name, content in XLSX_PARTS.items():
+            archive.writestr(name, content)
+        archive.writestr('xl/workbook.xml', _workbook_xml(title))
+        yield stream.pop()
+
+        with archive.open('xl/worksheets/sheet1.xml', 'w', force_zip64=True) as sheet:
+            sheet.write((
+                '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+                '<worksheet xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main">'
+                '<sheetViews><sheetView workbookViewId="0">'
+                '<pane ySplit="1" topLeftCell="A2" activePane="bottomLeft" state="frozen"/>'
+                '</sheetView></sheetViews><sheetData>'
+                '<row r="1">'
+                + ''.join(_xlsx_cell(f'{letter}1', header, 3) for letter, header in zip(letters, headers))
+                + '</row>'
+            ).encode('utf-8'))
+
+            chunk = []
+            for number, row in enumerate(rows, 2):
+                cells = ''.join(
+                    _xlsx_cell(f'{letter}{number}', value) for letter, value in zip(letters, row)
+                )
+                chunk.append(f'<row r="{number}">{cells}</row>')
+                if len(chunk) >= batch_size:
+                    sheet.write(''.join(chunk).encode('utf-8'))
+                    chunk = []
+                    yield stream.pop()
+            chunk.append('</sheetData></worksheet>')
+            sheet.write(''.join(chunk).encode('utf-8'))
+    yield stream.pop()
@@ -0,0 +1,284 @@
+from decimal import Decimal, InvalidOperation
+from itertools import islice
+from xml.etree import ElementTree
+import csv
+import io
+import posixpath
+import re
+import unicodedata
+import zipfile
+from django.conf import settings
+from django.db import models, transaction
+from rest_framework.exceptions import ValidationError
+from .exports import FORMULA_PREFIXES
+from . import response_cache
+
+
+class ImportFileError(ValueError):
+    pass
+
+
+SPREADSHEET_NS = '{http://schemas.openxmlformats.org/spreadsheetml/2006/main}'
+RELATIONSHIP_NS = '{http://schemas.openxmlformats.org/officeDocument/2006/relationships}'
+PACKAGE_NS = '{http://schemas.openxmlformats.org/package/2006/relationships}'
+CELL_REFERENCE = re.compile(r'([A-Z]+)')
+
+
+def normalize_header(text):
+    text = unicodedata.normalize('NFKD', str(text or ''))
+    text = ''.join(char for char in text if not unicodedata.combining(char))
+    return ' '.join(text.lower().replace('_', ' ').split())
+
+
+def normalize_key(value):
+    return ' '.join(str(value or '').split()).casefold()
+
+
+def read_csv(upload):
+    sample = upload.read(64 * 1024)
+    upload.seek(0)
+    # Excel enregistre souvent en Windows-1252 plutôt qu'en UTF-8
+    try:
+        sample.decode('utf-8-sig')
+        encoding = 'utf-8-sig'
+    except UnicodeDecodeError:
+        encoding = 'cp1252'
+    text = io.TextIOWrapper(upload, encoding=encoding, newline='')
+    first_line = sample.decode(encoding, errors='ignore').split('\n', 1)[0]
+    delimiter = max(';,\t', key=first_line.count)
+    yield from csv.reader(text, delimiter=delimiter)
+
+
+def _numeric_cell(text):
+    # 0.1 + 0.2 stocké 0.30000000000000004 : on arrondit avant la validation
+    try:
+        return format(round(Decimal(text), 10).normalize(), 'f')
+    except InvalidOperation:
+        return text
+
+
+def _xlsx_sheet_path(archive):
+    try:
+        workbook = ElementTree.fromstring(archive.read('xl/workbook.xml'))
+        relations = ElementTree.fromstring(archive.read('xl/_rels/workbook.xml.rels'))
+    except KeyError:
+        raise ImportFileError("Fichier XLSX invalide")
+    sheet = workbook.find(f'{SPREADSHEET_NS}sheets/{SPREADSHEET_NS}sheet')
+    relation_id = sheet.get(f'{RELATIONSHIP_NS}id') if sheet is not None else None
+    for relation in relations.iter(f'{PACKAGE_NS}Relationship'):
+        if relation.get('Id') == relation_id:
+            target = relation.get('Target')
+            if target.startswith('/'):
+                return target.lstrip('/')
+            return posixpath.normpath(posixpath.join('xl', target))
+    raise ImportFileError("Fichier XLSX sans feuille de calcul")
+
+
+def read_xlsx(upload):
+    # Première feuille lue au fil de l'eau (iterparse), sans openpyxl
+    try:
+        archive = zipfile.ZipFile(upload)
+    except zipfile.BadZipFile:
+        raise ImportFileError("Fichier XLSX invalide")
+    with archive:
+        shared = []
+        if 'xl/sharedStrings.xml' in archive.namelist():
+            with archive.open('xl/sharedStrings.xml') as strings:
+                for _, element in ElementTree.iterparse(strings):
+                    if element.tag == f'{SPREADSHEET_NS}si':
+                        shared.append(''.join(
+                            node.text or '' for node in element.iter(f'{SPREADSHEET_NS}t')
+                        ))
+                        element.clear()
+
+        with archive.open(_xlsx_sheet_path(archive)) as sheet:
+            for _, element in ElementTree.iterparse(sheet):
+                if element.tag != f'{SPREADSHEET_NS}row':
+                    continue
+                values = {}
+                for position, cell in enumerate(element.iter(f'{SPREADSHEET_NS}c')):
+                    reference = CELL_REFERENCE.match(cell.get('r', ''))
+                    if reference:
+                        position = 0
+                        for letter in reference.group(1):
+                            position = position * 26 + ord(letter) - 64
+                        position -= 1
+                    cell_type = cell.get('t')
+                    if cell_type == 'inlineStr':
+                        text = ''.join(node.text or '' for node in cell.iter(f'{SPREADSHEET_NS}t'))
+                    else:
+                        value = cell.find(f'{SPREADSHEET_NS}v')
+                        text = (value.text or '') if value is not None else ''
+                        if cell_type == 's' and text:
+                            text = shared[int(text)]
+                        elif cell_type in (None, 'n') and text:
+                            text = _numeric_cell(text)
+                    values[position] = text
+                element.clear()
+                yield [values.get(index, '') for index in range(max(values, default=-1) + 1)]
+
+
+def read_rows(upload):
+    if zipfile.is_zipfile(upload):
+        upload.seek(0)
+        return read_xlsx(upload)
+    upload.seek(0)
+    return read_csv(upload)
+
+
+def _clean_decimal(value, field):
+    # « 1 500,50 », « 18 % » : formats saisis dans un tableur français
+    text = re.sub(r'[\s%]', '', value).replace(',', '.')
+    if field.choices:
+        try:
+            return format(Decimal(text).normalize(), 'f')
+        except InvalidOperation:
+            pass
+    return text
+
+
+class Importer:
+    # Import CSV / XLSX par lots : validation du sérialiseur sur
+    # IMPORT_BATCH_SIZE lignes, rapprochement des lignes existantes sur
+    # key_fields (le premier renseigné : NINEA puis nom pour les clients),
+    # puis un INSERT ... ON CONFLICT (id) DO UPDATE par lot. Les clés
+    # existantes sont chargées en une requête.
+
+    def __init__(self, serializer_class, columns, key_fields):
+        self.serializer_class = serializer_class
+        self.model = serializer_class.Meta.model
+        self.columns = columns
+        self.key_fields = key_fields
+        self.fields = {field: self.model._meta.get_field(field) for field in columns}
+        self.aliases = {}
+        for field, aliases in columns.items():
+            for alias in (field, *aliases):
+                self.aliases[normalize_header(alias)] = field
+
+    def map_headers(self, headers):
+        mapping, ignored = {}, []
+        for index, header in enumerate(headers):
+            field = self.aliases.get(normalize_header(header))
+            if field and field not in mapping.values():
+                mapping[index] = field
+            elif str(header).strip():
+                ignored.append(str(header).strip())
+        missing = [
+            str(self.fields[field].verbose_name)
+            for field, serializer_field in self.serializer_class().fields.items()
+            if field in self.columns and serializer_field.required and field not in mapping.values()
+        ]
+        if missing:
+            raise ImportFileError(f"Colonne(s) obligatoire(s) absente(s) : {', '.join(missing)}")
+        return mapping, ignored
+
+    def load_existing(self):
+        existing = {field: {} for field in self.key_fields}
+        for pk, *values in self.model.objects.order_by('pk').values_list('pk', *self.key_fields).iterator():
+            for field, value in zip(self.key_fields, values):
+                if value:
+                    existing[field].setdefault(normalize_key(value), pk)
+        return existing
+
+    def row_key(self, data):
+        for field in self.key_fields:
+            value = normalize_key(data.get(field))
+            if value:
+                return field, value
+        return None
+
+    def clean_row(self, mapping, row):
+        data = {}
+        for index, field in mapping.items():
+            value = row[index].strip() if index < len(row) and row[index] is not None else ''
+            # Apostrophe ajoutée à l'export devant une formule (exports.neutralize_formula)
+            if value.startswith("'") and value[1:].startswith(FORMULA_PREFIXES):
+                value = value[1:]
+            model_field = self.fields[field]
+            if isinstance(model_field, models.DecimalField) and value:
+                value = _clean_decimal(value, model_field)
+            data[field] = value
+        return data
+
+    def run(self, upload, dry_run=False):
+        rows = read_rows(upload)
+        try:
+            headers = next(rows)
+        except StopIteration:
+            raise ImportFileError("Fichier vide")
+        except (csv.Error, ElementTree.ParseError, UnicodeDecodeError) as exc:
+            raise ImportFileError(f"Fichier illisible : {exc}")
+        mapping, ignored = self.map_headers(headers)
+        update_fields = [*mapping.values(), 'updated_at']
+
+        existing = self.load_existing()
+        seen = {}
+        report = {
+            'dry_run': dry_run, 'total': 0, 'created': 0, 'updated': 0,
+            'error_count': 0, 'errors': [], 'ignored_columns': ignored,
+        }
+        numbered = enumerate(rows, 2)
+        batch_size = settings.IMPORT_BATCH_SIZE
+        try:
+            with transaction.atomic():
+                while True:
+                    batch = list(islice(numbered, batch_size))
+                    if not batch:
+                        break
+                    instances = self.process_batch(batch, mapping, existing, seen, report)
+                    if instances and not dry_run:
+                        self.model.objects.bulk_create(
+                            instances, batch_size=batch_size,
+                            update_conflicts=True, unique_fields=['id'], update_fields=update_fields,
+                        )
+                    if report['total'] > settings.IMPORT_MAX_ROWS:
+                        raise ImportFileError(f"Import limité à {settings.IMPORT_MAX_ROWS} lignes")
+        except (csv.Error, ElementTree.ParseError, UnicodeDecodeError) as exc:
+            raise ImportFileError(f"Fichier illisible : {exc}")
+
+        if not dry_run and (report['created'] or report['updated']):
+            # bulk_create n'émet pas de signaux
+            response_cache.bump(self.model)
+        return report
+
+    def add_error(self, report, number, errors):
+        report['error_count'] += 1
+        if len(report['errors']) < settings.IMPORT_MAX_ERRORS:
+            report['errors'].append({'row': number, 'errors': errors})
+
+    def process_batch(self, batch, mapping, existing, seen, report):
+        rows = []
+        for number, row in batch:
+            if not any(str(value).strip() for value in row):
+                continue
+            rows.append((number, self.clean_row(mapping, row)))
+        report['total'] += len(rows)
+
+        serializer = self.serializer_class()
+        instances = []
+        for number, data in rows:
+            try:
+                validated = serializer.run_validation(data)
+            except ValidationError as exc:
+                self.add_error(report, number, exc.detail)
+                continue
+            key = self.row_key(validated)
+            instance = self.model(**validated)
+            if key is not None:
+                instance.pk = existing[key[0]].get(key[1])
+            # Deux lignes peuvent désigner le même enregistrement par des clés
+            # différentes (NINEA sur l'une, nom sur l'autre) : un seul
+            # INSERT ... ON CONFLICT ne peut pas le modifier deux fois
+            duplicate = next((seen[k] for k in (key, ('id', instance.pk)) if k in seen), None)
+            if duplicate is not None:
+                self.add_error(report, number, {'non_field_errors': [f"Doublon de la ligne {duplicate}"]})
+                continue
+            if key is not None:
+                seen[key] = number
+            if instance.pk:
+                seen['id', instance.pk] = number
+                report['updated'] += 1
+            else:
+                report['created'] += 1
+            instances.append(instance)
+        return instances
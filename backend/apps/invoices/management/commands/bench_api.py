@@ -0,0 +1,198 @@
+from datetime import date
+import json
+import platform
+import statistics
+import time
+import tracemalloc
+import django
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext, override_settings
+from django.utils import timezone
+from rest_framework.test import APIClient
+from apps.accounts.models import User
+from apps.clients.models import Client
+from apps.products.models import Product
+from apps.invoices.models import Invoice
+from apps.proformas.models import Proforma
+from apps.delivery_notes.models import DeliveryNote
+
+
+class Command(BaseCommand):
+    help = (
+        "Mesure les principaux endpoints de l'API (p50/p95, requêtes SQL, pic mémoire) "
+        "sur le jeu de données courant (voir seed_bench) ; les écritures sont annulées"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--runs', type=int, default=20)
+        parser.add_argument('--warmup', type=int, default=1)
+        parser.add_argument('--only', help="Scénarios à exécuter, séparés par des virgules")
+        parser.add_argument('--output', help="Fichier JSON où enregistrer les résultats (baseline)")
+        parser.add_argument('--baseline', help="Fichier JSON de référence à comparer")
+        parser.add_argument('--tolerance', type=float, default=0.2, help="Dégradation p95 tolérée (0.2 = 20 %%)")
+        parser.add_argument('--fail-on-regression', action='store_true')
+
+    def handle(self, *args, **options):
+        if not Invoice.objects.exists() or not Proforma.objects.exists():
+            raise CommandError("Aucune donnée : lancez d'abord manage.py seed_bench")
+        self.user = User.objects.filter(username='bench').first() or User.objects.filter(is_active=True).first()
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+        scenarios = self.get_scenarios()
+        if options['only']:
+            names = {name.strip() for name in options['only'].split(',')}
+            unknown = names - set(scenarios)
+            if unknown:
+                raise CommandError(f"Scénario inconnu : {', '.join(sorted(unknown))}")
+            scenarios = {name: scenario for name, scenario in scenarios.items() if name in names}
+
+        results = {}
+        with override_settings(ALLOWED_HOSTS=['*']):
+            with transaction.atomic():
+                for name, scenario in scenarios.items():
+                    results[name] = self.run_scenario(name, scenario, options['runs'], options['warmup'])
+                transaction.set_rollback(True)
+
+        report = {
+            'created_at': timezone.now().isoformat(),
+            'python': platform.python_version(),
+            'django': django.get_version(),
+            'database': connection.vendor,
+            'dataset': {
+                'clients': Client.objects.count(),
+                'products': Product.objects.count(),
+                'invoices': Invoice.objects.count(),
+                'proformas': Proforma.objects.count(),
+                'delivery_notes': DeliveryNote.objects.count(),
+            },
+            'runs': options['runs'],
+            'results': results,
+        }
+        if options['output']:
+            with open(options['output'], 'w') as f:
+                json.dump(report, f, indent=2)
+            self.stdout.write(f"Résultats enregistrés dans {options['output']}")
+        if options['baseline']:
+            regressions = self.compare(results, options['baseline'], options['tolerance'])
+            if regressions and options['fail_on_regression']:
+                raise CommandError(f"Régression : {', '.join(regressions)}")
+
+    def get_scenarios(self):
+        invoice = Invoice.objects.order_by('-id').first()
+        proforma = Proforma.objects.order_by('-id').first()
+        delivery_note = DeliveryNote.objects.order_by('-id').first()
+        client_name = invoice.client.name.split()[1]
+        product = Product.objects.order_by('id').first()
+        # Une proforma non convertie différente par exécution
+        convertible = list(
+            Proforma.objects.exclude(status='converted').order_by('-id').values_list('id', flat=True)[:500]
+        )
+
+        def document_payload(document):
+            items = [
+                {'product': item.product_id, 'description': item.description,
+                 'quantity': str(item.quantity), 'unit_price': str(getattr(item, 'unit_price', 0))}
+                for item in document.items.all()
+            ]
+            return {'client': document.client_id, 'date': date.today().isoformat(), 'items': items}
+
+        invoice_data = document_payload(invoice)
+        update_data = dict(invoice_data, items=[
+            dict(data, id=item.id) for data, item in zip(invoice_data['items'], invoice.items.order_by('id'))
+        ])
+
+        def convert():
+            if not convertible:
+                raise CommandError("Plus de proforma à convertir : augmentez le jeu de données")
+            return 'post', f'/api/proformas/{convertible.pop()}/convert_to_invoice/', None
+
+        return {
+            'invoices_list': lambda: ('get', '/api/invoices/', None),
+            'invoices_list_cached': lambda: ('get', '/api/invoices/', None),
+            'invoices_list_cursor': lambda: ('get', '/api/invoices/?pagination=cursor', None),
+            'invoices_list_expand': lambda: ('get', '/api/invoices/?expand=items', None),
+            'invoices_search': lambda: ('get', f'/api/invoices/?search={client_name}', None),
+            'invoices_retrieve': lambda: ('get', f'/api/invoices/{invoice.id}/', None),
+            'invoices_retrieve_cached': lambda: ('get', f'/api/invoices/{invoice.id}/', None),
+            'invoices_create': lambda: ('post', '/api/invoices/', invoice_data),
+            'invoices_update': lambda: ('put', f'/api/invoices/{invoice.id}/', update_data),
+            'invoices_dashboard': lambda: ('get', '/api/invoices/dashboard/', None),
+            'invoices_pdf': lambda: ('get', f'/api/invoices/{invoice.id}/pdf/', None),
+            'invoices_pdf_cached': lambda: ('get', f'/api/invoices/{invoice.id}/pdf/', None),
+            'proformas_list': lambda: ('get', '/api/proformas/', None),
+            'proformas_retrieve': lambda: ('get', f'/api/proformas/{proforma.id}/', None),
+            'proformas_stats': lambda: ('get', '/api/proformas/stats/', None),
+            'proformas_convert_to_invoice': convert,
+            'delivery_notes_list': lambda: ('get', '/api/delivery-notes/', None),
+            'delivery_notes_retrieve': lambda: ('get', f'/api/delivery-notes/{delivery_note.id}/', None),
+            'clients_search': lambda: ('get', f'/api/clients/?search={client_name}', None),
+            'products_lookup': lambda: ('get', f'/api/lookup/?q={product.name[:4]}', None),
+        }
+
+    def request(self, scenario):
+        method, path, data = scenario()
+        response = getattr(self.client, method)(path, data, format='json')
+        if response.status_code >= 400:
+            raise CommandError(f"{method.upper()} {path} : HTTP {response.status_code}")
+        return response
+
+    def run_scenario(self, name, scenario, runs, warmup):
+        # Le PDF non mis en cache mesure le rendu complet ; le cache des
+        # réponses n'est actif que pour les scénarios *_cached
+        response_cache_seconds = (settings.RESPONSE_CACHE_SECONDS or 300) if name.endswith('_cached') else 0
+        with override_settings(PDF_CACHE_ENABLED=name != 'invoices_pdf', RESPONSE_CACHE_SECONDS=response_cache_seconds):
+            for _ in range(warmup):
+                self.request(scenario)
+
+            timings, queries = [], []
+            for _ in range(runs):
+                with CaptureQueriesContext(connection) as captured:
+                    start = time.perf_counter()
+                    self.request(scenario)
+                    timings.append((time.perf_counter() - start) * 1000)
+                queries.append(len(captured))
+
+            # Mesure mémoire à part : tracemalloc ralentit fortement l'exécution
+            tracemalloc.start()
+            try:
+                self.request(scenario)
+                peak = tracemalloc.get_traced_memory()[1]
+            finally:
+                tracemalloc.stop()
+
+        timings.sort()
+        result = {
+            'p50_ms': round(statistics.median(timings), 2),
+            'p95_ms': round(timings[min(len(timings) - 1, int(len(timings) * 0.95))], 2),
+            'mean_ms': round(statistics.mean(timings), 2),
+            'queries': max(queries),
+            'peak_kb': round(peak / 1024, 1),
+        }
+        self.stdout.write(
+            f"{name:<30} p50 {result['p50_ms']:>8.2f} ms  p95 {result['p95_ms']:>8.2f} ms  "
+            f"{result['queries']:>3} requêtes  {result['peak_kb']:>9.1f} Ko"
+        )
+        return result
+
+    def compare(self, results, path, tolerance):
+        with open(path) as f:
+            baseline = json.load(f)['results']
+        self.stdout.write(f"\nComparaison avec {path} :")
+        regressions = []
+        for name, result in results.items():
+            reference = baseline.get(name)
+            if reference is None:
+                continue
+            delta = (result['p95_ms'] - reference['p95_ms']) / reference['p95_ms'] if reference['p95_ms'] else 0
+            regression = delta > tolerance or result['queries'] > reference['queries']
+            label = self.style.ERROR('RÉGRESSION') if regression else self.style.SUCCESS('OK')
+            self.stdout.write(
+                f"{name:<30} p95 {reference['p95_ms']:>8.2f} -> {result['p95_ms']:>8.2f} ms ({delta:+.0%})  "
+                f"requêtes {reference['queries']} -> {result['queries']}  {label}"
+            )
+            if regression:
+                regressions.append(name)
+        return regressions
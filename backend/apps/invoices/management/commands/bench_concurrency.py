@@ -0,0 +1,222 @@
+from concurrent.futures import ThreadPoolExecutor
+import asyncio
+import io
+import json
+import os
+import random
+import statistics
+import subprocess
+import sys
+import time
+from django.conf import settings
+from django.core.handlers.asgi import ASGIHandler
+from django.core.handlers.wsgi import WSGIHandler
+from django.core.management.base import BaseCommand, CommandError
+from django.test.utils import override_settings
+from rest_framework_simplejwt.tokens import RefreshToken
+from apps.accounts.models import User
+from apps.clients.models import Client
+from apps.invoices.models import Invoice
+from apps.products.models import Product
+
+
+MODES = {
+    # mode : (libellé, ASYNC_VIEWS)
+    'wsgi': ('WSGI, worker synchrone', '0'),
+    'asgi': ('ASGI, lectures asynchrones', '1'),
+}
+
+
+class Command(BaseCommand):
+    help = (
+        "Compare un worker WSGI synchrone et un worker ASGI sous charge mixte (PDF et lectures) : "
+        "requêtes envoyées à cadence fixe, latence mesurée depuis leur arrivée"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--mode', choices=['both', *MODES], default='both')
+        parser.add_argument('--workers', type=int, default=1,
+                            help="Workers WSGI simulés par des threads (un processus gunicorn = 1)")
+        parser.add_argument('--duration', type=float, default=10, help="Durée de la charge (secondes)")
+        parser.add_argument('--rate', type=float, default=20, help="Lectures par seconde (listes, détail, lookup)")
+        parser.add_argument('--pdf-rate', type=float, default=1, help="Rendus PDF par seconde (cache PDF désactivé)")
+        parser.add_argument('--seed', type=int, default=42)
+        parser.add_argument('--json', action='store_true', help="Résultat brut en JSON (usage interne)")
+
+    def handle(self, *args, **options):
+        if options['mode'] == 'both':
+            return self.compare(options)
+
+        if not Invoice.objects.exists():
+            raise CommandError("Aucune donnée : lancez d'abord manage.py seed_bench")
+        expected = MODES[options['mode']][1] == '1'
+        if settings.ASYNC_VIEWS != expected:
+            raise CommandError(f"ASYNC_VIEWS={MODES[options['mode']][1]} requis pour le mode {options['mode']}")
+
+        jobs = self.get_jobs(options['duration'], options['rate'], options['pdf_rate'], options['seed'])
+        user = User.objects.filter(username='bench').first() or User.objects.filter(is_active=True).first()
+        self.token = str(RefreshToken.for_user(user).access_token)
+
+        # Chemin complet mesuré : ni cache PDF ni cache des réponses
+        with override_settings(ALLOWED_HOSTS=['*'], PDF_CACHE_ENABLED=False, RESPONSE_CACHE_SECONDS=0):
+            start = time.perf_counter()
+            if options['mode'] == 'wsgi':
+                timings = self.run_wsgi(jobs, options['workers'])
+            else:
+                timings = asyncio.run(self.run_asgi(jobs))
+            elapsed = time.perf_counter() - start
+
+        result = self.summarize(timings, elapsed)
+        if options['json']:
+            self.stdout.write(json.dumps(result))
+        else:
+            self.report({options['mode']: result})
+
+    def get_jobs(self, duration, rate, pdf_rate, seed):
+        # Arrivées de Poisson : (instant d'arrivée, type, chemin), triées
+        invoice_ids = list(Invoice.objects.order_by('-id').values_list('id', flat=True)[:200])
+        client = Client.objects.order_by('id').first()
+        product = Product.objects.order_by('id').first()
+        reads = [
+            '/api/invoices/',
+            '/api/invoices/?pagination=cursor',
+            '/api/proformas/',
+            '/api/delivery-notes/',
+            '/api/invoices/dashboard/',
+            f'/api/clients/?search={client.name.split()[-1]}',
+            f'/api/lookup/?q={product.name[:4]}',
+            *(f'/api/invoices/{{}}/' for _ in range(2)),
+        ]
+        generator = random.Random(seed)
+        jobs = []
+        for kind, kind_rate in (('list', rate), ('pdf', pdf_rate)):
+            at = generator.expovariate(kind_rate) if kind_rate else duration
+            while at < duration:
+                if kind == 'pdf':
+                    path = f'/api/invoices/{generator.choice(invoice_ids)}/pdf/'
+                else:
+                    path = generator.choice(reads).format(generator.choice(invoice_ids))
+                jobs.append((at, kind, path))
+                at += generator.expovariate(kind_rate)
+        return sorted(jobs)
+
+    def run_wsgi(self, jobs, workers):
+        # Les requêtes arrivées pendant que les workers sont occupés
+        # attendent, comme dans la file de gunicorn
+        handler = WSGIHandler()
+        timings = []
+
+        def call(kind, path, arrival):
+            path, _, query = path.partition('?')
+            environ = {
+                'REQUEST_METHOD': 'GET', 'PATH_INFO': path, 'QUERY_STRING': query,
+                'SERVER_NAME': 'localhost', 'SERVER_PORT': '80', 'HTTP_HOST': 'localhost',
+                'HTTP_AUTHORIZATION': f'Bearer {self.token}',
+                'wsgi.url_scheme': 'http', 'wsgi.input': io.BytesIO(), 'wsgi.errors': sys.stderr,
+            }
+            statuses = []
+            body = handler(environ, lambda status, headers: statuses.append(status))
+            try:
+                for _ in body:
+                    pass
+            finally:
+                body.close()
+            if not statuses[0].startswith('200'):
+                raise CommandError(f"GET {path} : HTTP {statuses[0]}")
+            timings.append((kind, time.perf_counter() - arrival))
+
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            futures = []
+            start = time.perf_counter()
+            for at, kind, path in jobs:
+                time.sleep(max(0, start + at - time.perf_counter()))
+                futures.append(pool.submit(call, kind, path, start + at))
+            for future in futures:
+                future.result()
+        return timings
+
+    async def run_asgi(self, jobs):
+        handler = ASGIHandler()
+        timings = []
+        start = time.perf_counter()
+
+        async def call(at, kind, path):
+            await asyncio.sleep(max(0, start + at - time.perf_counter()))
+            path, _, query = path.partition('?')
+            scope = {
+                'type': 'http', 'asgi': {'version': '3.0'}, 'http_version': '1.1',
+                'method': 'GET', 'scheme': 'http', 'path': path, 'raw_path': path.encode(),
+                'query_string': query.encode(), 'root_path': '',
+                'headers': [(b'host', b'localhost'), (b'authorization', f'Bearer {self.token}'.encode())],
+                'client': ('127.0.0.1', 0), 'server': ('localhost', 80),
+            }
+            done = asyncio.Event()
+            received = []
+
+            async def receive():
+                if not received:
+                    received.append(True)
+                    return {'type': 'http.request', 'body': b'', 'more_body': False}
+                await done.wait()
+                return {'type': 'http.disconnect'}
+
+            async def send(message):
+                if message['type'] == 'http.response.start' and message['status'] != 200:
+                    raise CommandError(f"GET {path} : HTTP {message['status']}")
+                if message['type'] == 'http.response.body' and not message.get('more_body'):
+                    done.set()
+
+            await handler(scope, receive, send)
+            timings.append((kind, time.perf_counter() - start - at))
+
+        await asyncio.gather(*(call(at, kind, path) for at, kind, path in jobs))
+        return timings
+
+    def summarize(self, timings, elapsed):
+        result = {'elapsed_s': round(elapsed, 2), 'requests_per_s': round(len(timings) / elapsed, 1)}
+        for kind in ('list', 'pdf'):
+            values = sorted(duration * 1000 for name, duration in timings if name == kind)
+            if values:
+                result[kind] = {
+                    'count': len(values),
+                    'p50_ms': round(statistics.median(values), 1),
+                    'p95_ms': round(values[min(len(values) - 1, int(len(values) * 0.95))], 1),
+                    'max_ms': round(values[-1], 1),
+                }
+        return result
+
+    def compare(self, options):
+        # Un processus par mode : les routes asynchrones sont choisies au
+        # chargement des URLs (ASYNC_VIEWS)
+        manage = os.path.join(settings.BASE_DIR, 'manage.py')
+        arguments = [
+            '--workers', str(options['workers']), '--duration', str(options['duration']),
+            '--rate', str(options['rate']), '--pdf-rate', str(options['pdf_rate']),
+            '--seed', str(options['seed']), '--json',
+        ]
+        results = {}
+        for mode, (_, async_views) in MODES.items():
+            completed = subprocess.run(
+                [sys.executable, manage, 'bench_concurrency', '--mode', mode, *arguments],
+                env=dict(os.environ, ASYNC_VIEWS=async_views), capture_output=True, text=True,
+            )
+            if completed.returncode:
+                raise CommandError(f"Mode {mode} : {completed.stderr.strip().splitlines()[-1]}")
+            results[mode] = json.loads(completed.stdout.strip().splitlines()[-1])
+        self.report(results)
+
+    def report(self, results):
+        for mode, result in results.items():
+            self.stdout.write(f"{MODES[mode][0]} : {result['elapsed_s']} s, {result['requests_per_s']} requêtes/s")
+            for kind, label in (('list', 'lectures'), ('pdf', 'PDF')):
+                if kind in result:
+                    values = result[kind]
+                    self.stdout.write(
+                        f"  {label:<9} {values['count']:>4}  p50 {values['p50_ms']:>8.1f} ms  "
+                        f"p95 {values['p95_ms']:>8.1f} ms  max {values['max_ms']:>8.1f} ms"
+                    )
+        if 'wsgi' in results and 'asgi' in results:
+            before, after = results['wsgi']['list']['p95_ms'], results['asgi']['list']['p95_ms']
+            self.stdout.write(self.style.SUCCESS(
+                f"p95 des lectures sous charge PDF : {before} -> {after} ms ({before / after:.1f}x)"
+            ))
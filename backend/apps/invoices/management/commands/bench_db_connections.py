@@ -0,0 +1,199 @@
+import asyncio
+import importlib.util
+import io
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+from django.conf import settings
+from django.core.handlers.asgi import ASGIHandler
+from django.core.handlers.wsgi import WSGIHandler
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test.utils import override_settings
+from rest_framework_simplejwt.tokens import RefreshToken
+from apps.accounts.models import User
+from apps.clients.models import Client
+from apps.invoices.models import Invoice
+from apps.products.models import Product
+
+
+PROFILES = {
+    # profil : (libellé, variables d'environnement)
+    'none': ('Une connexion par requête', {'DB_CONN_MAX_AGE': '0', 'DB_POOL': 'False'}),
+    'persistent': ('Connexion persistante', {'DB_CONN_MAX_AGE': '60', 'DB_POOL': 'False'}),
+    'pool': ('Pool psycopg 3', {'DB_CONN_MAX_AGE': '0', 'DB_POOL': 'True'}),
+}
+
+
+class Command(BaseCommand):
+    help = (
+        "Mesure la latence par requête de l'API selon la gestion des connexions PostgreSQL : "
+        "une connexion par requête, connexion persistante (CONN_MAX_AGE) ou pool psycopg 3"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--profile', choices=['all', *PROFILES], default='all')
+        parser.add_argument('--handler', choices=['wsgi', 'asgi'], default='wsgi')
+        parser.add_argument('--requests', type=int, default=200)
+        parser.add_argument('--warmup', type=int, default=10)
+        parser.add_argument('--json', action='store_true', help="Résultat brut en JSON (usage interne)")
+
+    def handle(self, *args, **options):
+        if options['profile'] == 'all':
+            return self.compare(options)
+
+        if not Invoice.objects.exists():
+            raise CommandError("Aucune donnée : lancez d'abord manage.py seed_bench")
+        database = settings.DATABASES['default']
+        if options['profile'] == 'pool' and 'pool' not in database.get('OPTIONS', {}):
+            raise CommandError("DB_POOL=True requis pour le profil pool")
+
+        paths = self.get_paths()
+        user = User.objects.filter(username='bench').first() or User.objects.filter(is_active=True).first()
+        self.token = str(RefreshToken.for_user(user).access_token)
+        # Les requêtes ouvrent leurs propres connexions
+        connection.close()
+
+        # Cache des réponses désactivé : chaque requête interroge la base
+        with override_settings(ALLOWED_HOSTS=['*'], RESPONSE_CACHE_SECONDS=0):
+            if options['handler'] == 'wsgi':
+                timings = self.run_wsgi(paths, options['requests'], options['warmup'])
+            else:
+                timings = asyncio.run(self.run_asgi(paths, options['requests'], options['warmup']))
+
+        timings.sort()
+        result = {
+            'p50_ms': round(statistics.median(timings), 2),
+            'p95_ms': round(timings[min(len(timings) - 1, int(len(timings) * 0.95))], 2),
+            'mean_ms': round(statistics.mean(timings), 2),
+            'open_connections': self.open_connections(),
+        }
+        if options['json']:
+            self.stdout.write(json.dumps(result))
+        else:
+            self.report(options['handler'], {options['profile']: result})
+
+    def get_paths(self):
+        # Lectures courtes : le coût de connexion y pèse le plus
+        invoice = Invoice.objects.order_by('-id').first()
+        client = Client.objects.order_by('id').first()
+        product = Product.objects.order_by('id').first()
+        return [
+            f'/api/invoices/{invoice.id}/',
+            f'/api/clients/{client.id}/',
+            f'/api/products/{product.id}/',
+            '/api/invoices/dashboard/',
+        ]
+
+    def run_wsgi(self, paths, count, warmup):
+        # request_started / request_finished : close_old_connections() comme sous gunicorn
+        handler = WSGIHandler()
+        timings = []
+        for index in range(warmup + count):
+            path, _, query = paths[index % len(paths)].partition('?')
+            environ = {
+                'REQUEST_METHOD': 'GET', 'PATH_INFO': path, 'QUERY_STRING': query,
+                'SERVER_NAME': 'localhost', 'SERVER_PORT': '80', 'HTTP_HOST': 'localhost',
+                'HTTP_AUTHORIZATION': f'Bearer {self.token}',
+                'wsgi.url_scheme': 'http', 'wsgi.input': io.BytesIO(), 'wsgi.errors': sys.stderr,
+            }
+            statuses = []
+            start = time.perf_counter()
+            body = handler(environ, lambda status, headers: statuses.append(status))
+            try:
+                for _ in body:
+                    pass
+            finally:
+                body.close()
+            if not statuses[0].startswith('200'):
+                raise CommandError(f"GET {path} : HTTP {statuses[0]}")
+            if index >= warmup:
+                timings.append((time.perf_counter() - start) * 1000)
+        return timings
+
+    async def run_asgi(self, paths, count, warmup):
+        handler = ASGIHandler()
+        timings = []
+        for index in range(warmup + count):
+            path, _, query = paths[index % len(paths)].partition('?')
+            scope = {
+                'type': 'http', 'asgi': {'version': '3.0'}, 'http_version': '1.1',
+                'method': 'GET', 'scheme': 'http', 'path': path, 'raw_path': path.encode(),
+                'query_string': query.encode(), 'root_path': '',
+                'headers': [(b'host', b'localhost'), (b'authorization', f'Bearer {self.token}'.encode())],
+                'client': ('127.0.0.1', 0), 'server': ('localhost', 80),
+            }
+            done = asyncio.Event()
+            received = []
+
+            async def receive():
+                if not received:
+                    received.append(True)
+                    return {'type': 'http.request', 'body': b'', 'more_body': False}
+                await done.wait()
+                return {'type': 'http.disconnect'}
+
+            async def send(message):
+                if message['type'] == 'http.response.start' and message['status'] != 200:
+                    raise CommandError(f"GET {path} : HTTP {message['status']}")
+                if message['type'] == 'http.response.body' and not message.get('more_body'):
+                    done.set()
+
+            start = time.perf_counter()
+            await handler(scope, receive, send)
+            if index >= warmup:
+                timings.append((time.perf_counter() - start) * 1000)
+        return timings
+
+    def open_connections(self):
+        # Connexions restées ouvertes côté serveur après la charge (hors celle-ci)
+        if connection.vendor != 'postgresql':
+            return None
+        with connection.cursor() as cursor:
+            cursor.execute(
+                "SELECT COUNT(*) - 1 FROM pg_stat_activity WHERE datname = current_database()"
+            )
+            return cursor.fetchone()[0]
+
+    def compare(self, options):
+        # Un processus par profil : les paramètres de connexion sont lus au démarrage
+        manage = os.path.join(settings.BASE_DIR, 'manage.py')
+        profiles = list(PROFILES)
+        if connection.vendor != 'postgresql' or importlib.util.find_spec('psycopg_pool') is None:
+            self.stdout.write(self.style.WARNING(
+                'Profil pool ignoré : PostgreSQL et pip install "psycopg[binary,pool]" requis'
+            ))
+            profiles.remove('pool')
+        arguments = [
+            '--handler', options['handler'], '--requests', str(options['requests']),
+            '--warmup', str(options['warmup']), '--json',
+        ]
+        results = {}
+        for profile in profiles:
+            completed = subprocess.run(
+                [sys.executable, manage, 'bench_db_connections', '--profile', profile, *arguments],
+                env=dict(os.environ, **PROFILES[profile][1]), capture_output=True, text=True,
+            )
+            if completed.returncode:
+                raise CommandError(f"Profil {profile} : {completed.stderr.strip().splitlines()[-1]}")
+            results[profile] = json.loads(completed.stdout.strip().splitlines()[-1])
+        self.report(options['handler'], results)
+
+    def report(self, handler, results):
+        self.stdout.write(f"{handler.upper()}, {connection.vendor}")
+        for profile, result in results.items():
+            opened = result['open_connections']
+            self.stdout.write(
+                f"  {PROFILES[profile][0]:<27} p50 {result['p50_ms']:>7.2f} ms  p95 {result['p95_ms']:>7.2f} ms  "
+                f"moyenne {result['mean_ms']:>7.2f} ms"
+                + (f"  {opened} connexion(s) ouverte(s)" if opened is not None else '')
+            )
+        if 'none' in results and len(results) > 1:
+            reference = results['none']['mean_ms']
+            best = min(results, key=lambda profile: results[profile]['mean_ms'])
+            self.stdout.write(self.style.SUCCESS(
+                f"Gain moyen par requête : {reference - results[best]['mean_ms']:.2f} ms ({PROFILES[best][0]})"
+            ))
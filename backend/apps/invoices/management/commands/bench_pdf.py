@@ -0,0 +1,68 @@
+import base64
+import statistics
+import time
+from django.core.management.base import BaseCommand, CommandError
+from django.template.loader import render_to_string
+from reportlab import rl_config
+from apps.invoices.pdf_generator import (
+    DOCUMENT_TEMPLATES, PdfRenderer, get_company_context, get_logo_path, render_pdf,
+)
+from apps.invoices.pdf_jobs import DOCUMENT_MODELS, get_document
+
+
+def render_cold(document_type, document):
+    # Chemin historique : logo brut relu et encodé à chaque appel, images en ASCII85
+    logo_path = get_logo_path()
+    logo_base64 = logo_type = None
+    if logo_path:
+        with open(logo_path, 'rb') as f:
+            logo_base64 = base64.b64encode(f.read()).decode('utf-8')
+        logo_type = 'png' if logo_path.suffix == '.png' else 'jpeg'
+    context = {
+        document_type: document,
+        'items': document.items.all(),
+        'company': get_company_context(),
+        'logo_base64': logo_base64,
+        'logo_type': logo_type,
+    }
+    use_a85 = rl_config.useA85
+    rl_config.useA85 = 1
+    try:
+        return render_pdf(render_to_string(DOCUMENT_TEMPLATES[document_type], context))
+    finally:
+        rl_config.useA85 = use_a85
+
+
+class Command(BaseCommand):
+    help = "Mesure la latence de génération PDF avant/après le moteur de rendu préchargé"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--type', default='invoice', choices=sorted(DOCUMENT_MODELS))
+        parser.add_argument('--id', type=int, help="Document à rendre (par défaut le plus récent)")
+        parser.add_argument('--runs', type=int, default=20)
+
+    def handle(self, *args, **options):
+        document_type = options['type']
+        object_id = options['id']
+        if object_id is None:
+            from django.apps import apps
+            last = apps.get_model(DOCUMENT_MODELS[document_type]).objects.order_by('-id').first()
+            if last is None:
+                raise CommandError("Aucun document à rendre")
+            object_id = last.id
+        document = get_document(document_type, object_id)
+        renderer = PdfRenderer()
+
+        for label, render in [('cold', render_cold), ('warm', renderer.render)]:
+            render(document_type, document)
+            timings = []
+            for _ in range(options['runs']):
+                start = time.perf_counter()
+                render(document_type, document)
+                timings.append((time.perf_counter() - start) * 1000)
+            timings.sort()
+            p95 = timings[min(len(timings) - 1, int(len(timings) * 0.95))]
+            self.stdout.write(
+                f"{label}: mean {statistics.mean(timings):.1f} ms, "
+                f"p50 {statistics.median(timings):.1f} ms, p95 {p95:.1f} ms"
+            )
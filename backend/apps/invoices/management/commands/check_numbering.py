@@ -0,0 +1,39 @@
+from concurrent.futures import ThreadPoolExecutor
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from apps.invoices.models import DocumentSequence
+
+
+class Command(BaseCommand):
+    help = "Test de charge de la numérotation : allocations concurrentes sans doublon ni trou"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--threads', type=int, default=16)
+        parser.add_argument('--count', type=int, default=2000, help="Nombre total de numéros à allouer")
+        parser.add_argument('--prefix', default='TST', help="Préfixe de test, supprimé à la fin")
+
+    def handle(self, *args, **options):
+        prefix, year = options['prefix'], 1
+        count = options['count']
+        DocumentSequence.objects.filter(prefix=prefix, year=year).delete()
+
+        def allocate(_):
+            try:
+                with transaction.atomic():
+                    return DocumentSequence.next_value(prefix, year)
+            finally:
+                connection.close()
+
+        try:
+            with ThreadPoolExecutor(max_workers=options['threads']) as pool:
+                values = list(pool.map(allocate, range(count)))
+        finally:
+            DocumentSequence.objects.filter(prefix=prefix, year=year).delete()
+
+        duplicates = len(values) - len(set(values))
+        missing = set(range(1, count + 1)) - set(values)
+        if duplicates or missing:
+            raise CommandError(f"{duplicates} doublon(s), {len(missing)} numéro(s) manquant(s)")
+        self.stdout.write(self.style.SUCCESS(
+            f"{count} numéros alloués par {options['threads']} threads : aucun doublon, aucun trou"
+        ))
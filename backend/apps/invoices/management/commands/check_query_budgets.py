@@ -0,0 +1,160 @@
+from datetime import date, timedelta
+from decimal import Decimal
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext, override_settings
+from rest_framework.test import APIClient
+from apps.accounts.models import User
+from apps.clients.models import Client
+from apps.products.models import Product
+from apps.invoices.models import Invoice, InvoiceItem
+from apps.proformas.models import Proforma, ProformaItem
+from apps.delivery_notes.models import DeliveryNote, DeliveryNoteItem
+
+
+# Nombre maximal de requêtes SQL par action, indépendant de la taille
+# des pages et du nombre de lignes par document
+BUDGETS = {
+    'clients': {'list': 2, 'retrieve': 1, 'create': 1, 'update': 2},
+    'products': {'list': 2, 'retrieve': 1, 'create': 1, 'update': 2},
+    'invoices': {
+        'list': 2, 'list_expand': 3, 'retrieve': 2, 'create': 11, 'update': 14,
+        'pdf': 2, 'send_email': 4, 'dashboard': 1, 'bulk_transition': 5,
+    },
+    'proformas': {
+        'list': 2, 'list_expand': 3, 'retrieve': 2, 'create': 11, 'update': 14,
+        'pdf': 2, 'send_email': 4, 'stats': 1, 'convert_to_invoice': 13,
+    },
+    'delivery-notes': {
+        'list': 2, 'list_expand': 3, 'retrieve': 2, 'create': 10, 'update': 12,
+        'pdf': 2, 'send_email': 4,
+    },
+}
+
+DOCUMENTS = {
+    'invoices': (Invoice, InvoiceItem, 'invoice'),
+    'proformas': (Proforma, ProformaItem, 'proforma'),
+    'delivery-notes': (DeliveryNote, DeliveryNoteItem, 'delivery_note'),
+}
+
+
+class Command(BaseCommand):
+    help = "Vérifie le nombre de requêtes SQL par action de l'API sur un jeu de données (annulé à la fin)"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--documents', type=int, default=30, help="Documents créés par type")
+        parser.add_argument('--items', type=int, default=20, help="Lignes par document")
+
+    def handle(self, *args, **options):
+        self.failures = []
+        self.verbosity = options['verbosity']
+        # Pas de cache PDF : chaque appel pdf mesure le chemin complet
+        with override_settings(ALLOWED_HOSTS=['*'], PDF_CACHE_ENABLED=False, RESPONSE_CACHE_SECONDS=0):
+            with transaction.atomic():
+                self.seed(options['documents'], options['items'])
+                self.run_checks()
+                transaction.set_rollback(True)
+
+        if self.failures:
+            raise CommandError(f"Budget dépassé : {', '.join(self.failures)}")
+        self.stdout.write(self.style.SUCCESS("Tous les budgets sont respectés"))
+
+    def seed(self, documents, items):
+        self.user = User.objects.create(username='query-budget', role='admin', first_name='Budget')
+        self.clients = Client.objects.bulk_create(
+            Client(name=f'Client {i}', ninea=f'NB{i:05d}') for i in range(10)
+        )
+        self.products = Product.objects.bulk_create(
+            Product(name=f'Produit {i}', unit_price=Decimal(100 + i)) for i in range(items)
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+        self.documents = {}
+        start = date.today().replace(day=1)
+        for name, (model, item_model, relation) in DOCUMENTS.items():
+            created = []
+            for i in range(documents):
+                document = model(
+                    client=self.clients[i % len(self.clients)],
+                    created_by=self.user,
+                    date=start + timedelta(days=i % 28),
+                )
+                lines = [self.build_item(item_model, product) for product in self.products]
+                if hasattr(document, 'set_totals'):
+                    document.set_totals(lines)
+                document.save()
+                for line in lines:
+                    setattr(line, relation, document)
+                item_model.objects.bulk_create(lines)
+                created.append(document)
+            self.documents[name] = created
+
+    def build_item(self, item_model, product):
+        item = item_model(product=product, description=product.name, quantity=Decimal('2'))
+        if hasattr(item, 'compute_totals'):
+            item.unit_price = product.unit_price
+            item.compute_totals()
+        return item
+
+    def items_payload(self, document=None):
+        items = [
+            {'product': product.id, 'description': product.name, 'quantity': '3', 'unit_price': '150'}
+            for product in self.products
+        ]
+        if document is not None:
+            # Modification de toutes les lignes existantes sauf la dernière, supprimée
+            existing = list(document.items.order_by('id'))[:-1]
+            for item, data in zip(existing, items):
+                data['id'] = item.id
+        return items
+
+    def measure(self, app, action, method, path, data=None, expected=200):
+        with CaptureQueriesContext(connection) as queries:
+            response = getattr(self.client, method)(path, data, format='json')
+        if response.status_code != expected:
+            raise CommandError(f"{app}.{action} : HTTP {response.status_code} {response.content[:200]!r}")
+
+        budget = BUDGETS[app][action]
+        count = len(queries)
+        ok = count <= budget
+        label = self.style.SUCCESS('OK') if ok else self.style.ERROR('DÉPASSÉ')
+        self.stdout.write(f"{app:<15} {action:<20} {count:>4} / {budget:<4} {label}")
+        if not ok:
+            self.failures.append(f'{app}.{action}')
+            if self.verbosity > 1:
+                for query in queries.captured_queries:
+                    self.stdout.write(f"    {query['sql']}")
+        return response
+
+    def run_checks(self):
+        for app in ('clients', 'products'):
+            base = f'/api/{app}/'
+            data = {'name': 'Budget', 'unit_price': '10'}
+            created = self.measure(app, 'create', 'post', base, data, expected=201)
+            self.measure(app, 'list', 'get', base)
+            self.measure(app, 'retrieve', 'get', f"{base}{created.data['id']}/")
+            self.measure(app, 'update', 'put', f"{base}{created.data['id']}/", data)
+
+        for app, documents in self.documents.items():
+            base = f'/api/{app}/'
+            document = documents[0]
+            self.measure(app, 'list', 'get', base)
+            self.measure(app, 'list_expand', 'get', f'{base}?expand=items')
+            self.measure(app, 'retrieve', 'get', f'{base}{document.id}/')
+            self.measure(app, 'pdf', 'get', f'{base}{document.id}/pdf/')
+            self.measure(app, 'send_email', 'post', f'{base}{document.id}/send_email/',
+                         {'to': 'client@example.com'}, expected=202)
+
+            data = {'client': self.clients[0].id, 'date': date.today().isoformat(), 'items': self.items_payload()}
+            self.measure(app, 'create', 'post', base, data, expected=201)
+            data['items'] = self.items_payload(document)
+            self.measure(app, 'update', 'put', f'{base}{document.id}/', data)
+
+        self.measure('invoices', 'dashboard', 'get', '/api/invoices/dashboard/')
+        self.measure('proformas', 'stats', 'get', '/api/proformas/stats/')
+        invoice_ids = [invoice.id for invoice in self.documents['invoices']]
+        self.measure('invoices', 'bulk_transition', 'post', '/api/invoices/bulk_transition/',
+                     {'ids': invoice_ids, 'status': 'paid'})
+        proforma = self.documents['proformas'][1]
+        self.measure('proformas', 'convert_to_invoice', 'post', f'/api/proformas/{proforma.id}/convert_to_invoice/')
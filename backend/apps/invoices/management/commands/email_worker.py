@@ -0,0 +1,30 @@
+import time
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from apps.invoices.email_outbox import claim_emails, requeue_stale, send_emails
+
+
+class Command(BaseCommand):
+    help = "Envoie les emails de la boîte d'envoi par lots, sur une seule connexion SMTP par lot"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=settings.EMAIL_BATCH_SIZE,
+                            help="Emails envoyés par connexion SMTP")
+        parser.add_argument('--poll-interval', type=float, default=2.0, help="Attente (s) quand la file est vide")
+        parser.add_argument('--once', action='store_true', help="Envoyer les emails dus puis s'arrêter")
+
+    def handle(self, *args, **options):
+        while True:
+            # À chaque tour : les envois d'un worker redémarré aussitôt après
+            # un arrêt brutal ne sont pas encore périmés au démarrage
+            requeued = requeue_stale()
+            if requeued:
+                self.stdout.write(f"{requeued} email(s) bloqué(s) remis en attente")
+            email_ids = claim_emails(max(1, options['batch_size']))
+            if not email_ids:
+                if options['once']:
+                    break
+                time.sleep(options['poll_interval'])
+                continue
+            for email_id, status in send_emails(email_ids):
+                self.stdout.write(f"Email {email_id}: {status}")
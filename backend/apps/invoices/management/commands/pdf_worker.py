@@ -0,0 +1,55 @@
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import connections
+from apps.invoices.pdf_jobs import claim_jobs, cleanup_jobs, requeue_stale, run_job
+
+
+# Nettoyage des jobs terminés au plus une fois par heure
+CLEANUP_INTERVAL = 3600
+
+
+def _init_process():
+    # Chaque processus ouvre sa propre connexion à la base
+    connections.close_all()
+
+
+class Command(BaseCommand):
+    help = "Traite les demandes de génération PDF en attente"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--processes', type=int,
+            default=getattr(settings, 'PDF_WORKER_PROCESSES', None) or os.cpu_count() or 1,
+            help="Nombre de processus de rendu",
+        )
+        parser.add_argument('--poll-interval', type=float, default=2.0, help="Attente (s) quand la file est vide")
+        parser.add_argument('--once', action='store_true', help="Vider la file puis s'arrêter")
+
+    def handle(self, *args, **options):
+        processes = max(1, options['processes'])
+        connections.close_all()
+        last_cleanup = None
+        with ProcessPoolExecutor(max_workers=processes, initializer=_init_process) as pool:
+            while True:
+                if last_cleanup is None or time.monotonic() - last_cleanup > CLEANUP_INTERVAL:
+                    deleted = cleanup_jobs(settings.PDF_JOB_RETENTION_HOURS)
+                    if deleted:
+                        self.stdout.write(f"{deleted} job(s) terminé(s) supprimé(s)")
+                    last_cleanup = time.monotonic()
+                # À chaque tour : les jobs d'un worker redémarré aussitôt après
+                # un arrêt brutal ne sont pas encore périmés au démarrage
+                requeued = requeue_stale()
+                if requeued:
+                    self.stdout.write(f"{requeued} job(s) bloqué(s) remis en attente")
+                job_ids = claim_jobs(processes * 2)
+                if not job_ids:
+                    if options['once']:
+                        break
+                    time.sleep(options['poll_interval'])
+                    continue
+                connections.close_all()
+                for job_id, status in pool.map(run_job, job_ids):
+                    self.stdout.write(f"PDF job {job_id}: {status}")
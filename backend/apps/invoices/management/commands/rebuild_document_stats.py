@@ -0,0 +1,12 @@
+from django.core.management.base import BaseCommand
+from apps.invoices.models import Invoice
+from apps.invoices.stats import rebuild
+from apps.proformas.models import Proforma
+
+
+class Command(BaseCommand):
+    help = "Recalcule entièrement la table des statistiques mensuelles des documents"
+
+    def handle(self, *args, **options):
+        count = rebuild({'invoice': Invoice, 'proforma': Proforma})
+        self.stdout.write(self.style.SUCCESS(f"{count} ligne(s) de statistiques recalculée(s)"))
@@ -0,0 +1,119 @@
+import time
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.utils import timezone
+from apps.invoices import response_cache
+from apps.invoices.models import Invoice, InvoiceItem
+from apps.invoices.stats import rebuild
+from apps.proformas.models import Proforma, ProformaItem
+
+
+DOCUMENTS = [
+    # (libellé, modèle, modèle de ligne)
+    ('Factures', Invoice, InvoiceItem),
+    ('Proformas', Proforma, ProformaItem),
+]
+
+
+def line_totals(prefix=''):
+    # Mêmes formules que compute_totals(), avant arrondi à 2 décimales
+    total_ht = f"{prefix}quantity * {prefix}unit_price"
+    total_tva = f"{total_ht} * {prefix}tva_rate / 100"
+    return total_ht, total_tva, f"{total_ht} + {total_tva}"
+
+
+class Command(BaseCommand):
+    help = (
+        "Recalcule en SQL ensembliste les totaux des lignes et des en-têtes des factures et proformas, "
+        "signale les écarts et les corrige avec --fix"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--fix', action='store_true', help="Corrige les totaux incorrects")
+        parser.add_argument('--show', type=int, default=10, help="Nombre d'écarts détaillés par type de document")
+
+    def handle(self, *args, **options):
+        start = time.perf_counter()
+        mismatches = 0
+        with transaction.atomic():
+            for label, model, item_model in DOCUMENTS:
+                mismatches += self.reconcile(label, model, item_model, options['fix'], options['show'])
+            if options['fix'] and mismatches:
+                # Totaux TTC modifiés : statistiques recalculées, update() n'émet pas de signaux
+                rebuild({'invoice': Invoice, 'proforma': Proforma})
+                response_cache.bump(Invoice, InvoiceItem, Proforma, ProformaItem)
+        elapsed = time.perf_counter() - start
+
+        if not mismatches:
+            self.stdout.write(self.style.SUCCESS(f"Aucun écart ({elapsed:.2f} s)"))
+        elif options['fix']:
+            self.stdout.write(self.style.SUCCESS(f"{mismatches} écart(s) corrigé(s) en {elapsed:.2f} s"))
+        else:
+            raise CommandError(f"{mismatches} écart(s) détecté(s) en {elapsed:.2f} s : relancez avec --fix")
+
+    def tables(self, model, item_model):
+        quote = connection.ops.quote_name
+        foreign_key = item_model._meta.get_field(model._meta.model_name).column
+        return quote(model._meta.db_table), quote(item_model._meta.db_table), quote(foreign_key)
+
+    def reconcile(self, label, model, item_model, fix, show):
+        document_table, item_table, foreign_key = self.tables(model, item_model)
+        line_ht, line_tva, line_ttc = line_totals()
+        line_mismatch = (
+            f"total_ht IS DISTINCT FROM ROUND({line_ht}, 2) "
+            f"OR total_tva IS DISTINCT FROM ROUND({line_tva}, 2) "
+            f"OR total_ttc IS DISTINCT FROM ROUND({line_ttc}, 2)"
+        )
+        # Une ligne par document, y compris sans ligne (totaux à zéro) ;
+        # l'en-tête est la somme des lignes arrondies, comme set_totals()
+        item_ht, item_tva, _ = line_totals('i.')
+        sum_ht = f"COALESCE(SUM(ROUND({item_ht}, 2)), 0)"
+        sum_tva = f"COALESCE(SUM(ROUND({item_tva}, 2)), 0)"
+        expected = (
+            f"SELECT d.id, ROUND({sum_ht}, 2) AS total_ht, ROUND({sum_tva}, 2) AS total_tva, "
+            f"ROUND({sum_ht} + {sum_tva}, 2) AS total_ttc "
+            f"FROM {document_table} d LEFT JOIN {item_table} i ON i.{foreign_key} = d.id GROUP BY d.id"
+        )
+        header_mismatch = (
+            f"{document_table}.total_ht IS DISTINCT FROM expected.total_ht "
+            f"OR {document_table}.total_tva IS DISTINCT FROM expected.total_tva "
+            f"OR {document_table}.total_ttc IS DISTINCT FROM expected.total_ttc"
+        )
+
+        with connection.cursor() as cursor:
+            cursor.execute(f"SELECT COUNT(*) FROM {item_table} WHERE {line_mismatch}")
+            lines = cursor.fetchone()[0]
+            mismatched = (
+                f"FROM {document_table} JOIN ({expected}) expected ON expected.id = {document_table}.id "
+                f"WHERE {header_mismatch}"
+            )
+            cursor.execute(f"SELECT COUNT(*) {mismatched}")
+            headers = cursor.fetchone()[0]
+            cursor.execute(
+                f"SELECT {document_table}.number, {document_table}.total_ttc, expected.total_ttc "
+                f"{mismatched} ORDER BY {document_table}.id LIMIT %s",
+                [show]
+            )
+            examples = cursor.fetchall()
+
+            self.stdout.write(f"{label} : {lines} ligne(s) et {headers} en-tête(s) incorrect(s)")
+            for number, stored, computed in examples:
+                self.stdout.write(f"  {number} : total TTC {stored} au lieu de {computed}")
+            if headers > len(examples):
+                self.stdout.write(f"  ... et {headers - len(examples)} autre(s)")
+
+            if fix and lines:
+                cursor.execute(
+                    f"UPDATE {item_table} SET total_ht = ROUND({line_ht}, 2), "
+                    f"total_tva = ROUND({line_tva}, 2), total_ttc = ROUND({line_ttc}, 2) "
+                    f"WHERE {line_mismatch}"
+                )
+            if fix and headers:
+                # updated_at modifié : ETag et PDF en cache ne sont plus servis
+                cursor.execute(
+                    f"UPDATE {document_table} SET total_ht = expected.total_ht, "
+                    f"total_tva = expected.total_tva, total_ttc = expected.total_ttc, updated_at = %s "
+                    f"FROM ({expected}) expected WHERE expected.id = {document_table}.id AND ({header_mismatch})",
+                    [timezone.now()]
+                )
+        return lines + headers
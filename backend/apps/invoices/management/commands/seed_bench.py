@@ -0,0 +1,166 @@
+from datetime import timedelta
+from decimal import Decimal
+import random
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.utils import timezone
+from apps.accounts.models import User
+from apps.clients.models import Client
+from apps.products.models import Product
+from apps.invoices.models import DocumentSequence, Invoice, InvoiceItem
+from apps.invoices import response_cache
+from apps.invoices.stats import rebuild
+from apps.proformas.models import Proforma, ProformaItem
+from apps.delivery_notes.models import DeliveryNote, DeliveryNoteItem
+
+
+CLIENT_KINDS = ['Ets', 'Société', 'GIE', 'SARL', 'SUARL', 'Quincaillerie', 'Entreprise']
+CLIENT_NAMES = [
+    'Diop', 'Ndiaye', 'Fall', 'Sow', 'Sy', 'Gueye', 'Diallo', 'Mbaye', 'Faye', 'Cissé',
+    'Touba', 'Dakar', 'Thiès', 'Kaolack', 'Ziguinchor', 'Saint-Louis', 'Rufisque', 'Mbour',
+]
+CLIENT_ACTIVITIES = ['Commerce', 'Industrie', 'Bâtiment', 'Services', 'Distribution', 'Transport', 'Frères', 'et Fils']
+PRODUCT_NAMES = [
+    'Vis', 'Boulon', 'Écrou', 'Tuyau PVC', 'Câble électrique', 'Gaine', 'Disjoncteur', 'Ciment',
+    'Peinture', 'Rouleau', 'Clé plate', 'Marteau', 'Perceuse', 'Foret', 'Tôle', 'Fer à béton',
+    'Robinet', 'Joint', 'Grillage', 'Brouette',
+]
+PRODUCT_QUALITIES = ['acier', 'inox', 'galvanisé', 'cuivre', 'standard', 'renforcé', 'professionnel']
+DELIVERERS = ['Moussa', 'Ibrahima', 'Cheikh', 'Abdou', 'Mamadou', 'Ousmane']
+
+DOCUMENTS = [
+    # (type, modèle, modèle de ligne, relation, préfixe, statuts)
+    ('invoice', Invoice, InvoiceItem, 'invoice', 'FAC', ['draft', 'finalized', 'paid', 'paid', 'cancelled']),
+    ('proforma', Proforma, ProformaItem, 'proforma', 'PRO', ['draft', 'sent', 'accepted', 'rejected']),
+    ('delivery_note', DeliveryNote, DeliveryNoteItem, 'delivery_note', 'BL', None),
+]
+
+
+class Command(BaseCommand):
+    help = "Génère un jeu de données réaliste (clients, produits, documents) par insertions groupées"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--clients', type=int, default=200)
+        parser.add_argument('--products', type=int, default=500)
+        parser.add_argument('--invoices', type=int, default=2000)
+        parser.add_argument('--proformas', type=int, help="Par défaut : la moitié de --invoices")
+        parser.add_argument('--delivery-notes', type=int, help="Par défaut : la moitié de --invoices")
+        parser.add_argument('--items-per-doc', type=int, default=10)
+        parser.add_argument('--days', type=int, default=365, help="Période couverte par les dates des documents")
+        parser.add_argument('--batch-size', type=int, default=500)
+        parser.add_argument('--seed', type=int, default=42)
+
+    def handle(self, *args, **options):
+        self.random = random.Random(options['seed'])
+        self.batch_size = options['batch_size']
+        half = options['invoices'] // 2
+        counts = {
+            'invoice': options['invoices'],
+            'proforma': options['proformas'] if options['proformas'] is not None else half,
+            'delivery_note': options['delivery_notes'] if options['delivery_notes'] is not None else half,
+        }
+
+        with transaction.atomic():
+            self.user = self.get_user()
+            self.clients = self.create_clients(options['clients'])
+            self.products = self.create_products(options['products'])
+            for document_type, model, item_model, relation, prefix, statuses in DOCUMENTS:
+                created = self.create_documents(
+                    model, item_model, relation, prefix, statuses,
+                    counts[document_type], options['items_per_doc'], options['days'],
+                )
+                self.stdout.write(f"{created} {model._meta.verbose_name_plural.lower()} créé(e)s")
+            rebuild({'invoice': Invoice, 'proforma': Proforma})
+            # Insertions groupées : pas de signaux pour invalider le cache des réponses
+            response_cache.bump(
+                Client, Product, Invoice, InvoiceItem, Proforma, ProformaItem, DeliveryNote, DeliveryNoteItem,
+            )
+
+        self.stdout.write(self.style.SUCCESS(
+            f"{len(self.clients)} clients, {len(self.products)} produits, "
+            f"{options['items_per_doc']} ligne(s) par document"
+        ))
+
+    def get_user(self):
+        user, created = User.objects.get_or_create(
+            username='bench', defaults={'role': 'admin', 'first_name': 'Bench'}
+        )
+        if created:
+            user.set_unusable_password()
+            user.save(update_fields=['password'])
+        return user
+
+    def create_clients(self, count):
+        choice = self.random.choice
+        clients = [
+            Client(
+                name=f"{choice(CLIENT_KINDS)} {choice(CLIENT_NAMES)} {choice(CLIENT_ACTIVITIES)}",
+                phone=f"77 {self.random.randint(100, 999)} {self.random.randint(10, 99)} {self.random.randint(10, 99)}",
+                address=f"{choice(CLIENT_NAMES)}, Sénégal",
+                ninea=f"{self.random.randint(1000000, 9999999)}{self.random.randint(0, 9)}",
+            )
+            for _ in range(count)
+        ]
+        return Client.objects.bulk_create(clients, batch_size=self.batch_size)
+
+    def create_products(self, count):
+        products = [
+            Product(
+                name=f"{self.random.choice(PRODUCT_NAMES)} {self.random.choice(PRODUCT_QUALITIES)} {self.random.randint(1, 500)}",
+                description=f"{self.random.choice(PRODUCT_NAMES)} pour usage {self.random.choice(PRODUCT_QUALITIES)}",
+                unit_price=Decimal(self.random.randrange(100, 250000, 50)),
+                tva_rate=self.random.choice([Decimal('18'), Decimal('18'), Decimal('0')]),
+            )
+            for _ in range(count)
+        ]
+        return Product.objects.bulk_create(products, batch_size=self.batch_size)
+
+    def build_items(self, item_model, count):
+        items = []
+        for product in self.random.sample(self.products, min(count, len(self.products))):
+            item = item_model(
+                product=product,
+                description=product.name,
+                quantity=Decimal(self.random.randint(1, 50)),
+            )
+            if hasattr(item, 'compute_totals'):
+                item.unit_price = product.unit_price
+                item.tva_rate = product.tva_rate
+                item.compute_totals()
+            items.append(item)
+        return items
+
+    def create_documents(self, model, item_model, relation, prefix, statuses, count, items_per_doc, days):
+        today = timezone.now().date()
+        created = 0
+        while created < count:
+            size = min(self.batch_size, count - created)
+            numbers = DocumentSequence.next_numbers(prefix, size)
+            documents, lines = [], []
+            for number in numbers:
+                document = model(
+                    number=number,
+                    client=self.random.choice(self.clients),
+                    created_by=self.user,
+                    date=today - timedelta(days=self.random.randint(0, days)),
+                )
+                if statuses:
+                    document.status = self.random.choice(statuses)
+                else:
+                    document.payment_method = self.random.choice(model.PAYMENT_CHOICES)[0]
+                    document.delivered_by = self.random.choice(DELIVERERS)
+                items = self.build_items(item_model, items_per_doc)
+                if hasattr(document, 'set_totals'):
+                    document.set_totals(items)
+                documents.append(document)
+                lines.append(items)
+
+            model.objects.bulk_create(documents)
+            for document, items in zip(documents, lines):
+                for item in items:
+                    setattr(item, relation, document)
+            item_model.objects.bulk_create(
+                [item for items in lines for item in items], batch_size=self.batch_size * 10
+            )
+            created += size
+        return created
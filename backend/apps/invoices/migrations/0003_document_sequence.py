@@ -0,0 +1,54 @@
+# Generated by Django 5.2.18 on 2026-10-18 10:32
+
+from django.db import migrations, models
+
+
+DOCUMENTS = [
+    ('invoices', 'Invoice', 'FAC'),
+    ('proformas', 'Proforma', 'PRO'),
+    ('delivery_notes', 'DeliveryNote', 'BL'),
+]
+
+
+def init_sequences(apps, schema_editor):
+    DocumentSequence = apps.get_model('invoices', 'DocumentSequence')
+    sequences = {}
+    for app_label, model_name, prefix in DOCUMENTS:
+        model = apps.get_model(app_label, model_name)
+        for number in model.objects.filter(number__startswith=f"{prefix}-").values_list('number', flat=True):
+            parts = number.split('-')
+            if len(parts) != 3 or not parts[1].isdigit() or not parts[2].isdigit():
+                continue
+            key = (prefix, int(parts[1]))
+            sequences[key] = max(sequences.get(key, 0), int(parts[2]))
+    DocumentSequence.objects.bulk_create([
+        DocumentSequence(prefix=prefix, year=year, last_value=last_value)
+        for (prefix, year), last_value in sequences.items()
+    ])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('invoices', '0002_pdf_job'),
+        ('proformas', '0001_initial'),
+        ('delivery_notes', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DocumentSequence',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('prefix', models.CharField(max_length=10, verbose_name='Préfixe')),
+                ('year', models.PositiveIntegerField(verbose_name='Année')),
+                ('last_value', models.PositiveIntegerField(default=0, verbose_name='Dernier numéro')),
+            ],
+            options={
+                'verbose_name': 'Séquence de numérotation',
+                'verbose_name_plural': 'Séquences de numérotation',
+                'constraints': [models.UniqueConstraint(fields=('prefix', 'year'), name='unique_document_sequence')],
+            },
+        ),
+        migrations.RunPython(init_sequences, migrations.RunPython.noop),
+    ]
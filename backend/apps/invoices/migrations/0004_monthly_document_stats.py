@@ -0,0 +1,62 @@
+# Generated by Django 5.2.18 on 2026-10-18 10:35
+
+from decimal import Decimal
+from django.db import migrations, models
+from django.db.models import Count, Sum
+from django.db.models.functions import ExtractMonth, ExtractYear
+
+
+def fill_stats(apps, schema_editor):
+    MonthlyDocumentStats = apps.get_model('invoices', 'MonthlyDocumentStats')
+    rows = []
+    for document_type, app_label, model_name in [
+        ('invoice', 'invoices', 'Invoice'),
+        ('proforma', 'proformas', 'Proforma'),
+    ]:
+        model = apps.get_model(app_label, model_name)
+        aggregates = (
+            model.objects.annotate(year=ExtractYear('date'), month=ExtractMonth('date'))
+            .values('year', 'month', 'status')
+            .annotate(count=Count('id'), total=Sum('total_ttc'))
+            .order_by()
+        )
+        for row in aggregates:
+            rows.append(MonthlyDocumentStats(
+                document_type=document_type,
+                year=row['year'],
+                month=row['month'],
+                status=row['status'],
+                count=row['count'],
+                total_ttc=row['total'] or Decimal('0'),
+            ))
+    MonthlyDocumentStats.objects.bulk_create(rows, batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('invoices', '0003_document_sequence'),
+        ('proformas', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='MonthlyDocumentStats',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('document_type', models.CharField(choices=[('invoice', 'Facture'), ('proforma', 'Proforma')], max_length=20, verbose_name='Type de document')),
+                ('year', models.PositiveIntegerField(verbose_name='Année')),
+                ('month', models.PositiveSmallIntegerField(verbose_name='Mois')),
+                ('status', models.CharField(max_length=20, verbose_name='Statut')),
+                ('count', models.IntegerField(default=0, verbose_name='Nombre')),
+                ('total_ttc', models.DecimalField(decimal_places=2, default=Decimal('0'), max_digits=18, verbose_name='Total TTC')),
+            ],
+            options={
+                'verbose_name': 'Statistique mensuelle',
+                'verbose_name_plural': 'Statistiques mensuelles',
+                'ordering': ['-year', '-month', 'document_type', 'status'],
+                'constraints': [models.UniqueConstraint(fields=('document_type', 'year', 'month', 'status'), name='unique_monthly_document_stats')],
+            },
+        ),
+        migrations.RunPython(fill_stats, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,20 @@
+# Generated by Django 5.2.18 on 2026-10-18 10:38
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('clients', '0001_initial'),
+        ('invoices', '0005_invoice_date_index'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='invoice',
+            index=models.Index(fields=['-date', '-created_at', '-id'], name='invoice_keyset_idx'),
+        ),
+    ]
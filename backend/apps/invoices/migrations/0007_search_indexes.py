@@ -0,0 +1,26 @@
+# Generated by Django 5.2.18 on 2026-10-18 10:44
+
+import django.contrib.postgres.indexes
+import django.contrib.postgres.search
+import django.db.models.functions.text
+from django.db import migrations
+from apps.invoices.search import PostgresAddIndex, PostgresTrigramExtension
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('invoices', '0006_keyset_index'),
+    ]
+
+    operations = [
+        PostgresTrigramExtension(),
+        PostgresAddIndex(
+            model_name='invoice',
+            index=django.contrib.postgres.indexes.GinIndex(django.contrib.postgres.indexes.OpClass(django.db.models.functions.text.Upper('number'), name='gin_trgm_ops'), name='invoice_number_trgm_idx'),
+        ),
+        PostgresAddIndex(
+            model_name='invoiceitem',
+            index=django.contrib.postgres.indexes.GinIndex(django.contrib.postgres.search.SearchVector('description', config='french'), name='invoice_item_fts_idx'),
+        ),
+    ]
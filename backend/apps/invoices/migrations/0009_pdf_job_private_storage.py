@@ -0,0 +1,33 @@
+# Generated by Django 5.2.18 on 2026-10-18 11:39
+
+import os
+import apps.invoices.models
+from django.conf import settings
+from django.db import migrations, models
+
+
+def move_job_files(apps, schema_editor):
+    # Les PDF déjà générés quittent MEDIA_ROOT, servi publiquement par nginx
+    PdfJob = apps.get_model('invoices', 'PdfJob')
+    for name in PdfJob.objects.exclude(file='').values_list('file', flat=True).iterator():
+        source = os.path.join(settings.MEDIA_ROOT, name)
+        if os.path.exists(source):
+            target = os.path.join(settings.PRIVATE_ROOT, name)
+            os.makedirs(os.path.dirname(target), exist_ok=True)
+            os.replace(source, target)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('invoices', '0008_email_outbox'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='pdfjob',
+            name='file',
+            field=models.FileField(blank=True, storage=apps.invoices.models.private_storage, upload_to='pdf_jobs/%Y/%m/', verbose_name='Fichier PDF'),
+        ),
+        migrations.RunPython(move_job_files, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,461 @@
+from functools import update_wrapper
+from asgiref.sync import sync_to_async
+from rest_framework import status
+from rest_framework.decorators import action
+from rest_framework.parsers import FormParser, MultiPartParser
+from rest_framework.renderers import JSONRenderer
+from rest_framework.response import Response
+from django.conf import settings
+from django.core.cache import cache
+from django.core.exceptions import ValidationError as DjangoValidationError
+from django.core.validators import validate_email
+from django.db.models import Prefetch
+from django.http import FileResponse, Http404, StreamingHttpResponse
+from django.shortcuts import get_object_or_404
+from django.utils import timezone
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date, parse_http_date, quote_etag
+from django.views.decorators.csrf import csrf_exempt
+import hashlib
+from .models import PdfJob
+from .exports import EXPORT_FORMATS, CSVRenderer, XLSXRenderer, export_rows, stream_csv, stream_xlsx
+from .imports import Importer, ImportFileError
+from .pdf_export import stream_pdf_zip
+from . import email_outbox, pdf_cache, pdf_jobs, response_cache
+
+
+def items_prefetch(document_model):
+    # Les lignes sont sérialisées avec leur produit (product_detail)
+    item_model = document_model._meta.get_field('items').related_model
+    return Prefetch('items', queryset=item_model.objects.select_related('product'))
+
+
+class DocumentFieldsMixin:
+    # Les listes utilisent un sérialiseur résumé ; ?expand=items renvoie
+    # les lignes et ?fields= restreint les champs (voir SparseFieldsMixin)
+    list_serializer_class = None
+    
+    def _query_list(self, name):
+        value = self.request.query_params.get(name, '')
+        return {part.strip() for part in value.split(',') if part.strip()}
+    
+    def items_requested(self):
+        if self.action not in ('list', 'retrieve'):
+            return True
+        fields = self._query_list('fields')
+        if fields and 'items' not in fields:
+            return False
+        return self.action == 'retrieve' or 'items' in self._query_list('expand')
+    
+    def use_list_serializer(self):
+        if self.action != 'list' or self.items_requested():
+            return False
+        # Un champ absent du résumé impose le sérialiseur complet
+        return self._query_list('fields') <= set(self.list_serializer_class.Meta.fields)
+    
+    def prefetch_items(self, queryset):
+        if self.items_requested():
+            return queryset.prefetch_related(items_prefetch(queryset.model))
+        return queryset
+
+
+class ConditionalRetrieveMixin:
+    # ETag fort (updated_at, état des lignes, paramètres de représentation)
+    # et Last-Modified sur le détail : un client à jour reçoit un 304 sans
+    # sérialisation ni rendu PDF
+    
+    def related_updates(self, instance):
+        # client_detail et product_detail sont sérialisés avec le document :
+        # modifier le client ou un produit change la représentation
+        updates = []
+        if hasattr(instance, 'client_id'):
+            updates.append(instance.client.updated_at)
+        if 'items' in getattr(instance, '_prefetched_objects_cache', {}):
+            updates.extend(item.product.updated_at for item in instance.items.all() if item.product_id)
+        return updates
+    
+    def get_last_modified(self, instance):
+        return max([instance.updated_at, *self.related_updates(instance)])
+    
+    def get_etag(self, instance):
+        parts = [
+            instance._meta.label,
+            str(instance.pk),
+            instance.updated_at.isoformat(),
+            self.request.query_params.urlencode(),
+            *(updated_at.isoformat() for updated_at in self.related_updates(instance)),
+        ]
+        # Les lignes peuvent changer sans toucher updated_at (admin)
+        if 'items' in getattr(instance, '_prefetched_objects_cache', {}):
+            parts.append(pdf_cache.items_fingerprint(instance))
+        return hashlib.sha256('\n'.join(parts).encode('utf-8')).hexdigest()
+    
+    def conditional_response(self, request, etag, last_modified, build_response):
+        etag = quote_etag(etag)
+        timestamp = int(last_modified.timestamp()) if last_modified else None
+        response = get_conditional_response(request, etag=etag, last_modified=timestamp)
+        if response is None:
+            response = build_response()
+        response['ETag'] = etag
+        if timestamp is not None:
+            response['Last-Modified'] = http_date(timestamp)
+        response['Cache-Control'] = 'private, no-cache'
+        return response
+    
+    def retrieve(self, request, *args, **kwargs):
+        instance = self.get_object()
+        return self.conditional_response(
+            request, self.get_etag(instance), self.get_last_modified(instance),
+            lambda: Response(self.get_serializer(instance).data),
+        )
+
+
+class CachedResponseMixin:
+    # list / retrieve servis depuis le cache Django (mémoire locale ou
+    # fichiers). La clé réunit l'URL, le rôle de l'utilisateur et la version
+    # de chaque modèle de cache_models, incrémentée par signal à chaque
+    # écriture : une modification rend aussitôt les anciennes entrées
+    # inaccessibles, elles expirent ensuite d'elles-mêmes.
+    cache_models = ()
+    
+    def get_response_cache_key(self, request):
+        parts = [
+            request.build_absolute_uri(request.path),
+            getattr(request.user, 'role', ''),
+            *(f'{name}={value}' for name, values in sorted(request.query_params.lists()) for value in values),
+            *(str(version) for version in response_cache.get_versions(self.cache_models)),
+        ]
+        return 'api-response:' + hashlib.sha1('\n'.join(parts).encode('utf-8')).hexdigest()
+    
+    def cached_response(self, request, handler, *args, **kwargs):
+        timeout = settings.RESPONSE_CACHE_SECONDS
+        if not timeout or not self.cache_models:
+            return handler(request, *args, **kwargs)
+        
+        # Versions lues avant la requête SQL : une écriture concurrente
+        # range le résultat sous une clé déjà périmée
+        key = self.get_response_cache_key(request)
+        cached = cache.get(key)
+        if cached is None:
+            response = handler(request, *args, **kwargs)
+            if response.status_code == 200:
+                cache.set(key, self.cache_entry(response), timeout)
+            return response
+        return self.cached_hit_response(request, cached)
+    
+    def cache_entry(self, response):
+        headers = {
+            name: response[name] for name in response_cache.CACHED_HEADERS
+            if response.has_header(name)
+        }
+        return response.data, headers
+    
+    def cached_hit_response(self, request, cached):
+        data, headers = cached
+        response = None
+        if 'ETag' in headers:
+            last_modified = headers.get('Last-Modified')
+            response = get_conditional_response(
+                request, etag=headers['ETag'],
+                last_modified=parse_http_date(last_modified) if last_modified else None,
+            )
+        response = response or Response(data)
+        for name, value in headers.items():
+            response[name] = value
+        return response
+    
+    def list(self, request, *args, **kwargs):
+        return self.cached_response(request, super().list, *args, **kwargs)
+    
+    def retrieve(self, request, *args, **kwargs):
+        return self.cached_response(request, super().retrieve, *args, **kwargs)
+
+
+class AsyncReadMixin:
+    # Sous ASGI (ASYNC_VIEWS), les lectures qui ont une variante asynchrone
+    # a<action> (alist, aretrieve, adashboard...) sont servies sans thread
+    # dédié : requêtes par l'ORM asynchrone, même cache, mêmes en-têtes de
+    # validation. Les écritures et les exports passent par la vue DRF
+    # synchrone, exécutée dans le thread de la requête.
+    
+    @classmethod
+    def as_view(cls, *args, **initkwargs):
+        view = super().as_view(*args, **initkwargs)
+        actions = getattr(view, 'actions', None)
+        handlers = actions if actions is not None else {'get': 'get'}
+        async_actions = {
+            method: handlers[method] for method in ('get', 'head')
+            if method in handlers and hasattr(cls, f'a{handlers[method]}')
+        }
+        if not settings.ASYNC_VIEWS or not async_actions:
+            return view
+        async_actions.setdefault('head', async_actions.get('get'))
+        sync_view = sync_to_async(view)
+        
+        async def async_view(request, *args, **kwargs):
+            action = async_actions.get(request.method.lower())
+            if action is None:
+                return await sync_view(request, *args, **kwargs)
+            self = cls(**initkwargs)
+            if actions is not None:
+                self.action_map = dict(actions, head=actions.get('head', actions.get('get')))
+            self.request = request
+            self.args = args
+            self.kwargs = kwargs
+            return await self.adispatch(request, getattr(self, f'a{action}'), *args, **kwargs)
+        
+        update_wrapper(async_view, view)
+        return csrf_exempt(async_view)
+    
+    async def adispatch(self, request, handler, *args, **kwargs):
+        # Même déroulé que APIView.dispatch
+        request = self.initialize_request(request, *args, **kwargs)
+        self.request = request
+        self.headers = self.default_response_headers
+        try:
+            # Authentification (utilisateur en cache, sinon une requête) et permissions
+            await sync_to_async(self.initial)(request, *args, **kwargs)
+            if getattr(self, 'export_format', lambda: None)():
+                handler = sync_to_async(getattr(self, self.action))
+            response = await handler(request, *args, **kwargs)
+        except Exception as exc:
+            response = self.handle_exception(exc)
+        self.response = self.finalize_response(request, response, *args, **kwargs)
+        return self.response
+    
+    async def acached_response(self, request, handler):
+        timeout = settings.RESPONSE_CACHE_SECONDS
+        if not timeout or not self.cache_models:
+            return await handler(request)
+        key = await sync_to_async(self.get_response_cache_key)(request)
+        cached = await cache.aget(key)
+        if cached is None:
+            response = await handler(request)
+            if response.status_code == 200:
+                await cache.aset(key, self.cache_entry(response), timeout)
+            return response
+        return self.cached_hit_response(request, cached)
+    
+    async def aget_object(self):
+        queryset = self.filter_queryset(self.get_queryset())
+        lookup_url_kwarg = self.lookup_url_kwarg or self.lookup_field
+        try:
+            instance = await queryset.aget(**{self.lookup_field: self.kwargs[lookup_url_kwarg]})
+        except queryset.model.DoesNotExist:
+            raise Http404(f"No {queryset.model._meta.object_name} matches the given query.")
+        except (TypeError, ValueError, DjangoValidationError):
+            raise Http404
+        self.check_object_permissions(self.request, instance)
+        return instance
+    
+    async def alist(self, request, *args, **kwargs):
+        return await self.acached_response(request, self.alist_response)
+    
+    async def alist_response(self, request):
+        queryset = self.filter_queryset(self.get_queryset())
+        if self.paginator is not None:
+            page = await self.paginator.apaginate_queryset(queryset, request, view=self)
+            if page is not None:
+                return self.get_paginated_response(self.get_serializer(page, many=True).data)
+        instances = [instance async for instance in queryset]
+        return Response(self.get_serializer(instances, many=True).data)
+    
+    async def aretrieve(self, request, *args, **kwargs):
+        return await self.acached_response(request, self.aretrieve_response)
+    
+    async def aretrieve_response(self, request):
+        instance = await self.aget_object()
+        return self.conditional_response(
+            request, self.get_etag(instance), self.get_last_modified(instance),
+            lambda: Response(self.get_serializer(instance).data),
+        )
+
+
+def streaming_content(request, content):
+    # Sous ASGI, Django lit entièrement un itérateur synchrone avant l'envoi :
+    # les morceaux sont produits un par un dans le thread de la requête
+    if not hasattr(request, 'scope'):
+        return content
+    return _aiterate(content)
+
+
+async def _aiterate(content):
+    iterator = iter(content)
+    done = object()
+    try:
+        while True:
+            chunk = await sync_to_async(next)(iterator, done)
+            if chunk is done:
+                break
+            yield chunk
+    finally:
+        close = getattr(iterator, 'close', None)
+        if close is not None:
+            await sync_to_async(close)()
+
+
+class ExportMixin:
+    # ?format=csv|xlsx sur la liste : toutes les lignes filtrées, lues par
+    # values_list() et envoyées au fil de l'eau. export_fields liste les
+    # colonnes (lookup, en-tête).
+    export_fields = ()
+    export_name = None
+    export_actions = ('list',)
+    
+    def get_renderers(self):
+        renderers = super().get_renderers()
+        if self.action in self.export_actions:
+            renderers += [CSVRenderer(), XLSXRenderer()]
+        return renderers
+    
+    def export_format(self):
+        renderer = getattr(self.request, 'accepted_renderer', None)
+        if renderer is not None and renderer.format in EXPORT_FORMATS:
+            return renderer.format
+        return None
+    
+    def finalize_response(self, request, response, *args, **kwargs):
+        # Erreurs (400, 401, 404) d'un export : rendues en JSON
+        if isinstance(response, Response) and self.export_format():
+            request.accepted_renderer = JSONRenderer()
+            request.accepted_media_type = JSONRenderer.media_type
+        return super().finalize_response(request, response, *args, **kwargs)
+    
+    def export(self, queryset, fields, name):
+        export_format = self.export_format()
+        headers = [header for _, header in fields]
+        rows = export_rows(queryset, fields, settings.EXPORT_CHUNK_SIZE)
+        if export_format == 'xlsx':
+            title = str(queryset.model._meta.verbose_name_plural)
+            content = stream_xlsx(title, headers, rows, settings.EXPORT_CHUNK_SIZE)
+            content_type = XLSXRenderer.media_type
+        else:
+            content = stream_csv(headers, rows, settings.EXPORT_CHUNK_SIZE)
+            content_type = 'text/csv; charset=utf-8'
+        response = StreamingHttpResponse(streaming_content(self.request, content), content_type=content_type)
+        filename = f"{name}_{timezone.localdate():%Y-%m-%d}.{export_format}"
+        response['Content-Disposition'] = f'attachment; filename="{filename}"'
+        response['X-Accel-Buffering'] = 'no'
+        return response
+    
+    def list(self, request, *args, **kwargs):
+        if self.export_format():
+            queryset = self.filter_queryset(self.get_queryset())
+            return self.export(queryset, self.export_fields, self.export_name)
+        return super().list(request, *args, **kwargs)
+
+
+class ImportMixin:
+    # POST .../import/ (fichier CSV ou XLSX dans le champ file, dry_run=1
+    # pour valider sans écrire). import_columns associe chaque champ aux
+    # en-têtes acceptés, en plus de son nom ; import_key_fields sert au
+    # rapprochement des lignes existantes (voir imports.Importer).
+    import_columns = {}
+    import_key_fields = ()
+    
+    @action(detail=False, methods=['post'], url_path='import', parser_classes=[MultiPartParser, FormParser])
+    def import_file(self, request):
+        upload = request.FILES.get('file')
+        if upload is None:
+            return Response({'error': 'Aucun fichier envoyé (champ file)'}, status=status.HTTP_400_BAD_REQUEST)
+        dry_run = str(request.query_params.get('dry_run', request.data.get('dry_run', ''))).lower()
+        importer = Importer(self.serializer_class, self.import_columns, self.import_key_fields)
+        try:
+            report = importer.run(upload, dry_run=dry_run in ('1', 'true', 'oui'))
+        except ImportFileError as exc:
+            return Response({'error': str(exc)}, status=status.HTTP_400_BAD_REQUEST)
+        return Response(report)
+
+
+class PdfJobMixin:
+    pdf_document_type = None
+    
+    def _pdf_job_data(self, job):
+        return {
+            'id': job.id,
+            'status': job.status,
+            'status_display': job.get_status_display(),
+            'error': job.error,
+            'created_at': job.created_at,
+            'finished_at': job.finished_at,
+        }
+    
+    @action(detail=True, methods=['post'], url_path='pdf/jobs')
+    def pdf_jobs(self, request, pk=None):
+        document = self.get_object()
+        job = pdf_jobs.enqueue(self.pdf_document_type, document, request.user)
+        return Response(self._pdf_job_data(job), status=status.HTTP_202_ACCEPTED)
+    
+    @action(detail=True, methods=['get'], url_path=r'pdf/jobs/(?P<job_id>[0-9]+)')
+    def pdf_job(self, request, pk=None, job_id=None):
+        document = self.get_object()
+        job = get_object_or_404(
+            PdfJob, pk=job_id, document_type=self.pdf_document_type, object_id=document.pk
+        )
+        if job.status == 'done' and job.file:
+            return FileResponse(
+                job.file.open('rb'),
+                as_attachment=True,
+                filename=f"{document.number}.pdf",
+                content_type='application/pdf',
+            )
+        return Response(self._pdf_job_data(job))
+
+
+class EmailOutboxMixin:
+    # L'email est enregistré dans la boîte d'envoi : rendu, PDF joint et
+    # envoi SMTP par manage.py email_worker
+    pdf_document_type = None
+    
+    @action(detail=True, methods=['post'])
+    def send_email(self, request, pk=None):
+        document = self.get_object()
+        recipient = str(request.data.get('to') or document.client.email or '').strip()
+        if not recipient:
+            return Response({'error': "Aucune adresse email : renseignez l'email du client ou le champ to"},
+                            status=status.HTTP_400_BAD_REQUEST)
+        try:
+            validate_email(recipient)
+        except DjangoValidationError:
+            return Response({'error': f'Adresse email invalide : {recipient}'}, status=status.HTTP_400_BAD_REQUEST)
+        
+        email = email_outbox.enqueue(self.pdf_document_type, document, recipient, request.user)
+        return Response({
+            'id': email.id,
+            'recipient': email.recipient,
+            'status': email.status,
+            'status_display': email.get_status_display(),
+            'attempts': email.attempts,
+            'created_at': email.created_at,
+        }, status=status.HTTP_202_ACCEPTED)
+
+
+class PdfExportMixin:
+    pdf_document_type = None
+    
+    @action(detail=False, methods=['get'])
+    def export_pdfs(self, request):
+        queryset = self.filter_queryset(self.get_queryset())
+        count = queryset.count()
+        if not count:
+            return Response({'error': 'Aucun document à exporter'}, status=status.HTTP_400_BAD_REQUEST)
+        # Worker synchrone : l'export doit tenir dans le timeout de gunicorn
+        if hasattr(request, 'scope'):
+            max_documents = settings.PDF_EXPORT_MAX_DOCUMENTS
+        else:
+            max_documents = min(settings.PDF_EXPORT_MAX_DOCUMENTS, settings.PDF_EXPORT_SYNC_MAX_DOCUMENTS)
+        if count > max_documents:
+            return Response(
+                {'error': f'Export limité à {max_documents} documents, affinez les filtres ({count} trouvés)'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        
+        documents = queryset.iterator(chunk_size=100)
+        response = StreamingHttpResponse(
+            streaming_content(request, stream_pdf_zip(self.pdf_document_type, documents, settings.PDF_EXPORT_PROCESSES)),
+            content_type='application/zip'
+        )
+        filename = f"{self.pdf_document_type}s_{timezone.localdate():%Y-%m-%d}.zip"
+        response['Content-Disposition'] = f'attachment; filename="{filename}"'
+        response['X-Accel-Buffering'] = 'no'
+        return response
@@ -1,17 +1,106 @@
-from django.db import models
+from django.contrib.postgres.indexes import GinIndex, OpClass
+from django.contrib.postgres.search import SearchVector
+from django.db import models, connection, transaction
 from django.conf import settings
-from decimal import Decimal
+from django.core.files.storage import FileSystemStorage
+from django.db.models.functions import Upper
+from django.utils import timezone
+from decimal import Decimal, ROUND_HALF_UP
 from apps.clients.models import Client
 from apps.products.models import Product
 
 
-class Invoice(models.Model):
+def round_amount(value):
+    # Arrondi des colonnes à 2 décimales de PostgreSQL (au plus loin de zéro) :
+    # les totaux calculés en mémoire sont ceux qui seront relus en base
+    return value.quantize(Decimal('0.01'), rounding=ROUND_HALF_UP)
+
+
+class DocumentSequence(models.Model):
+    prefix = models.CharField(max_length=10, verbose_name="Préfixe")
+    year = models.PositiveIntegerField(verbose_name="Année")
+    last_value = models.PositiveIntegerField(default=0, verbose_name="Dernier numéro")
+    
+    class Meta:
+        verbose_name = "Séquence de numérotation"
+        verbose_name_plural = "Séquences de numérotation"
+        constraints = [
+            models.UniqueConstraint(fields=['prefix', 'year'], name='unique_document_sequence'),
+        ]
+    
+    def __str__(self):
+        return f"{self.prefix}-{self.year} ({self.last_value})"
+    
+    @classmethod
+    def next_value(cls, prefix, year, count=1):
+        # Incrément atomique : la ligne reste verrouillée jusqu'à la fin de la
+        # transaction appelante, deux enregistrements simultanés ne peuvent
+        # donc pas obtenir le même numéro. Retourne le dernier numéro réservé.
+        table = connection.ops.quote_name(cls._meta.db_table)
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f"INSERT INTO {table} (prefix, year, last_value) VALUES (%s, %s, %s) "
+                f"ON CONFLICT (prefix, year) DO UPDATE SET last_value = {table}.last_value + EXCLUDED.last_value "
+                f"RETURNING last_value",
+                [prefix, year, count]
+            )
+            return cursor.fetchone()[0]
+    
+    @classmethod
+    def next_numbers(cls, prefix, count):
+        from django.utils import timezone
+        year = timezone.now().year
+        last = cls.next_value(prefix, year, count)
+        return [f"{prefix}-{year}-{value:03d}" for value in range(last - count + 1, last + 1)]
+    
+    @classmethod
+    def next_number(cls, prefix):
+        return cls.next_numbers(prefix, 1)[0]
+
+
+class NumberedDocumentMixin:
+    # Numérotation des documents (factures, proformas, bons de livraison) :
+    # le numéro est réservé sous number_prefix dans la transaction de
+    # l'insertion, pas de trou en cas d'échec
+    number_prefix = None
+    
+    def save(self, *args, **kwargs):
+        if not self.number:
+            try:
+                with transaction.atomic():
+                    self.number = self.generate_number()
+                    super().save(*args, **kwargs)
+            except Exception:
+                self.number = ''
+                raise
+            return
+        # Atomique : l'état relu sous verrou pour les statistiques des
+        # factures et proformas (voir stats.load_snapshot) reste valable
+        # jusqu'à leur mise à jour ; sans point de sauvegarde, déjà dans la
+        # transaction de la vue
+        with transaction.atomic(savepoint=False):
+            super().save(*args, **kwargs)
+    
+    @classmethod
+    def generate_number(cls):
+        return DocumentSequence.next_number(cls.number_prefix)
+
+
+class Invoice(NumberedDocumentMixin, models.Model):
+    number_prefix = 'FAC'
+    
     STATUS_CHOICES = [
         ('draft', 'Brouillon'),
         ('finalized', 'Finalisée'),
         ('paid', 'Payée'),
         ('cancelled', 'Annulée'),
     ]
+    # Statut cible -> statuts de départ autorisés
+    TRANSITIONS = {
+        'finalized': ('draft',),
+        'paid': ('draft', 'finalized'),
+        'cancelled': ('draft', 'finalized'),
+    }
     
     number = models.CharField(max_length=20, unique=True, verbose_name="Numéro de facture")
     client = models.ForeignKey(Client, on_delete=models.PROTECT, related_name='invoices', verbose_name="Client")
@@ -37,37 +126,54 @@ class Invoice(models.Model):
         verbose_name = "Facture"
         verbose_name_plural = "Factures"
         ordering = ['-date', '-created_at']
+        indexes = [
+            models.Index(fields=['date', 'status']),
+            models.Index(fields=['-date', '-created_at', '-id'], name='invoice_keyset_idx'),
+            GinIndex(OpClass(Upper('number'), name='gin_trgm_ops'), name='invoice_number_trgm_idx'),
+        ]
     
     def __str__(self):
         return f"{self.number} - {self.client.name}"
     
-    def save(self, *args, **kwargs):
-        if not self.number:
-            self.number = self.generate_number()
-        super().save(*args, **kwargs)
-    
     @classmethod
-    def generate_number(cls):
+    def bulk_transition(cls, invoice_ids, status):
+        # Lecture verrouillée des états en une requête puis un seul
+        # UPDATE ... WHERE status IN (...) : update() n'émet pas de
+        # signaux, statistiques et cache des réponses sont mis à jour ici.
+        # Retourne {id: statut avant transition} pour les factures trouvées.
         from django.utils import timezone
-        year = timezone.now().year
-        prefix = f"FAC-{year}-"
-        last_invoice = cls.objects.filter(number__startswith=prefix).order_by('-number').first()
-        if last_invoice:
-            last_num = int(last_invoice.number.split('-')[-1])
-            new_num = last_num + 1
-        else:
-            new_num = 1
-        return f"{prefix}{new_num:03d}"
+        from . import response_cache, stats
+        sources = cls.TRANSITIONS[status]
+        
+        with transaction.atomic():
+            rows = list(
+                cls.objects.select_for_update().filter(pk__in=invoice_ids)
+                .order_by('pk').values_list('pk', 'date', 'status', 'total_ttc')
+            )
+            allowed = [row for row in rows if row[2] in sources]
+            if allowed:
+                # updated_at modifié : les PDF en cache sont invalidés par leur clé
+                cls.objects.filter(pk__in=[row[0] for row in allowed], status__in=sources).update(
+                    status=status, updated_at=timezone.now()
+                )
+                stats.apply('invoice', [
+                    ((date, old, total), (date, status, total)) for _, date, old, total in allowed
+                ])
+                response_cache.bump(cls)
+        return {pk: old for pk, _, old, _ in rows}
     
-    def calculate_totals(self):
+    def set_totals(self, items):
         total_ht = Decimal('0')
         total_tva = Decimal('0')
-        for item in self.items.all():
+        for item in items:
             total_ht += item.total_ht
             total_tva += item.total_tva
         self.total_ht = total_ht
         self.total_tva = total_tva
         self.total_ttc = total_ht + total_tva
+    
+    def calculate_totals(self):
+        self.set_totals(self.items.all())
         self.save(update_fields=['total_ht', 'total_tva', 'total_ttc'])
 
 
@@ -86,12 +192,142 @@ class InvoiceItem(models.Model):
     class Meta:
         verbose_name = "Ligne de facture"
         verbose_name_plural = "Lignes de facture"
+        indexes = [
+            GinIndex(SearchVector('description', config='french'), name='invoice_item_fts_idx'),
+        ]
+    
+    def compute_totals(self):
+        total_ht = self.quantity * self.unit_price
+        total_tva = total_ht * (self.tva_rate / Decimal('100'))
+        # Lignes arrondies comme en base : l'en-tête (set_totals) est la
+        # somme des montants affichés
+        self.total_ht = round_amount(total_ht)
+        self.total_tva = round_amount(total_tva)
+        self.total_ttc = round_amount(total_ht + total_tva)
     
     def save(self, *args, **kwargs):
-        self.total_ht = self.quantity * self.unit_price
-        self.total_tva = self.total_ht * (self.tva_rate / Decimal('100'))
-        self.total_ttc = self.total_ht + self.total_tva
+        self.compute_totals()
         super().save(*args, **kwargs)
     
     def __str__(self):
         return f"{self.description} x {self.quantity}"
+
+
+def private_storage():
+    # Hors de MEDIA_ROOT : les PDF ne sont servis que par l'action pdf/jobs/<id>
+    return FileSystemStorage(location=settings.PRIVATE_ROOT)
+
+
+class PdfJob(models.Model):
+    DOCUMENT_TYPE_CHOICES = [
+        ('invoice', 'Facture'),
+        ('proforma', 'Proforma'),
+        ('delivery_note', 'Bordereau de livraison'),
+    ]
+    STATUS_CHOICES = [
+        ('pending', 'En attente'),
+        ('running', 'En cours'),
+        ('done', 'Terminé'),
+        ('failed', 'Échec'),
+    ]
+    
+    document_type = models.CharField(max_length=20, choices=DOCUMENT_TYPE_CHOICES, verbose_name="Type de document")
+    object_id = models.PositiveBigIntegerField(verbose_name="ID du document")
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='pending', verbose_name="Statut")
+    file = models.FileField(upload_to='pdf_jobs/%Y/%m/', storage=private_storage, blank=True, verbose_name="Fichier PDF")
+    error = models.TextField(blank=True, verbose_name="Erreur")
+    requested_by = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='pdf_jobs',
+        verbose_name="Demandé par"
+    )
+    
+    created_at = models.DateTimeField(auto_now_add=True)
+    started_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+    
+    class Meta:
+        verbose_name = "Génération PDF"
+        verbose_name_plural = "Générations PDF"
+        ordering = ['created_at']
+        indexes = [
+            models.Index(fields=['status', 'created_at']),
+            models.Index(fields=['document_type', 'object_id']),
+        ]
+    
+    def __str__(self):
+        return f"{self.get_document_type_display()} #{self.object_id} ({self.get_status_display()})"
+
+
+class OutboxEmail(models.Model):
+    # Boîte d'envoi : la requête enregistre l'email, manage.py email_worker
+    # le rend, joint le PDF et l'envoie
+    DOCUMENT_TYPE_CHOICES = PdfJob.DOCUMENT_TYPE_CHOICES
+    STATUS_CHOICES = [
+        ('pending', 'En attente'),
+        ('sending', "En cours d'envoi"),
+        ('sent', 'Envoyé'),
+        ('failed', 'Échec'),
+    ]
+    
+    document_type = models.CharField(max_length=20, choices=DOCUMENT_TYPE_CHOICES, verbose_name="Type de document")
+    object_id = models.PositiveBigIntegerField(verbose_name="ID du document")
+    recipient = models.EmailField(verbose_name="Destinataire")
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='pending', verbose_name="Statut")
+    attempts = models.PositiveSmallIntegerField(default=0, verbose_name="Tentatives")
+    next_attempt_at = models.DateTimeField(default=timezone.now, verbose_name="Prochaine tentative")
+    error = models.TextField(blank=True, verbose_name="Erreur")
+    requested_by = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='outbox_emails',
+        verbose_name="Demandé par"
+    )
+    
+    created_at = models.DateTimeField(auto_now_add=True)
+    started_at = models.DateTimeField(null=True, blank=True)
+    sent_at = models.DateTimeField(null=True, blank=True)
+    
+    class Meta:
+        verbose_name = "Email à envoyer"
+        verbose_name_plural = "Boîte d'envoi"
+        ordering = ['created_at']
+        indexes = [
+            models.Index(fields=['status', 'next_attempt_at']),
+            models.Index(fields=['document_type', 'object_id']),
+        ]
+    
+    def __str__(self):
+        return f"{self.get_document_type_display()} #{self.object_id} -> {self.recipient} ({self.get_status_display()})"
+
+class MonthlyDocumentStats(models.Model):
+    DOCUMENT_TYPE_CHOICES = [
+        ('invoice', 'Facture'),
+        ('proforma', 'Proforma'),
+    ]
+    
+    document_type = models.CharField(max_length=20, choices=DOCUMENT_TYPE_CHOICES, verbose_name="Type de document")
+    year = models.PositiveIntegerField(verbose_name="Année")
+    month = models.PositiveSmallIntegerField(verbose_name="Mois")
+    status = models.CharField(max_length=20, verbose_name="Statut")
+    count = models.IntegerField(default=0, verbose_name="Nombre")
+    total_ttc = models.DecimalField(max_digits=18, decimal_places=2, default=Decimal('0'), verbose_name="Total TTC")
+    
+    class Meta:
+        verbose_name = "Statistique mensuelle"
+        verbose_name_plural = "Statistiques mensuelles"
+        ordering = ['-year', '-month', 'document_type', 'status']
+        constraints = [
+            models.UniqueConstraint(
+                fields=['document_type', 'year', 'month', 'status'],
+                name='unique_monthly_document_stats'
+            ),
+        ]
+    
+    def __str__(self):
+        return f"{self.document_type} {self.month:02d}/{self.year} {self.status} : {self.count}"
@@ -0,0 +1,154 @@
+from base64 import urlsafe_b64decode, urlsafe_b64encode
+from collections import OrderedDict
+import json
+from django.core.paginator import InvalidPage
+from django.db.models import Q
+from django.utils.dateparse import parse_date, parse_datetime
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import PageNumberPagination
+from rest_framework.response import Response
+from rest_framework.settings import api_settings
+from rest_framework.utils.urls import replace_query_param
+
+
+class DocumentKeysetPagination:
+    # Pagination par clé (date, created_at, id) : ni COUNT(*) ni OFFSET,
+    # chaque page est une lecture d'index quelle que soit sa profondeur
+    cursor_query_param = 'cursor'
+    ordering = ('-date', '-created_at', '-id')
+    invalid_cursor_message = 'Curseur invalide'
+
+    def __init__(self, page_size):
+        self.page_size = page_size
+
+    def encode_cursor(self, document, reverse):
+        position = {
+            'd': document.date.isoformat(),
+            'c': document.created_at.isoformat(),
+            'i': document.pk,
+            'r': reverse,
+        }
+        token = urlsafe_b64encode(json.dumps(position).encode('utf-8')).decode('ascii')
+        return replace_query_param(self.base_url, self.cursor_query_param, token)
+
+    def decode_cursor(self, request):
+        token = request.query_params.get(self.cursor_query_param)
+        if not token:
+            return None
+        try:
+            position = json.loads(urlsafe_b64decode(token.encode('ascii')).decode('utf-8'))
+            date, created_at = parse_date(position['d']), parse_datetime(position['c'])
+            if date is None or created_at is None:
+                raise ValueError
+            return date, created_at, int(position['i']), bool(position['r'])
+        except (TypeError, ValueError, KeyError, UnicodeDecodeError):
+            raise NotFound(self.invalid_cursor_message)
+
+    def page_queryset(self, queryset, request):
+        self.base_url = request.build_absolute_uri()
+        self.cursor = self.decode_cursor(request)
+        self.reverse = bool(self.cursor and self.cursor[3])
+
+        if self.cursor:
+            date, created_at, pk, _ = self.cursor
+            if self.reverse:
+                queryset = queryset.filter(
+                    Q(date__gt=date)
+                    | Q(date=date, created_at__gt=created_at)
+                    | Q(date=date, created_at=created_at, id__gt=pk)
+                )
+            else:
+                queryset = queryset.filter(
+                    Q(date__lt=date)
+                    | Q(date=date, created_at__lt=created_at)
+                    | Q(date=date, created_at=created_at, id__lt=pk)
+                )
+
+        ordering = self.ordering
+        if self.reverse:
+            ordering = tuple(field.lstrip('-') for field in ordering)
+        return queryset.order_by(*ordering)[:self.page_size + 1]
+
+    def finish_page(self, results):
+        cursor, reverse = self.cursor, self.reverse
+        has_more = len(results) > self.page_size
+        results = results[:self.page_size]
+        if reverse:
+            results.reverse()
+
+        self.next_url = self.previous_url = None
+        if results:
+            if has_more or reverse:
+                self.next_url = self.encode_cursor(results[-1], reverse=False)
+            if cursor and (has_more or not reverse):
+                self.previous_url = self.encode_cursor(results[0], reverse=True)
+        return results
+
+    def paginate_queryset(self, queryset, request, view=None):
+        return self.finish_page(list(self.page_queryset(queryset, request)))
+
+    async def apaginate_queryset(self, queryset, request, view=None):
+        return self.finish_page([document async for document in self.page_queryset(queryset, request)])
+
+    def get_paginated_response(self, data):
+        return Response(OrderedDict([
+            ('next', self.next_url),
+            ('previous', self.previous_url),
+            ('results', data),
+        ]))
+
+
+class AsyncPageNumberPagination(PageNumberPagination):
+    # Pagination par défaut de l'API ; apaginate_queryset sert les vues
+    # asynchrones (voir AsyncReadMixin) avec le même découpage
+
+    async def apaginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        page_size = self.get_page_size(request)
+        if not page_size:
+            return None
+        paginator = self.django_paginator_class(queryset, page_size)
+        # COUNT(*) lu d'avance : le Paginator ne fait plus aucune requête
+        paginator.count = await queryset.acount()
+        page_number = self.get_page_number(request, paginator)
+        try:
+            self.page = paginator.page(page_number)
+        except InvalidPage as exc:
+            raise NotFound(self.invalid_page_message.format(page_number=page_number, message=str(exc)))
+        self.page.object_list = [instance async for instance in self.page.object_list]
+        return list(self.page)
+
+
+class DocumentPagination(AsyncPageNumberPagination):
+    # Pagination par numéro de page par défaut ; ?pagination=cursor (ou la
+    # présence d'un curseur) bascule sur la pagination par clé, sauf avec
+    # ?search= (tri par pertinence) ou ?ordering= : la clé ne suit que
+    # (date, created_at, id) et écraserait le tri demandé
+    keyset_class = DocumentKeysetPagination
+
+    def use_keyset(self, request):
+        if any(request.query_params.get(param) for param in (api_settings.SEARCH_PARAM, api_settings.ORDERING_PARAM)):
+            return False
+        return (
+            request.query_params.get('pagination') == 'cursor'
+            or self.keyset_class.cursor_query_param in request.query_params
+        )
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.keyset = None
+        if self.use_keyset(request):
+            self.keyset = self.keyset_class(self.get_page_size(request))
+            return self.keyset.paginate_queryset(queryset, request, view)
+        return super().paginate_queryset(queryset, request, view)
+
+    async def apaginate_queryset(self, queryset, request, view=None):
+        self.keyset = None
+        if self.use_keyset(request):
+            self.keyset = self.keyset_class(self.get_page_size(request))
+            return await self.keyset.apaginate_queryset(queryset, request, view)
+        return await super().apaginate_queryset(queryset, request, view)
+
+    def get_paginated_response(self, data):
+        if self.keyset is not None:
+            return self.keyset.get_paginated_response(data)
+        return super().get_paginated_response(data)
@@ -0,0 +1,181 @@
+from django.conf import settings
+from pathlib import Path
+import hashlib
+import os
+import shutil
+import tempfile
+import threading
+
+from .pdf_generator import generate_document_pdf, get_logo_path, renderer
+
+
+ITEM_FIELDS = ['id', 'product_id', 'description', 'quantity', 'unit_price', 'tva_rate', 'observation']
+# Champs du client imprimés sur les PDF (nom et adresse)
+CLIENT_FIELDS = ['name', 'address']
+
+# Le répertoire n'est parcouru pour l'éviction qu'après l'écriture, par ce
+# processus, de cette part de la taille maximale (dépassement borné)
+EVICT_RATIO = 0.1
+
+_stats = {'hits': 0, 'misses': 0}
+_written = 0
+_lock = threading.Lock()
+
+
+def get_cache_dir():
+    return Path(getattr(settings, 'PDF_CACHE_DIR', Path(settings.PRIVATE_ROOT) / 'pdf_cache'))
+
+
+def get_max_bytes():
+    return getattr(settings, 'PDF_CACHE_MAX_BYTES', 200 * 1024 * 1024)
+
+
+def is_enabled():
+    return getattr(settings, 'PDF_CACHE_ENABLED', True)
+
+
+def _file_mtime(path):
+    try:
+        return os.path.getmtime(path)
+    except (OSError, TypeError):
+        return None
+
+
+def items_fingerprint(document):
+    # Les lignes peuvent être modifiées (admin inline) sans toucher updated_at
+    digest = hashlib.sha256()
+    for item in sorted(document.items.all(), key=lambda i: i.pk):
+        values = [str(getattr(item, field, '')) for field in ITEM_FIELDS]
+        digest.update('|'.join(values).encode('utf-8'))
+        digest.update(b'\n')
+    return digest.hexdigest()
+
+
+def build_key(doc_type, document):
+    template_origin = renderer.get_template(doc_type).origin.name
+    company = renderer.get_company()
+    parts = [
+        doc_type,
+        str(document.pk),
+        document.updated_at.isoformat() if document.updated_at else '',
+        items_fingerprint(document),
+        # Un client modifié ne touche pas updated_at du document
+        '|'.join(str(getattr(document.client, field)) for field in CLIENT_FIELDS),
+        str(_file_mtime(template_origin)),
+        repr(sorted(company.items())),
+        str(_file_mtime(get_logo_path())),
+    ]
+    return hashlib.sha256('\n'.join(parts).encode('utf-8')).hexdigest()
+
+
+def _document_dir(doc_type, pk):
+    return get_cache_dir() / doc_type / str(pk)
+
+
+def _entry_path(doc_type, pk, key):
+    return _document_dir(doc_type, pk) / f"{key}.pdf"
+
+
+def _store(path, content):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=path.parent, suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            f.write(content)
+        os.replace(tmp_path, path)
+    except OSError:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        return
+    global _written
+    with _lock:
+        _written += len(content)
+        if _written < get_max_bytes() * EVICT_RATIO:
+            return
+        _written = 0
+    _evict()
+
+
+def _entries():
+    cache_dir = get_cache_dir()
+    if not cache_dir.exists():
+        return []
+    entries = []
+    for path in cache_dir.glob('*/*/*.pdf'):
+        try:
+            stat = path.stat()
+        except FileNotFoundError:
+            continue
+        entries.append((stat.st_mtime, stat.st_size, path))
+    return entries
+
+
+def _evict():
+    # LRU : le mtime est rafraîchi à chaque hit, on supprime les plus anciens
+    entries = sorted(_entries())
+    total = sum(size for _, size, _ in entries)
+    max_bytes = get_max_bytes()
+    for _, size, path in entries:
+        if total <= max_bytes:
+            break
+        try:
+            path.unlink()
+        except FileNotFoundError:
+            pass
+        total -= size
+
+
+# Retourne (chemin, contenu) ; contenu vaut None si le PDF n'est pas en cache
+def lookup(doc_type, document):
+    path = _entry_path(doc_type, document.pk, build_key(doc_type, document))
+    try:
+        content = path.read_bytes()
+        os.utime(path)
+    except FileNotFoundError:
+        content = None
+
+    with _lock:
+        _stats['hits' if content is not None else 'misses'] += 1
+    return path, content
+
+
+def store(doc_type, document, path, content):
+    if content:
+        invalidate(doc_type, document.pk)
+        _store(path, content)
+
+
+def get_pdf(doc_type, document):
+    if not is_enabled():
+        return generate_document_pdf(doc_type, document)
+
+    path, content = lookup(doc_type, document)
+    if content is not None:
+        return content
+
+    content = generate_document_pdf(doc_type, document)
+    store(doc_type, document, path, content)
+    return content
+
+
+def invalidate(doc_type, pk):
+    shutil.rmtree(_document_dir(doc_type, pk), ignore_errors=True)
+
+
+def clear():
+    shutil.rmtree(get_cache_dir(), ignore_errors=True)
+
+
+def get_stats():
+    entries = _entries()
+    with _lock:
+        hits, misses = _stats['hits'], _stats['misses']
+    total = hits + misses
+    return {
+        'hits': hits,
+        'misses': misses,
+        'hit_ratio': round(hits / total, 3) if total else 0,
+        'entries': len(entries),
+        'size_bytes': sum(size for _, size, _ in entries),
+        'max_bytes': get_max_bytes(),
+    }
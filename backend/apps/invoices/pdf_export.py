@@ -0,0 +1,97 @@
+from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, wait
+from concurrent.futures.process import BrokenProcessPool
+import io
+import threading
+import zipfile
+from .pdf_generator import render_document_html, render_pdf
+from . import pdf_cache
+
+
+class ZipStream(io.RawIOBase):
+    # Flux non « seekable » : zipfile écrit alors des data descriptors
+    # et l'archive peut être envoyée au fur et à mesure
+    def __init__(self):
+        self._chunks = []
+
+    def writable(self):
+        return True
+
+    def write(self, data):
+        self._chunks.append(bytes(data))
+        return len(data)
+
+    def pop(self):
+        data = b''.join(self._chunks)
+        self._chunks = []
+        return data
+
+
+_export_pool = None
+_export_pool_lock = threading.Lock()
+
+
+def get_export_pool(processes):
+    # Un pool par worker, gardé entre les exports : pas de démarrage de
+    # processus à chaque requête
+    global _export_pool
+    with _export_pool_lock:
+        if _export_pool is None:
+            _export_pool = ProcessPoolExecutor(max_workers=processes)
+        return _export_pool
+
+
+def discard_export_pool(pool):
+    # Un processus du pool a été tué : le suivant en recrée un
+    global _export_pool
+    with _export_pool_lock:
+        if _export_pool is pool:
+            _export_pool = None
+
+
+def stream_pdf_zip(document_type, documents, processes):
+    stream = ZipStream()
+    use_cache = pdf_cache.is_enabled()
+    pool = get_export_pool(processes)
+    pending = {}
+    
+    def write_done(archive, futures):
+        for future in futures:
+            document, path = pending.pop(future)
+            content = future.result()
+            if content:
+                archive.writestr(f"{document.number}.pdf", content)
+                if use_cache:
+                    pdf_cache.store(document_type, document, path, content)
+    
+    try:
+        with zipfile.ZipFile(stream, 'w', zipfile.ZIP_STORED) as archive:
+            for document in documents:
+                path = content = None
+                if use_cache:
+                    path, content = pdf_cache.lookup(document_type, document)
+                if content is not None:
+                    archive.writestr(f"{document.number}.pdf", content)
+                else:
+                    # Le HTML est rendu ici (accès base), seul pisa tourne dans le pool
+                    html = render_document_html(document_type, document)
+                    pending[pool.submit(render_pdf, html)] = (document, path)
+                    if len(pending) >= processes * 2:
+                        done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                        write_done(archive, done)
+                chunk = stream.pop()
+                if chunk:
+                    yield chunk
+            
+            while pending:
+                done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                write_done(archive, done)
+                yield stream.pop()
+    except BrokenProcessPool:
+        discard_export_pool(pool)
+        raise
+    finally:
+        # Téléchargement interrompu : les rendus restants sont abandonnés
+        for future in pending:
+            future.cancel()
+    
+    yield stream.pop()
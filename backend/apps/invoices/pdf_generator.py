@@ -1,31 +1,68 @@
-from django.template.loader import render_to_string
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from django.template.loader import get_template
 from django.conf import settings
 from xhtml2pdf import pisa
+from reportlab import rl_config
+from PIL import Image
 from pathlib import Path
 from io import BytesIO
 import base64
+import os
+import threading
 
 
-def get_logo_base64():
+# Images et flux écrits en binaire : l'encodage ASCII85 en pur Python
+# représentait l'essentiel du temps de rendu du logo
+rl_config.useA85 = 0
+
+# Le logo est affiché sur 180px ; 600px suffisent pour l'impression
+LOGO_MAX_WIDTH = 600
+
+DOCUMENT_TEMPLATES = {
+    'invoice': 'invoices/invoice_pdf.html',
+    'proforma': 'proformas/proforma_pdf.html',
+    'delivery_note': 'delivery_notes/delivery_note_pdf.html',
+}
+
+
+def get_logo_path():
     # Chercher d'abord le nouveau logo PNG
     logo_path = Path(settings.BASE_DIR).parent / 'img' / 'logo_moultazam.png'
     if logo_path.exists():
-        with open(logo_path, 'rb') as f:
-            return base64.b64encode(f.read()).decode('utf-8'), 'png'
+        return logo_path
     # Fallback sur l'ancien logo
     logo_path = Path(settings.BASE_DIR).parent / 'img' / '_logo.jpg'
     if logo_path.exists():
-        with open(logo_path, 'rb') as f:
-            return base64.b64encode(f.read()).decode('utf-8'), 'jpeg'
-    return None, None
+        return logo_path
+    return None
 
 
-def render_pdf(html_content):
-    result = BytesIO()
-    pdf = pisa.pisaDocument(BytesIO(html_content.encode('utf-8')), result)
-    if not pdf.err:
-        return result.getvalue()
-    return None
+def _mtime(path):
+    try:
+        return os.path.getmtime(path)
+    except (OSError, TypeError):
+        return None
+
+
+def load_logo(logo_path):
+    # Réduit et aplatit le logo sur fond blanc : reportlab n'a plus
+    # à analyser la transparence ni à compresser une image 1536px
+    with Image.open(logo_path) as image:
+        image.load()
+        if image.width > LOGO_MAX_WIDTH:
+            height = round(image.height * LOGO_MAX_WIDTH / image.width)
+            image = image.resize((LOGO_MAX_WIDTH, height), Image.LANCZOS)
+        if image.mode in ('RGBA', 'LA', 'P'):
+            image = image.convert('RGBA')
+            background = Image.new('RGB', image.size, (255, 255, 255))
+            background.paste(image, mask=image.getchannel('A'))
+            image = background
+        elif image.mode != 'RGB':
+            image = image.convert('RGB')
+        buffer = BytesIO()
+        image.save(buffer, format='PNG', optimize=True)
+    return base64.b64encode(buffer.getvalue()).decode('utf-8'), 'png'
 
 
 def get_company_context():
@@ -42,46 +79,109 @@ def get_company_context():
     }
 
 
+class PdfRenderer:
+    # Garde en mémoire, pour la durée du processus, tout ce qui ne dépend
+    # pas du document : logo préparé, coordonnées de l'entreprise et
+    # templates compilés. Chaque ressource est rechargée si son fichier change.
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._logo = (None, None)
+        self._logo_key = None
+        self._company = None
+        self._templates = {}
+
+    def get_logo(self):
+        logo_path = get_logo_path()
+        key = (logo_path, _mtime(logo_path))
+        if key != self._logo_key:
+            with self._lock:
+                if key != self._logo_key:
+                    self._logo = load_logo(logo_path) if logo_path else (None, None)
+                    self._logo_key = key
+        return self._logo
+
+    def get_company(self):
+        if self._company is None:
+            self._company = get_company_context()
+        return self._company
+
+    def get_template(self, document_type):
+        template, mtime = self._templates.get(document_type, (None, None))
+        if template is not None and _mtime(template.origin.name) == mtime:
+            return template
+        template = get_template(DOCUMENT_TEMPLATES[document_type])
+        self._templates[document_type] = (template, _mtime(template.origin.name))
+        return template
+
+    def render_html(self, document_type, document):
+        logo_base64, logo_type = self.get_logo()
+        context = {
+            document_type: document,
+            'items': document.items.all(),
+            'company': self.get_company(),
+            'logo_base64': logo_base64,
+            'logo_type': logo_type,
+        }
+        return self.get_template(document_type).render(context)
+
+    def render(self, document_type, document):
+        return render_pdf(self.render_html(document_type, document))
+
+
+renderer = PdfRenderer()
+
+
+def get_logo_base64():
+    return renderer.get_logo()
+
+
+def render_pdf(html_content):
+    result = BytesIO()
+    pdf = pisa.pisaDocument(BytesIO(html_content.encode('utf-8')), result)
+    if not pdf.err:
+        return result.getvalue()
+    return None
+
+
+_render_pool = None
+_render_pool_lock = threading.Lock()
+
+
+def render_pdf_in_pool(html_content):
+    # pisa garde le GIL pendant tout le rendu : dans un processus du pool,
+    # le worker ASGI continue de servir les autres requêtes
+    global _render_pool
+    with _render_pool_lock:
+        if _render_pool is None:
+            _render_pool = ProcessPoolExecutor(max_workers=settings.PDF_RENDER_PROCESSES)
+        pool = _render_pool
+    try:
+        return pool.submit(render_pdf, html_content).result()
+    except BrokenProcessPool:
+        with _render_pool_lock:
+            if _render_pool is pool:
+                _render_pool = None
+        raise
+
+
+def render_document_html(document_type, document):
+    return renderer.render_html(document_type, document)
+
+
+def generate_document_pdf(document_type, document):
+    if settings.PDF_RENDER_PROCESSES:
+        return render_pdf_in_pool(renderer.render_html(document_type, document))
+    return renderer.render(document_type, document)
+
+
 def generate_invoice_pdf(invoice):
-    logo_base64, logo_type = get_logo_base64()
-    
-    context = {
-        'invoice': invoice,
-        'items': invoice.items.all(),
-        'company': get_company_context(),
-        'logo_base64': logo_base64,
-        'logo_type': logo_type,
-    }
-    
-    html_content = render_to_string('invoices/invoice_pdf.html', context)
-    return render_pdf(html_content)
+    return generate_document_pdf('invoice', invoice)
 
 
 def generate_proforma_pdf(proforma):
-    logo_base64, logo_type = get_logo_base64()
-    
-    context = {
-        'proforma': proforma,
-        'items': proforma.items.all(),
-        'company': get_company_context(),
-        'logo_base64': logo_base64,
-        'logo_type': logo_type,
-    }
-    
-    html_content = render_to_string('proformas/proforma_pdf.html', context)
-    return render_pdf(html_content)
+    return generate_document_pdf('proforma', proforma)
 
 
 def generate_delivery_note_pdf(delivery_note):
-    logo_base64, logo_type = get_logo_base64()
-    
-    context = {
-        'delivery_note': delivery_note,
-        'items': delivery_note.items.all(),
-        'company': get_company_context(),
-        'logo_base64': logo_base64,
-        'logo_type': logo_type,
-    }
-    
-    html_content = render_to_string('delivery_notes/delivery_note_pdf.html', context)
-    return render_pdf(html_content)
+    return generate_document_pdf('delivery_note', delivery_note)
@@ -0,0 +1,90 @@
+from django.apps import apps
+from django.core.files.base import ContentFile
+from django.db import transaction, close_old_connections
+from django.db.models import Q
+from django.utils import timezone
+from datetime import timedelta
+from .models import PdfJob
+from . import pdf_cache
+
+
+DOCUMENT_MODELS = {
+    'invoice': 'invoices.Invoice',
+    'proforma': 'proformas.Proforma',
+    'delivery_note': 'delivery_notes.DeliveryNote',
+}
+
+
+def get_document(document_type, object_id):
+    model = apps.get_model(DOCUMENT_MODELS[document_type])
+    return model.objects.select_related('client', 'created_by').prefetch_related('items').get(pk=object_id)
+
+
+# Un job « running » depuis plus longtemps a perdu son worker
+STALE_MINUTES = 15
+
+
+def enqueue(document_type, document, user=None):
+    # Une génération déjà en attente pour ce document est réutilisée, sauf
+    # un job bloqué par l'arrêt brutal de son worker
+    limit = timezone.now() - timedelta(minutes=STALE_MINUTES)
+    job = PdfJob.objects.filter(
+        Q(status='pending') | Q(status='running', started_at__gte=limit),
+        document_type=document_type,
+        object_id=document.pk,
+    ).first()
+    if job:
+        return job
+    return PdfJob.objects.create(
+        document_type=document_type,
+        object_id=document.pk,
+        requested_by=user,
+    )
+
+
+def claim_jobs(limit):
+    with transaction.atomic():
+        jobs = list(
+            PdfJob.objects.select_for_update(skip_locked=True)
+            .filter(status='pending')
+            .order_by('created_at')[:limit]
+        )
+        ids = [job.id for job in jobs]
+        if ids:
+            PdfJob.objects.filter(id__in=ids).update(status='running', started_at=timezone.now())
+    return ids
+
+
+def requeue_stale(minutes=STALE_MINUTES):
+    # Relance les jobs restés bloqués après l'arrêt brutal d'un worker
+    limit = timezone.now() - timedelta(minutes=minutes)
+    return PdfJob.objects.filter(status='running', started_at__lt=limit).update(status='pending', started_at=None)
+
+
+def cleanup_jobs(hours):
+    # Supprime les jobs terminés depuis plus de `hours` heures et leurs PDF
+    limit = timezone.now() - timedelta(hours=hours)
+    jobs = PdfJob.objects.filter(status__in=['done', 'failed'], finished_at__lt=limit)
+    storage = PdfJob._meta.get_field('file').storage
+    for name in jobs.exclude(file='').values_list('file', flat=True).iterator():
+        storage.delete(name)
+    return jobs.delete()[0]
+
+
+def run_job(job_id):
+    close_old_connections()
+    job = PdfJob.objects.get(pk=job_id)
+    try:
+        document = get_document(job.document_type, job.object_id)
+        content = pdf_cache.get_pdf(job.document_type, document)
+        if not content:
+            raise ValueError("La génération du PDF a échoué")
+        job.file.save(f"{document.number}.pdf", ContentFile(content), save=False)
+        job.status = 'done'
+        job.error = ''
+    except Exception as exc:
+        job.status = 'failed'
+        job.error = str(exc)
+    job.finished_at = timezone.now()
+    job.save(update_fields=['file', 'status', 'error', 'finished_at'])
+    return job.id, job.status
@@ -0,0 +1,38 @@
+import time
+from django.core.cache import cache
+from django.db import transaction
+
+
+# En-têtes de validation conservés avec les données (voir ConditionalRetrieveMixin)
+CACHED_HEADERS = ('ETag', 'Last-Modified', 'Cache-Control')
+
+
+def _version_key(model):
+    return f'api-cache-version:{model._meta.label_lower}'
+
+
+def get_versions(models):
+    keys = [_version_key(model) for model in models]
+    versions = cache.get_many(keys)
+    for key in keys:
+        if key not in versions:
+            # Compteur absent ou évincé : l'horodatage garantit une valeur
+            # jamais utilisée, les anciennes entrées ne sont plus atteintes
+            cache.add(key, time.time_ns(), None)
+            versions[key] = cache.get(key)
+    return [versions[key] for key in keys]
+
+
+def _bump(models):
+    for model in models:
+        key = _version_key(model)
+        try:
+            cache.incr(key)
+        except ValueError:
+            cache.add(key, time.time_ns(), None)
+
+
+def bump(*models):
+    # Après validation : un lecteur concurrent ne doit pas mettre en cache
+    # l'état d'avant sous la nouvelle version
+    transaction.on_commit(lambda: _bump(models))
@@ -0,0 +1,85 @@
+from django.contrib.postgres.operations import TrigramExtension
+from django.contrib.postgres.search import SearchQuery, SearchRank, SearchVector, TrigramWordSimilarity
+from django.db import connections, migrations
+from django.db.models import Exists, OuterRef, Q, Value
+from django.db.models.constants import LOOKUP_SEP
+from django.db.models.functions import Greatest, Upper
+from rest_framework import filters
+
+
+SEARCH_CONFIG = 'french'
+
+
+class PostgresOnlyOperation:
+    # Extension pg_trgm et index GIN (trigrammes, plein texte) créés sur
+    # PostgreSQL seulement : le SQL échoue ailleurs, où RankedSearchFilter
+    # se replie sur ILIKE
+    
+    def database_forwards(self, app_label, schema_editor, from_state, to_state):
+        if schema_editor.connection.vendor == 'postgresql':
+            super().database_forwards(app_label, schema_editor, from_state, to_state)
+    
+    def database_backwards(self, app_label, schema_editor, from_state, to_state):
+        if schema_editor.connection.vendor == 'postgresql':
+            super().database_backwards(app_label, schema_editor, from_state, to_state)
+
+
+class PostgresTrigramExtension(PostgresOnlyOperation, TrigramExtension):
+    pass
+
+
+class PostgresAddIndex(PostgresOnlyOperation, migrations.AddIndex):
+    pass
+
+
+class RankedSearchFilter(filters.SearchFilter):
+    # Sur PostgreSQL, ?search= compare UPPER(champ) par similarité trigramme
+    # (pg_trgm, tolérant aux fautes de frappe) pour search_fields et en plein
+    # texte français pour search_text_fields ; les résultats sont classés par
+    # pertinence. Chaque expression correspond à un index GIN des modèles.
+
+    def get_search_fields(self, view, request):
+        # Repli ILIKE de DRF hors PostgreSQL : tous les champs, texte compris
+        return [*self.get_trigram_fields(view), *self.get_text_fields(view)]
+
+    def get_trigram_fields(self, view):
+        return getattr(view, 'search_fields', None) or []
+
+    def get_text_fields(self, view):
+        return getattr(view, 'search_text_fields', None) or []
+
+    def filter_queryset(self, request, queryset, view):
+        term = ' '.join(self.get_search_terms(request))
+        if not self.get_search_fields(view, request) or not term:
+            return queryset
+        if connections[queryset.db].vendor != 'postgresql':
+            return super().filter_queryset(request, queryset, view)
+
+        condition, ranks = Q(), []
+        for index, field in enumerate(self.get_trigram_fields(view)):
+            alias = f'search_{index}'
+            queryset = queryset.alias(**{alias: Upper(field)})
+            condition |= Q(**{f'{alias}__contains': term.upper()})
+            condition |= Q(**{f'{alias}__trigram_word_similar': term.upper()})
+            ranks.append(TrigramWordSimilarity(Value(term.upper()), Upper(field)))
+
+        query = SearchQuery(term, config=SEARCH_CONFIG, search_type='websearch')
+        for index, field in enumerate(self.get_text_fields(view)):
+            if LOOKUP_SEP in field:
+                # Lignes du document : un EXISTS évite les doublons de jointure
+                relation, name = field.split(LOOKUP_SEP, 1)
+                related = queryset.model._meta.get_field(relation)
+                matches = related.related_model.objects.alias(
+                    search_vector=SearchVector(name, config=SEARCH_CONFIG)
+                ).filter(search_vector=query, **{related.field.name: OuterRef('pk')})
+                condition |= Q(Exists(matches))
+            else:
+                alias = f'search_text_{index}'
+                vector = SearchVector(field, config=SEARCH_CONFIG)
+                queryset = queryset.alias(**{alias: vector})
+                condition |= Q(**{alias: query})
+                ranks.append(SearchRank(vector, query))
+
+        rank = Greatest(*ranks) if len(ranks) > 1 else ranks[0]
+        ordering = queryset.query.order_by or queryset.model._meta.ordering
+        return queryset.filter(condition).annotate(search_rank=rank).order_by('-search_rank', *ordering)
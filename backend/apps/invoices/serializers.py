@@ -1,10 +1,157 @@
 from rest_framework import serializers
+from django.db import transaction
+from django.db.models import prefetch_related_objects
 from .models import Invoice, InvoiceItem
+from .mixins import items_prefetch
 from apps.clients.serializers import ClientSerializer
+from apps.products.models import Product
 from apps.products.serializers import ProductSerializer
 
 
+class SparseFieldsMixin:
+    # ?fields=number,total_ttc restreint les champs renvoyés en lecture
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        request = self.context.get('request')
+        if request is None or request.method != 'GET':
+            return
+        requested = request.query_params.get('fields')
+        if requested:
+            allowed = {name.strip() for name in requested.split(',') if name.strip()}
+            for name in set(self.fields) - allowed - {'id'}:
+                self.fields.pop(name)
+
+
+class PreloadedPrimaryKeyRelatedField(serializers.PrimaryKeyRelatedField):
+    # Résout la clé parmi les objets préchargés en une requête par
+    # DocumentItemsMixin au lieu d'un get() par ligne
+    def to_internal_value(self, data):
+        preloaded = self.context.get('preloaded', {}).get(self.get_queryset().model)
+        if preloaded is not None and not isinstance(data, bool):
+            try:
+                instance = preloaded.get(int(data))
+            except (TypeError, ValueError):
+                instance = None
+            if instance is not None:
+                return instance
+        return super().to_internal_value(data)
+
+
+class DocumentItemsMixin:
+    # Écriture groupée des lignes d'un document : totaux calculés en mémoire,
+    # bulk_create à la création et diff (update / insert / delete) à la modification
+    item_model = None
+    item_relation = None
+    
+    def _item_fields(self):
+        return [
+            field.name for field in self.item_model._meta.concrete_fields
+            if not field.primary_key and field.name != self.item_relation
+        ]
+    
+    def _new_item(self, document, data):
+        item = self.item_model(**data)
+        setattr(item, self.item_relation, document)
+        return item
+    
+    def build_items(self, items_data):
+        items = []
+        for data in items_data:
+            data = dict(data)
+            data.pop('id', None)
+            item = self.item_model(**data)
+            if hasattr(item, 'compute_totals'):
+                item.compute_totals()
+            items.append(item)
+        return items
+    
+    def create_items(self, document, items):
+        for item in items:
+            setattr(item, self.item_relation, document)
+        self.item_model.objects.bulk_create(items)
+    
+    def sync_items(self, document, items_data):
+        existing = {item.id: item for item in document.items.all()}
+        items, to_create, to_update = [], [], []
+        
+        for data in items_data:
+            data = dict(data)
+            item = existing.pop(data.pop('id', None), None)
+            if item is None:
+                item = self._new_item(document, data)
+                to_create.append(item)
+            else:
+                changed = False
+                for name, value in data.items():
+                    field = self.item_model._meta.get_field(name)
+                    if field.is_relation:
+                        name, value = field.attname, value.pk if value is not None else None
+                    if getattr(item, name) != value:
+                        setattr(item, name, value)
+                        changed = True
+                if changed:
+                    to_update.append(item)
+            if hasattr(item, 'compute_totals'):
+                item.compute_totals()
+            items.append(item)
+        
+        if existing:
+            self.item_model.objects.filter(id__in=existing).delete()
+        if to_update:
+            self.item_model.objects.bulk_update(to_update, self._item_fields())
+        if to_create:
+            self.item_model.objects.bulk_create(to_create)
+        return items
+    
+    def to_internal_value(self, data):
+        items = data.get('items') if hasattr(data, 'get') else None
+        if isinstance(items, list):
+            product_ids = set()
+            for item in items:
+                try:
+                    product_ids.add(int(item.get('product')))
+                except (AttributeError, TypeError, ValueError):
+                    pass
+            self.context.setdefault('preloaded', {})[Product] = Product.objects.in_bulk(product_ids)
+        return super().to_internal_value(data)
+    
+    def to_representation(self, instance):
+        # DRF vide le cache de prefetch après update : les lignes sont relues
+        # avec leur produit en une seule requête
+        if 'items' not in getattr(instance, '_prefetched_objects_cache', {}):
+            prefetch_related_objects([instance], items_prefetch(self.Meta.model))
+        return super().to_representation(instance)
+    
+    def create(self, validated_data):
+        items_data = validated_data.pop('items')
+        validated_data['created_by'] = self.context['request'].user
+        
+        with transaction.atomic():
+            document = self.Meta.model(**validated_data)
+            items = self.build_items(items_data)
+            if hasattr(document, 'set_totals'):
+                document.set_totals(items)
+            document.save()
+            self.create_items(document, items)
+        return document
+    
+    def update(self, instance, validated_data):
+        items_data = validated_data.pop('items', None)
+        
+        with transaction.atomic():
+            for attr, value in validated_data.items():
+                setattr(instance, attr, value)
+            if items_data is not None:
+                items = self.sync_items(instance, items_data)
+                if hasattr(instance, 'set_totals'):
+                    instance.set_totals(items)
+            instance.save()
+        return instance
+
+
 class InvoiceItemSerializer(serializers.ModelSerializer):
+    serializer_related_field = PreloadedPrimaryKeyRelatedField
+    id = serializers.IntegerField(required=False)
     product_detail = ProductSerializer(source='product', read_only=True)
     
     class Meta:
@@ -13,10 +160,10 @@ class InvoiceItemSerializer(serializers.ModelSerializer):
             'id', 'product', 'product_detail', 'description', 'quantity', 
             'unit_price', 'tva_rate', 'total_ht', 'total_tva', 'total_ttc'
         ]
-        read_only_fields = ['id', 'total_ht', 'total_tva', 'total_ttc']
+        read_only_fields = ['total_ht', 'total_tva', 'total_ttc']
 
 
-class InvoiceSerializer(serializers.ModelSerializer):
+class InvoiceSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     items = InvoiceItemSerializer(many=True, read_only=True)
     client_detail = ClientSerializer(source='client', read_only=True)
     created_by_name = serializers.CharField(source='created_by.get_full_name', read_only=True)
@@ -32,35 +179,24 @@ class InvoiceSerializer(serializers.ModelSerializer):
         read_only_fields = ['id', 'number', 'created_by', 'total_ht', 'total_tva', 'total_ttc', 'created_at', 'updated_at']
 
 
-class InvoiceCreateSerializer(serializers.ModelSerializer):
+class InvoiceListSerializer(SparseFieldsMixin, serializers.ModelSerializer):
+    client_name = serializers.CharField(source='client.name', read_only=True)
+    status_display = serializers.CharField(source='get_status_display', read_only=True)
+    
+    class Meta:
+        model = Invoice
+        fields = [
+            'id', 'number', 'client', 'client_name', 'status', 'status_display',
+            'date', 'due_date', 'total_ht', 'total_tva', 'total_ttc'
+        ]
+        read_only_fields = fields
+
+
+class InvoiceCreateSerializer(DocumentItemsMixin, serializers.ModelSerializer):
     items = InvoiceItemSerializer(many=True)
+    item_model = InvoiceItem
+    item_relation = 'invoice'
     
     class Meta:
         model = Invoice
         fields = ['id', 'client', 'date', 'due_date', 'notes', 'items']
-    
-    def create(self, validated_data):
-        items_data = validated_data.pop('items')
-        validated_data['created_by'] = self.context['request'].user
-        invoice = Invoice.objects.create(**validated_data)
-        
-        for item_data in items_data:
-            InvoiceItem.objects.create(invoice=invoice, **item_data)
-        
-        invoice.calculate_totals()
-        return invoice
-    
-    def update(self, instance, validated_data):
-        items_data = validated_data.pop('items', None)
-        
-        for attr, value in validated_data.items():
-            setattr(instance, attr, value)
-        instance.save()
-        
-        if items_data is not None:
-            instance.items.all().delete()
-            for item_data in items_data:
-                InvoiceItem.objects.create(invoice=instance, **item_data)
-            instance.calculate_totals()
-        
-        return instance
@@ -0,0 +1,39 @@
+from django.db.models.signals import pre_save, post_save, pre_delete, post_delete
+from django.dispatch import receiver
+from .models import Invoice, InvoiceItem
+from . import pdf_cache, response_cache, stats
+
+
+@receiver(post_save, sender=InvoiceItem)
+@receiver(post_delete, sender=InvoiceItem)
+def invalidate_pdf_on_item_change(sender, instance, **kwargs):
+    pdf_cache.invalidate('invoice', instance.invoice_id)
+
+
+@receiver(post_delete, sender=Invoice)
+def invalidate_pdf_on_delete(sender, instance, **kwargs):
+    pdf_cache.invalidate('invoice', instance.pk)
+
+
+@receiver(pre_save, sender=Invoice)
+@receiver(pre_delete, sender=Invoice)
+def load_stats_state(sender, instance, **kwargs):
+    stats.load_snapshot(instance)
+
+
+@receiver(post_save, sender=Invoice)
+def update_stats_on_save(sender, instance, **kwargs):
+    stats.record_save('invoice', instance)
+
+
+@receiver(post_delete, sender=Invoice)
+def update_stats_on_delete(sender, instance, **kwargs):
+    stats.record_delete('invoice', instance)
+
+
+@receiver(post_save, sender=Invoice)
+@receiver(post_delete, sender=Invoice)
+@receiver(post_save, sender=InvoiceItem)
+@receiver(post_delete, sender=InvoiceItem)
+def bump_response_cache(sender, instance, **kwargs):
+    response_cache.bump(sender)
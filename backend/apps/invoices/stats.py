@@ -0,0 +1,128 @@
+from collections import defaultdict
+from decimal import Decimal
+from django.db import connection, transaction
+from django.db.models import Count, Sum
+from django.db.models.functions import ExtractMonth, ExtractYear
+from .models import MonthlyDocumentStats
+
+
+# Mise à jour incrémentale de MonthlyDocumentStats : l'état en base
+# (date, statut, total TTC) d'un document est relu sous verrou avant son
+# enregistrement ; un changement retire cet état de son mois et ajoute le
+# nouveau, dans la même transaction.
+
+
+def snapshot(document):
+    if document.pk is None:
+        return None
+    return (document.date, document.status, document.total_ttc or Decimal('0'))
+
+
+def remember(document):
+    document._stats_snapshot = snapshot(document)
+
+
+def load_snapshot(document):
+    # save() et delete() sont atomiques : le verrou tient jusqu'à apply(),
+    # deux enregistrements concurrents ne retirent pas le même ancien état
+    if document.pk is None:
+        document._stats_snapshot = None
+        return
+    row = (
+        type(document).objects.select_for_update().filter(pk=document.pk)
+        .values_list('date', 'status', 'total_ttc').first()
+    )
+    document._stats_snapshot = tuple(row) if row else None
+
+
+def apply(document_type, changes):
+    deltas = defaultdict(lambda: [0, Decimal('0')])
+    for old, new in changes:
+        for state, sign in ((old, -1), (new, 1)):
+            if state is None or state[0] is None:
+                continue
+            date, status, total = state
+            delta = deltas[(date.year, date.month, status)]
+            delta[0] += sign
+            delta[1] += sign * Decimal(total)
+    
+    rows = [(key, value) for key, value in deltas.items() if value[0] or value[1]]
+    if not rows:
+        return
+    
+    # Un seul INSERT multi-lignes : les clés sont distinctes, ON CONFLICT
+    # ne touche donc chaque ligne qu'une fois (transitions groupées)
+    table = connection.ops.quote_name(MonthlyDocumentStats._meta.db_table)
+    values = ', '.join(['(%s, %s, %s, %s, %s, %s)'] * len(rows))
+    params = []
+    for (year, month, status), (count, total) in rows:
+        params.extend([document_type, year, month, status, count, total])
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"INSERT INTO {table} (document_type, year, month, status, count, total_ttc) "
+            f"VALUES {values} "
+            f"ON CONFLICT (document_type, year, month, status) DO UPDATE SET "
+            f"count = {table}.count + EXCLUDED.count, "
+            f"total_ttc = {table}.total_ttc + EXCLUDED.total_ttc",
+            params
+        )
+
+
+def record_save(document_type, document):
+    old = getattr(document, '_stats_snapshot', None)
+    new = snapshot(document)
+    if old != new:
+        apply(document_type, [(old, new)])
+    document._stats_snapshot = new
+
+
+def record_delete(document_type, document):
+    old = getattr(document, '_stats_snapshot', None) or snapshot(document)
+    apply(document_type, [(old, None)])
+    document._stats_snapshot = None
+
+
+def _month_rows(document_type, year, month):
+    return MonthlyDocumentStats.objects.filter(
+        document_type=document_type, year=year, month=month
+    ).values_list('status', 'count', 'total_ttc')
+
+
+def _month_totals(rows):
+    counts, totals = defaultdict(int), defaultdict(lambda: Decimal('0'))
+    for status, count, total in rows:
+        counts[status] = count
+        totals[status] = total
+    return counts, totals
+
+
+def get_month(document_type, year, month):
+    return _month_totals(_month_rows(document_type, year, month))
+
+
+async def aget_month(document_type, year, month):
+    return _month_totals([row async for row in _month_rows(document_type, year, month)])
+
+
+def rebuild(document_models):
+    with transaction.atomic():
+        MonthlyDocumentStats.objects.all().delete()
+        rows = []
+        for document_type, model in document_models.items():
+            aggregates = (
+                model.objects.annotate(year=ExtractYear('date'), month=ExtractMonth('date'))
+                .values('year', 'month', 'status')
+                .annotate(count=Count('id'), total=Sum('total_ttc'))
+                .order_by()
+            )
+            for row in aggregates:
+                rows.append(MonthlyDocumentStats(
+                    document_type=document_type,
+                    year=row['year'],
+                    month=row['month'],
+                    status=row['status'],
+                    count=row['count'],
+                    total_ttc=row['total'] or Decimal('0'),
+                ))
+        MonthlyDocumentStats.objects.bulk_create(rows, batch_size=1000)
+    return len(rows)
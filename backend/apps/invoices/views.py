@@ -5,25 +5,76 @@ from rest_framework.permissions import IsAuthenticated
 from django.http import HttpResponse
 from django.db.models import Sum, Count
 from django.utils import timezone
+from apps.accounts.models import User
+from apps.clients.models import Client
+from apps.products.models import Product
 from .models import Invoice, InvoiceItem
-from .serializers import InvoiceSerializer, InvoiceCreateSerializer, InvoiceItemSerializer
-from .pdf_generator import generate_invoice_pdf
+from .serializers import InvoiceSerializer, InvoiceListSerializer, InvoiceCreateSerializer, InvoiceItemSerializer
+from . import pdf_cache
+from . import stats as document_stats
+from .analytics import AnalyticsError, get_analytics
+from .mixins import (
+    AsyncReadMixin, CachedResponseMixin, ConditionalRetrieveMixin, DocumentFieldsMixin, ExportMixin,
+    EmailOutboxMixin, PdfJobMixin, PdfExportMixin,
+)
+from .pagination import DocumentPagination
+from .search import RankedSearchFilter
 
 
-class InvoiceViewSet(viewsets.ModelViewSet):
+BULK_TRANSITION_MAX = 500
+
+
+class InvoiceViewSet(ExportMixin, AsyncReadMixin, CachedResponseMixin, ConditionalRetrieveMixin,
+                     DocumentFieldsMixin, PdfJobMixin, EmailOutboxMixin, PdfExportMixin, viewsets.ModelViewSet):
+    pdf_document_type = 'invoice'
     queryset = Invoice.objects.all()
+    cache_models = (Invoice, InvoiceItem, Client, Product, User)
+    list_serializer_class = InvoiceListSerializer
     permission_classes = [IsAuthenticated]
-    filter_backends = [filters.SearchFilter, filters.OrderingFilter]
+    pagination_class = DocumentPagination
+    filter_backends = [RankedSearchFilter, filters.OrderingFilter]
     search_fields = ['number', 'client__name']
+    search_text_fields = ['items__description']
     ordering_fields = ['date', 'number', 'total_ttc', 'created_at']
+    export_fields = (
+        ('number', 'Numéro'),
+        ('date', 'Date'),
+        ('due_date', "Date d'échéance"),
+        ('client__name', 'Client'),
+        ('client__ninea', 'NINEA'),
+        ('status', 'Statut'),
+        ('total_ht', 'Total HT'),
+        ('total_tva', 'Total TVA'),
+        ('total_ttc', 'Total TTC'),
+        ('created_by__username', 'Créée par'),
+        ('created_at', 'Créée le'),
+    )
+    line_export_fields = (
+        ('invoice__number', 'Facture'),
+        ('invoice__date', 'Date'),
+        ('invoice__client__name', 'Client'),
+        ('invoice__status', 'Statut'),
+        ('product__name', 'Produit'),
+        ('description', 'Description'),
+        ('quantity', 'Quantité'),
+        ('unit_price', 'Prix unitaire'),
+        ('tva_rate', 'Taux TVA (%)'),
+        ('total_ht', 'Total HT'),
+        ('total_tva', 'TVA'),
+        ('total_ttc', 'Total TTC'),
+    )
+    export_name = 'factures'
+    export_actions = ('list', 'lines')
     
     def get_serializer_class(self):
+        if self.use_list_serializer():
+            return self.list_serializer_class
         if self.action in ['create', 'update', 'partial_update']:
             return InvoiceCreateSerializer
         return InvoiceSerializer
     
     def get_queryset(self):
-        queryset = Invoice.objects.select_related('client', 'created_by').prefetch_related('items')
+        queryset = self.prefetch_items(Invoice.objects.select_related('client', 'created_by'))
         
         # Filter by status
         status_filter = self.request.query_params.get('status')
@@ -48,7 +99,7 @@ class InvoiceViewSet(viewsets.ModelViewSet):
     @action(detail=True, methods=['post'])
     def finalize(self, request, pk=None):
         invoice = self.get_object()
-        if invoice.status != 'draft':
+        if invoice.status not in Invoice.TRANSITIONS['finalized']:
             return Response({'error': 'Seules les factures en brouillon peuvent être finalisées'}, 
                           status=status.HTTP_400_BAD_REQUEST)
         invoice.status = 'finalized'
@@ -58,39 +109,102 @@ class InvoiceViewSet(viewsets.ModelViewSet):
     @action(detail=True, methods=['post'])
     def mark_paid(self, request, pk=None):
         invoice = self.get_object()
-        if invoice.status not in ['finalized', 'draft']:
+        if invoice.status not in Invoice.TRANSITIONS['paid']:
             return Response({'error': 'Cette facture ne peut pas être marquée comme payée'}, 
                           status=status.HTTP_400_BAD_REQUEST)
         invoice.status = 'paid'
         invoice.save()
         return Response(InvoiceSerializer(invoice).data)
     
+    @action(detail=False, methods=['post'])
+    def bulk_transition(self, request):
+        ids = request.data.get('ids')
+        target = request.data.get('status')
+        if not isinstance(ids, list) or not ids or not all(isinstance(pk, int) for pk in ids):
+            return Response({'error': 'Une liste d\'identifiants (ids) est requise'}, 
+                          status=status.HTTP_400_BAD_REQUEST)
+        if target not in Invoice.TRANSITIONS:
+            return Response({'error': f"Statut cible invalide (valeurs possibles : {', '.join(Invoice.TRANSITIONS)})"}, 
+                          status=status.HTTP_400_BAD_REQUEST)
+        if len(ids) > BULK_TRANSITION_MAX:
+            return Response({'error': f'Maximum {BULK_TRANSITION_MAX} factures par opération'}, 
+                          status=status.HTTP_400_BAD_REQUEST)
+        
+        previous = Invoice.bulk_transition(ids, target)
+        labels = dict(Invoice.STATUS_CHOICES)
+        sources = Invoice.TRANSITIONS[target]
+        results, updated = [], 0
+        for pk in dict.fromkeys(ids):
+            old = previous.get(pk)
+            if old is None:
+                results.append({'id': pk, 'outcome': 'not_found', 'error': 'Facture introuvable'})
+            elif old == target:
+                results.append({'id': pk, 'outcome': 'unchanged', 'status': old})
+            elif old not in sources:
+                results.append({
+                    'id': pk, 'outcome': 'invalid', 'status': old,
+                    'error': f'Transition impossible : {labels[old]} -> {labels[target]}',
+                })
+            else:
+                updated += 1
+                results.append({'id': pk, 'outcome': 'updated', 'previous_status': old, 'status': target})
+        
+        return Response({'status': target, 'updated': updated, 'results': results})
+    
     @action(detail=True, methods=['get'])
     def pdf(self, request, pk=None):
         invoice = self.get_object()
-        pdf_content = generate_invoice_pdf(invoice)
-        response = HttpResponse(pdf_content, content_type='application/pdf')
-        response['Content-Disposition'] = f'attachment; filename="{invoice.number}.pdf"'
-        return response
+        
+        def build_response():
+            pdf_content = pdf_cache.get_pdf('invoice', invoice)
+            response = HttpResponse(pdf_content, content_type='application/pdf')
+            response['Content-Disposition'] = f'attachment; filename="{invoice.number}.pdf"'
+            return response
+        
+        etag = pdf_cache.build_key('invoice', invoice)
+        return self.conditional_response(request, etag, self.get_last_modified(invoice), build_response)
     
     @action(detail=False, methods=['get'])
     def dashboard(self, request):
         today = timezone.now()
-        current_month = today.month
-        current_year = today.year
-        
+        counts, totals = document_stats.get_month('invoice', today.year, today.month)
+        return Response(self.dashboard_data(counts, totals))
+    
+    async def adashboard(self, request):
+        today = timezone.now()
+        counts, totals = await document_stats.aget_month('invoice', today.year, today.month)
+        return Response(self.dashboard_data(counts, totals))
+    
+    def dashboard_data(self, counts, totals):
         # Stats du mois
-        month_invoices = Invoice.objects.filter(
-            date__year=current_year,
-            date__month=current_month
-        )
-        
-        stats = {
-            'total_invoices_month': month_invoices.count(),
-            'total_amount_month': month_invoices.aggregate(total=Sum('total_ttc'))['total'] or 0,
-            'paid_invoices': month_invoices.filter(status='paid').count(),
-            'pending_invoices': month_invoices.filter(status__in=['draft', 'finalized']).count(),
-            'paid_amount': month_invoices.filter(status='paid').aggregate(total=Sum('total_ttc'))['total'] or 0,
+        return {
+            'total_invoices_month': sum(counts.values()),
+            'total_amount_month': sum(totals.values()),
+            'paid_invoices': counts['paid'],
+            'pending_invoices': counts['draft'] + counts['finalized'],
+            'paid_amount': totals['paid'],
         }
-        
-        return Response(stats)
+    
+    @action(detail=False, methods=['get'])
+    def analytics(self, request):
+        try:
+            data = get_analytics(request.query_params)
+        except AnalyticsError as exc:
+            return Response({'error': str(exc)}, status=status.HTTP_400_BAD_REQUEST)
+        return Response(data)
+    
+    @action(detail=False, methods=['get'])
+    def pdf_cache_stats(self, request):
+        return Response(pdf_cache.get_stats())
+    
+    @action(detail=False, methods=['get'])
+    def lines(self, request):
+        # Lignes des factures retenues par les filtres de la liste
+        if not self.export_format():
+            return Response({'error': "Précisez le format d'export : ?format=csv ou ?format=xlsx"},
+                            status=status.HTTP_400_BAD_REQUEST)
+        invoices = self.filter_queryset(self.get_queryset())
+        queryset = InvoiceItem.objects.filter(invoice__in=invoices.values('pk')).order_by(
+            'invoice__date', 'invoice_id', 'id'
+        )
+        return self.export(queryset, self.line_export_fields, 'lignes_factures')
@@ -0,0 +1,207 @@
+from bisect import bisect_left, insort
+from collections import Counter, defaultdict
+from datetime import timedelta
+import heapq
+import threading
+import time
+import unicodedata
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from apps.clients.models import Client
+from .models import Product
+
+
+# Part minimale de trigrammes communs pour une correspondance approchée
+TRIGRAM_THRESHOLD = 0.5
+
+# updated_at est fixé à l'enregistrement, pas à la validation : une ligne
+# validée après une plus récente est relue tant que sa transaction a duré
+# moins que cette marge
+REFRESH_OVERLAP = timedelta(minutes=5)
+
+
+def normalize(text):
+    text = unicodedata.normalize('NFKD', text or '')
+    text = ''.join(char for char in text if not unicodedata.combining(char))
+    return ' '.join(text.lower().split())
+
+
+def trigrams(text):
+    # Même découpage que pg_trgm : chaque mot est entouré d'espaces
+    grams = set()
+    for word in text.split():
+        padded = f'  {word} '
+        grams.update(padded[i:i + 3] for i in range(len(padded) - 2))
+    return grams
+
+
+class LookupIndex:
+    # Index en mémoire du processus pour l'autocomplétion : mots triés pour
+    # la recherche par préfixe, trigrammes pour tolérer les fautes de frappe.
+    # Les enregistrements du processus sont appliqués par signal ; ceux des
+    # autres processus sont relus par updated_at (avec REFRESH_OVERLAP) au
+    # plus toutes les LOOKUP_REFRESH_SECONDS, avec reconstruction complète
+    # si des lignes ont disparu.
+
+    def __init__(self, model, fields):
+        self.model = model
+        self.fields = fields
+        self._lock = threading.RLock()
+        self._loaded = False
+        self._checked_at = 0
+        self._last_updated = None
+        self._entries = {}
+        self._labels = []
+        self._words = []
+        self._grams = defaultdict(set)
+
+    def _entry(self, values):
+        data = {'id': values['id'], 'label': values['name']}
+        data.update((field, values[field]) for field in self.fields)
+        return normalize(values['name']), data
+
+    def _add(self, values):
+        self._remove(values['id'])
+        label, data = self._entry(values)
+        pk = data['id']
+        self._entries[pk] = (label, data)
+        insort(self._labels, (label, pk))
+        for word in set(label.split()):
+            insort(self._words, (word, pk))
+        for gram in trigrams(label):
+            self._grams[gram].add(pk)
+
+    def _discard(self, items, item):
+        position = bisect_left(items, item)
+        if position < len(items) and items[position] == item:
+            del items[position]
+
+    def _remove(self, pk):
+        entry = self._entries.pop(pk, None)
+        if entry is None:
+            return
+        label = entry[0]
+        self._discard(self._labels, (label, pk))
+        for word in set(label.split()):
+            self._discard(self._words, (word, pk))
+        for gram in trigrams(label):
+            self._grams[gram].discard(pk)
+
+    def _rows(self, queryset):
+        return queryset.values('id', 'name', 'updated_at', *self.fields)
+
+    def _track(self, values):
+        if self._last_updated is None or values['updated_at'] > self._last_updated:
+            self._last_updated = values['updated_at']
+
+    def rebuild(self):
+        with self._lock:
+            self._entries, self._labels, self._words = {}, [], []
+            self._grams = defaultdict(set)
+            self._last_updated = None
+            for values in self._rows(self.model.objects.all()):
+                label, data = self._entry(values)
+                pk = data['id']
+                self._entries[pk] = (label, data)
+                self._labels.append((label, pk))
+                self._words.extend((word, pk) for word in set(label.split()))
+                for gram in trigrams(label):
+                    self._grams[gram].add(pk)
+                self._track(values)
+            self._labels.sort()
+            self._words.sort()
+            self._loaded = True
+            self._checked_at = time.monotonic()
+
+    def refresh(self):
+        if not self._loaded:
+            return self.rebuild()
+        if not self.stale():
+            return
+        with self._lock:
+            changed = self.model.objects.all()
+            if self._last_updated is not None:
+                changed = changed.filter(updated_at__gte=self._last_updated - REFRESH_OVERLAP)
+            for values in self._rows(changed):
+                label, data = self._entry(values)
+                if self._entries.get(data['id']) != (label, data):
+                    self._add(values)
+                self._track(values)
+            if self.model.objects.count() != len(self._entries):
+                return self.rebuild()
+            self._checked_at = time.monotonic()
+
+    def update(self, instance):
+        if self._loaded:
+            with self._lock:
+                values = {field: getattr(instance, field) for field in ('id', 'name', *self.fields)}
+                self._add(values)
+
+    def delete(self, pk):
+        if self._loaded:
+            with self._lock:
+                self._remove(pk)
+
+    def stale(self):
+        return not self._loaded or time.monotonic() - self._checked_at >= settings.LOOKUP_REFRESH_SECONDS
+
+    def search(self, query, limit):
+        self.refresh()
+        return self.match(query, limit)
+
+    async def asearch(self, query, limit):
+        # Index à jour : recherche en mémoire, sans requête ni thread
+        if self.stale():
+            await sync_to_async(self.refresh)()
+        return self.match(query, limit)
+
+    def match(self, query, limit):
+        query = normalize(query)
+        if not query:
+            return []
+        words = query.split()
+
+        with self._lock:
+            # 1. Libellés commençant par la saisie, lus dans l'ordre alphabétique
+            found = []
+            position = bisect_left(self._labels, (query,))
+            while (position < len(self._labels) and len(found) < limit
+                   and self._labels[position][0].startswith(query)):
+                found.append(self._labels[position][1])
+                position += 1
+
+            # 2. Chaque mot saisi commence un mot du libellé
+            if len(found) < limit:
+                matches = set()
+                position = bisect_left(self._words, (words[0],))
+                while position < len(self._words) and self._words[position][0].startswith(words[0]):
+                    pk = self._words[position][1]
+                    label_words = self._entries[pk][0].split()
+                    if all(any(w.startswith(word) for w in label_words) for word in words[1:]):
+                        matches.add(pk)
+                    position += 1
+                matches.difference_update(found)
+                found += heapq.nsmallest(limit - len(found), matches, key=lambda pk: self._entries[pk][0])
+
+            # 3. Trigrammes : correspondance approchée pour les fautes de frappe
+            grams = trigrams(query)
+            if len(found) < limit and len(query) >= 3:
+                shared = Counter()
+                for gram in grams:
+                    shared.update(self._grams.get(gram, ()))
+                minimum = len(grams) * TRIGRAM_THRESHOLD
+                for pk in found:
+                    shared.pop(pk, None)
+                candidates = [pk for pk, count in shared.items() if count >= minimum]
+                found += heapq.nsmallest(
+                    limit - len(found), candidates,
+                    key=lambda pk: (-shared[pk], self._entries[pk][0]),
+                )
+
+            return [self._entries[pk][1] for pk in found]
+
+
+INDEXES = {
+    'product': LookupIndex(Product, ('unit_price', 'tva_rate')),
+    'client': LookupIndex(Client, ('ninea', 'phone')),
+}
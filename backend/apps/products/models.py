@@ -1,4 +1,7 @@
+from django.contrib.postgres.indexes import GinIndex, OpClass
+from django.contrib.postgres.search import SearchVector
 from django.db import models
+from django.db.models.functions import Upper
 from decimal import Decimal
 
 
@@ -29,6 +32,10 @@ class Product(models.Model):
         verbose_name = "Produit"
         verbose_name_plural = "Produits"
         ordering = ['name']
+        indexes = [
+            GinIndex(OpClass(Upper('name'), name='gin_trgm_ops'), name='product_name_trgm_idx'),
+            GinIndex(SearchVector('description', config='french'), name='product_description_fts_idx'),
+        ]
     
     def __str__(self):
         return f"{self.name} - {self.unit_price} FCFA"
@@ -0,0 +1,30 @@
+from django.db import transaction
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+from apps.clients.models import Client
+from apps.invoices import response_cache
+from .models import Product
+from .lookup import INDEXES
+
+
+@receiver(post_save, sender=Product)
+@receiver(post_save, sender=Client)
+def update_lookup_on_save(sender, instance, **kwargs):
+    index = INDEXES['product' if sender is Product else 'client']
+    transaction.on_commit(lambda: index.update(instance))
+
+
+@receiver(post_delete, sender=Product)
+@receiver(post_delete, sender=Client)
+def update_lookup_on_delete(sender, instance, **kwargs):
+    index = INDEXES['product' if sender is Product else 'client']
+    pk = instance.pk
+    transaction.on_commit(lambda: index.delete(pk))
+
+
+@receiver(post_save, sender=Product)
+@receiver(post_delete, sender=Product)
+@receiver(post_save, sender=Client)
+@receiver(post_delete, sender=Client)
+def bump_response_cache(sender, instance, **kwargs):
+    response_cache.bump(sender)
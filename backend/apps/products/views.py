@@ -1,13 +1,66 @@
-from rest_framework import viewsets, filters
+from rest_framework import viewsets, filters, status
 from rest_framework.permissions import IsAuthenticated
+from rest_framework.response import Response
+from rest_framework.views import APIView
+from django.conf import settings
+from apps.invoices.mixins import (
+    AsyncReadMixin, CachedResponseMixin, ConditionalRetrieveMixin, ExportMixin, ImportMixin,
+)
+from apps.invoices.search import RankedSearchFilter
 from .models import Product
 from .serializers import ProductSerializer
+from .lookup import INDEXES
 
 
-class ProductViewSet(viewsets.ModelViewSet):
+class ProductViewSet(ExportMixin, ImportMixin, AsyncReadMixin, CachedResponseMixin, ConditionalRetrieveMixin,
+                     viewsets.ModelViewSet):
     queryset = Product.objects.all()
+    cache_models = (Product,)
     serializer_class = ProductSerializer
     permission_classes = [IsAuthenticated]
-    filter_backends = [filters.SearchFilter, filters.OrderingFilter]
-    search_fields = ['name', 'description']
+    filter_backends = [RankedSearchFilter, filters.OrderingFilter]
+    search_fields = ['name']
+    search_text_fields = ['description']
     ordering_fields = ['name', 'unit_price', 'created_at']
+    export_fields = (
+        ('name', 'Produit'),
+        ('description', 'Description'),
+        ('unit_price', 'Prix unitaire'),
+        ('tva_rate', 'Taux TVA (%)'),
+        ('created_at', 'Créé le'),
+    )
+    export_name = 'produits'
+    import_columns = {
+        'name': ('nom', 'produit', 'nom du produit', 'designation'),
+        'description': (),
+        'unit_price': ('prix', 'prix unitaire', 'prix unitaire (fcfa)'),
+        'tva_rate': ('tva', 'taux tva', 'taux tva (%)'),
+    }
+    import_key_fields = ('name',)
+
+
+class LookupView(AsyncReadMixin, APIView):
+    permission_classes = [IsAuthenticated]
+    
+    def get_index(self, request):
+        lookup_type = request.query_params.get('type', 'product')
+        index = INDEXES.get(lookup_type)
+        if index is None:
+            return None, None, f"Type inconnu : {lookup_type}"
+        try:
+            limit = int(request.query_params.get('limit', 10))
+        except ValueError:
+            return None, None, 'limit doit être un entier'
+        return index, max(1, min(limit, settings.LOOKUP_MAX_RESULTS)), None
+    
+    def get(self, request):
+        index, limit, error = self.get_index(request)
+        if error:
+            return Response({'error': error}, status=status.HTTP_400_BAD_REQUEST)
+        return Response({'results': index.search(request.query_params.get('q', ''), limit)})
+    
+    async def aget(self, request):
+        index, limit, error = self.get_index(request)
+        if error:
+            return Response({'error': error}, status=status.HTTP_400_BAD_REQUEST)
+        return Response({'results': await index.asearch(request.query_params.get('q', ''), limit)})
@@ -1,4 +1,5 @@
 from django.contrib import admin
+from apps.invoices.admin import DocumentAdmin
 from .models import Proforma, ProformaItem
 
 
@@ -8,9 +9,10 @@ class ProformaItemInline(admin.TabularInline):
 
 
 @admin.register(Proforma)
-class ProformaAdmin(admin.ModelAdmin):
+class ProformaAdmin(DocumentAdmin):
     list_display = ['number', 'client', 'date', 'status', 'total_ttc', 'created_by']
     list_filter = ['status', 'date', 'created_at']
     search_fields = ['number', 'client__name']
+    list_select_related = ['client', 'created_by']
     inlines = [ProformaItemInline]
     readonly_fields = ['number', 'total_ht', 'total_tva', 'total_ttc']
@@ -0,0 +1,9 @@
+from django.apps import AppConfig
+
+
+class ProformasConfig(AppConfig):
+    name = 'apps.proformas'
+    default_auto_field = 'django.db.models.BigAutoField'
+
+    def ready(self):
+        from . import signals  # noqa: F401
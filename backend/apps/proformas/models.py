@@ -1,11 +1,19 @@
-from django.db import models
+from django.contrib.postgres.indexes import GinIndex, OpClass
+from django.contrib.postgres.search import SearchVector
+from django.db import models, transaction
+from django.db.models import prefetch_related_objects
 from django.conf import settings
+from django.db.models.functions import Upper
 from decimal import Decimal
 from apps.clients.models import Client
 from apps.products.models import Product
+from apps.invoices.models import DocumentSequence, Invoice, InvoiceItem, NumberedDocumentMixin, round_amount
+from apps.invoices import response_cache, stats
 
 
-class Proforma(models.Model):
+class Proforma(NumberedDocumentMixin, models.Model):
+    number_prefix = 'PRO'
+    
     STATUS_CHOICES = [
         ('draft', 'Brouillon'),
         ('sent', 'Envoyée'),
@@ -38,37 +46,90 @@ class Proforma(models.Model):
         verbose_name = "Facture Proforma"
         verbose_name_plural = "Factures Proforma"
         ordering = ['-date', '-created_at']
+        indexes = [
+            models.Index(fields=['-date', '-created_at', '-id'], name='proforma_keyset_idx'),
+            GinIndex(OpClass(Upper('number'), name='gin_trgm_ops'), name='proforma_number_trgm_idx'),
+        ]
     
     def __str__(self):
         return f"{self.number} - {self.client.name}"
     
-    def save(self, *args, **kwargs):
-        if not self.number:
-            self.number = self.generate_number()
-        super().save(*args, **kwargs)
-    
     @classmethod
-    def generate_number(cls):
+    def convert_to_invoices(cls, proforma_ids, user, statuses=None):
+        # Conversion groupée et atomique : numéros réservés en un bloc,
+        # factures et lignes insérées en bulk, statuts mis à jour en un UPDATE
         from django.utils import timezone
-        year = timezone.now().year
-        prefix = f"PRO-{year}-"
-        last_proforma = cls.objects.filter(number__startswith=prefix).order_by('-number').first()
-        if last_proforma:
-            last_num = int(last_proforma.number.split('-')[-1])
-            new_num = last_num + 1
-        else:
-            new_num = 1
-        return f"{prefix}{new_num:03d}"
+        today = timezone.localdate()
+        
+        with transaction.atomic():
+            queryset = cls.objects.select_for_update().filter(pk__in=proforma_ids).exclude(status='converted')
+            if statuses:
+                queryset = queryset.filter(status__in=statuses)
+            proformas = list(queryset.order_by('id'))
+            if not proformas:
+                return []
+            prefetch_related_objects(proformas, 'items')
+            
+            numbers = DocumentSequence.next_numbers(Invoice.number_prefix, len(proformas))
+            invoices, invoice_items = [], []
+            for proforma, number in zip(proformas, numbers):
+                invoice = Invoice(
+                    number=number,
+                    client_id=proforma.client_id,
+                    created_by=user,
+                    date=today,
+                    notes=f"Convertie depuis proforma {proforma.number}\n{proforma.notes}",
+                )
+                items = []
+                for item in proforma.items.all():
+                    invoice_item = InvoiceItem(
+                        invoice=invoice,
+                        product_id=item.product_id,
+                        description=item.description,
+                        quantity=item.quantity,
+                        unit_price=item.unit_price,
+                        tva_rate=item.tva_rate,
+                    )
+                    invoice_item.compute_totals()
+                    items.append(invoice_item)
+                invoice.set_totals(items)
+                invoices.append(invoice)
+                invoice_items.append(items)
+            
+            Invoice.objects.bulk_create(invoices)
+            for invoice, items in zip(invoices, invoice_items):
+                for item in items:
+                    item.invoice = invoice
+            InvoiceItem.objects.bulk_create([item for items in invoice_items for item in items])
+            cls.objects.filter(pk__in=[proforma.pk for proforma in proformas]).update(
+                status='converted', updated_at=timezone.now()
+            )
+            
+            # bulk_create et update() n'émettent pas de signaux
+            stats.apply('invoice', [(None, stats.snapshot(invoice)) for invoice in invoices])
+            proforma_changes = []
+            for proforma in proformas:
+                old = stats.snapshot(proforma)
+                proforma.status = 'converted'
+                proforma_changes.append((old, stats.snapshot(proforma)))
+                stats.remember(proforma)
+            stats.apply('proforma', proforma_changes)
+            response_cache.bump(cls, Invoice, InvoiceItem)
+        
+        return list(zip(proformas, invoices))
     
-    def calculate_totals(self):
+    def set_totals(self, items):
         total_ht = Decimal('0')
         total_tva = Decimal('0')
-        for item in self.items.all():
+        for item in items:
             total_ht += item.total_ht
             total_tva += item.total_tva
         self.total_ht = total_ht
         self.total_tva = total_tva
         self.total_ttc = total_ht + total_tva
+    
+    def calculate_totals(self):
+        self.set_totals(self.items.all())
         self.save(update_fields=['total_ht', 'total_tva', 'total_ttc'])
 
 
@@ -87,11 +148,21 @@ class ProformaItem(models.Model):
     class Meta:
         verbose_name = "Ligne de proforma"
         verbose_name_plural = "Lignes de proforma"
+        indexes = [
+            GinIndex(SearchVector('description', config='french'), name='proforma_item_fts_idx'),
+        ]
+    
+    def compute_totals(self):
+        total_ht = self.quantity * self.unit_price
+        total_tva = total_ht * (self.tva_rate / Decimal('100'))
+        # Lignes arrondies comme en base : l'en-tête (set_totals) est la
+        # somme des montants affichés
+        self.total_ht = round_amount(total_ht)
+        self.total_tva = round_amount(total_tva)
+        self.total_ttc = round_amount(total_ht + total_tva)
     
     def save(self, *args, **kwargs):
-        self.total_ht = self.quantity * self.unit_price
-        self.total_tva = self.total_ht * (self.tva_rate / Decimal('100'))
-        self.total_ttc = self.total_ht + self.total_tva
+        self.compute_totals()
         super().save(*args, **kwargs)
     
     def __str__(self):
@@ -0,0 +1,39 @@
+from django.db.models.signals import pre_save, post_save, pre_delete, post_delete
+from django.dispatch import receiver
+from .models import Proforma, ProformaItem
+from apps.invoices import pdf_cache, response_cache, stats
+
+
+@receiver(post_save, sender=ProformaItem)
+@receiver(post_delete, sender=ProformaItem)
+def invalidate_pdf_on_item_change(sender, instance, **kwargs):
+    pdf_cache.invalidate('proforma', instance.proforma_id)
+
+
+@receiver(post_delete, sender=Proforma)
+def invalidate_pdf_on_delete(sender, instance, **kwargs):
+    pdf_cache.invalidate('proforma', instance.pk)
+
+
+@receiver(pre_save, sender=Proforma)
+@receiver(pre_delete, sender=Proforma)
+def load_stats_state(sender, instance, **kwargs):
+    stats.load_snapshot(instance)
+
+
+@receiver(post_save, sender=Proforma)
+def update_stats_on_save(sender, instance, **kwargs):
+    stats.record_save('proforma', instance)
+
+
+@receiver(post_delete, sender=Proforma)
+def update_stats_on_delete(sender, instance, **kwargs):
+    stats.record_delete('proforma', instance)
+
+
+@receiver(post_save, sender=Proforma)
+@receiver(post_delete, sender=Proforma)
+@receiver(post_save, sender=ProformaItem)
+@receiver(post_delete, sender=ProformaItem)
+def bump_response_cache(sender, instance, **kwargs):
+    response_cache.bump(sender)
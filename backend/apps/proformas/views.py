@@ -5,26 +5,60 @@ from rest_framework.permissions import IsAuthenticated
 from django.http import HttpResponse
 from django.db.models import Sum, Count
 from django.utils import timezone
+from apps.accounts.models import User
+from apps.clients.models import Client
+from apps.products.models import Product
 from .models import Proforma, ProformaItem
-from .serializers import ProformaSerializer, ProformaCreateSerializer
-from apps.invoices.models import Invoice, InvoiceItem
-from apps.invoices.pdf_generator import generate_proforma_pdf
+from .serializers import ProformaSerializer, ProformaListSerializer, ProformaCreateSerializer
+from apps.invoices import pdf_cache
+from apps.invoices import stats as document_stats
+from apps.invoices.mixins import (
+    AsyncReadMixin, CachedResponseMixin, ConditionalRetrieveMixin, DocumentFieldsMixin, ExportMixin,
+    EmailOutboxMixin, PdfJobMixin, PdfExportMixin,
+)
+from apps.invoices.pagination import DocumentPagination
+from apps.invoices.search import RankedSearchFilter
 
 
-class ProformaViewSet(viewsets.ModelViewSet):
+CONVERT_BATCH_MAX = 200
+
+
+class ProformaViewSet(ExportMixin, AsyncReadMixin, CachedResponseMixin, ConditionalRetrieveMixin,
+                      DocumentFieldsMixin, PdfJobMixin, EmailOutboxMixin, PdfExportMixin, viewsets.ModelViewSet):
+    pdf_document_type = 'proforma'
     queryset = Proforma.objects.all()
+    cache_models = (Proforma, ProformaItem, Client, Product, User)
+    list_serializer_class = ProformaListSerializer
     permission_classes = [IsAuthenticated]
-    filter_backends = [filters.SearchFilter, filters.OrderingFilter]
+    pagination_class = DocumentPagination
+    filter_backends = [RankedSearchFilter, filters.OrderingFilter]
     search_fields = ['number', 'client__name']
+    search_text_fields = ['items__description']
     ordering_fields = ['date', 'number', 'total_ttc', 'created_at']
+    export_fields = (
+        ('number', 'Numéro'),
+        ('date', 'Date'),
+        ('validity_date', 'Date de validité'),
+        ('client__name', 'Client'),
+        ('client__ninea', 'NINEA'),
+        ('status', 'Statut'),
+        ('total_ht', 'Total HT'),
+        ('total_tva', 'Total TVA'),
+        ('total_ttc', 'Total TTC'),
+        ('created_by__username', 'Créée par'),
+        ('created_at', 'Créée le'),
+    )
+    export_name = 'proformas'
     
     def get_serializer_class(self):
+        if self.use_list_serializer():
+            return self.list_serializer_class
         if self.action in ['create', 'update', 'partial_update']:
             return ProformaCreateSerializer
         return ProformaSerializer
     
     def get_queryset(self):
-        queryset = Proforma.objects.select_related('client', 'created_by').prefetch_related('items')
+        queryset = self.prefetch_items(Proforma.objects.select_related('client', 'created_by'))
         
         status_filter = self.request.query_params.get('status')
         if status_filter:
@@ -34,6 +68,13 @@ class ProformaViewSet(viewsets.ModelViewSet):
         if client_id:
             queryset = queryset.filter(client_id=client_id)
         
+        start_date = self.request.query_params.get('start_date')
+        end_date = self.request.query_params.get('end_date')
+        if start_date:
+            queryset = queryset.filter(date__gte=start_date)
+        if end_date:
+            queryset = queryset.filter(date__lte=end_date)
+        
         return queryset
     
     @action(detail=True, methods=['post'])
@@ -43,28 +84,11 @@ class ProformaViewSet(viewsets.ModelViewSet):
             return Response({'error': 'Cette proforma a déjà été convertie'}, 
                           status=status.HTTP_400_BAD_REQUEST)
         
-        # Create invoice from proforma
-        invoice = Invoice.objects.create(
-            client=proforma.client,
-            created_by=request.user,
-            date=timezone.now().date(),
-            notes=f"Convertie depuis proforma {proforma.number}\n{proforma.notes}",
-        )
-        
-        # Copy items
-        for item in proforma.items.all():
-            InvoiceItem.objects.create(
-                invoice=invoice,
-                product=item.product,
-                description=item.description,
-                quantity=item.quantity,
-                unit_price=item.unit_price,
-                tva_rate=item.tva_rate,
-            )
-        
-        invoice.calculate_totals()
-        proforma.status = 'converted'
-        proforma.save()
+        converted = Proforma.convert_to_invoices([proforma.pk], request.user)
+        if not converted:
+            return Response({'error': 'Cette proforma a déjà été convertie'}, 
+                          status=status.HTTP_400_BAD_REQUEST)
+        invoice = converted[0][1]
         
         return Response({
             'message': 'Proforma convertie en facture',
@@ -72,31 +96,74 @@ class ProformaViewSet(viewsets.ModelViewSet):
             'invoice_id': invoice.id
         })
     
+    @action(detail=False, methods=['post'])
+    def convert_batch(self, request):
+        ids = request.data.get('ids')
+        if not isinstance(ids, list) or not ids or not all(isinstance(pk, int) for pk in ids):
+            return Response({'error': 'Une liste d\'identifiants (ids) est requise'}, 
+                          status=status.HTTP_400_BAD_REQUEST)
+        if len(ids) > CONVERT_BATCH_MAX:
+            return Response({'error': f'Maximum {CONVERT_BATCH_MAX} proformas par conversion'}, 
+                          status=status.HTTP_400_BAD_REQUEST)
+        
+        converted = Proforma.convert_to_invoices(ids, request.user, statuses=['accepted'])
+        converted_ids = {proforma.pk for proforma, _ in converted}
+        
+        errors = []
+        remaining = [pk for pk in dict.fromkeys(ids) if pk not in converted_ids]
+        if remaining:
+            statuses = dict(Proforma.objects.filter(pk__in=remaining).values_list('id', 'status'))
+            for pk in remaining:
+                if pk not in statuses:
+                    error = 'Proforma introuvable'
+                elif statuses[pk] == 'converted':
+                    error = 'Cette proforma a déjà été convertie'
+                else:
+                    error = 'Seules les proformas acceptées peuvent être converties'
+                errors.append({'id': pk, 'error': error})
+        
+        return Response({
+            'converted': [
+                {
+                    'proforma_id': proforma.id,
+                    'proforma_number': proforma.number,
+                    'invoice_id': invoice.id,
+                    'invoice_number': invoice.number,
+                }
+                for proforma, invoice in converted
+            ],
+            'errors': errors,
+        })
+    
     @action(detail=True, methods=['get'])
     def pdf(self, request, pk=None):
         proforma = self.get_object()
-        pdf_content = generate_proforma_pdf(proforma)
-        response = HttpResponse(pdf_content, content_type='application/pdf')
-        response['Content-Disposition'] = f'attachment; filename="{proforma.number}.pdf"'
-        return response
+        
+        def build_response():
+            pdf_content = pdf_cache.get_pdf('proforma', proforma)
+            response = HttpResponse(pdf_content, content_type='application/pdf')
+            response['Content-Disposition'] = f'attachment; filename="{proforma.number}.pdf"'
+            return response
+        
+        etag = pdf_cache.build_key('proforma', proforma)
+        return self.conditional_response(request, etag, self.get_last_modified(proforma), build_response)
     
     @action(detail=False, methods=['get'])
     def stats(self, request):
         today = timezone.now()
-        current_month = today.month
-        current_year = today.year
-        
-        month_proformas = Proforma.objects.filter(
-            date__year=current_year,
-            date__month=current_month
-        )
-        
-        stats = {
-            'total_proformas_month': month_proformas.count(),
-            'total_amount_month': month_proformas.aggregate(total=Sum('total_ttc'))['total'] or 0,
-            'accepted': month_proformas.filter(status='accepted').count(),
-            'pending': month_proformas.filter(status__in=['draft', 'sent']).count(),
-            'converted': month_proformas.filter(status='converted').count(),
+        counts, totals = document_stats.get_month('proforma', today.year, today.month)
+        return Response(self.stats_data(counts, totals))
+    
+    async def astats(self, request):
+        today = timezone.now()
+        counts, totals = await document_stats.aget_month('proforma', today.year, today.month)
+        return Response(self.stats_data(counts, totals))
+    
+    def stats_data(self, counts, totals):
+        return {
+            'total_proformas_month': sum(counts.values()),
+            'total_amount_month': sum(totals.values()),
+            'accepted': counts['accepted'],
+            'pending': counts['draft'] + counts['sent'],
+            'converted': counts['converted'],
         }
-        
-        return Response(stats)
@@ -0,0 +1,10 @@
+import os
+from django.core.asgi import get_asgi_application
+
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'config.settings')
+# Lectures servies par les vues asynchrones (voir AsyncReadMixin)
+os.environ.setdefault('ASYNC_VIEWS', 'True')
+# Un thread par requête : une connexion persistante par thread ne serait
+# jamais réutilisée (voir DB_POOL dans config/settings.py)
+os.environ.setdefault('DB_CONN_MAX_AGE', '0')
+application = get_asgi_application()
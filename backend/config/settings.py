@@ -16,6 +16,7 @@ INSTALLED_APPS = [
     'django.contrib.sessions',
     'django.contrib.messages',
     'django.contrib.staticfiles',
+    'django.contrib.postgres',
     # Third party
     'rest_framework',
     'rest_framework_simplejwt',
@@ -75,9 +76,28 @@ DATABASES = {
         'PASSWORD': urllib.parse.unquote(url.password) if url.password else '',
         'HOST': url.hostname or 'localhost',
         'PORT': url.port or '5432',
+        # Connexion gardée entre les requêtes (secondes, 0 : une par requête),
+        # vérifiée avant réutilisation pour survivre à un redémarrage de PostgreSQL
+        'CONN_MAX_AGE': config('DB_CONN_MAX_AGE', default=60, cast=int),
+        'CONN_HEALTH_CHECKS': config('DB_CONN_HEALTH_CHECKS', default=True, cast=bool),
     }
 }
 
+# Pool de connexions psycopg 3 (psycopg[pool], voir requirements.txt), partagé
+# par les threads du worker. Indispensable sous ASGI, où chaque requête a
+# son propre thread et donc sa propre connexion : CONN_MAX_AGE est alors
+# sans effet (voir config/asgi.py).
+DB_POOL = config('DB_POOL', default=False, cast=bool)
+if DB_POOL:
+    DATABASES['default']['CONN_MAX_AGE'] = 0
+    DATABASES['default']['OPTIONS'] = {
+        'pool': {
+            'min_size': config('DB_POOL_MIN_SIZE', default=2, cast=int),
+            'max_size': config('DB_POOL_MAX_SIZE', default=10, cast=int),
+            'timeout': config('DB_POOL_TIMEOUT', default=10, cast=int),
+        },
+    }
+
 AUTH_PASSWORD_VALIDATORS = [
     {'NAME': 'django.contrib.auth.password_validation.UserAttributeSimilarityValidator'},
     {'NAME': 'django.contrib.auth.password_validation.MinimumLengthValidator'},
@@ -97,6 +117,40 @@ STATICFILES_DIRS = [BASE_DIR / 'static']
 MEDIA_URL = 'media/'
 MEDIA_ROOT = BASE_DIR / 'media'
 
+# Fichiers générés non publics (PDF des jobs, cache PDF) : hors de
+# MEDIA_ROOT, que nginx sert sans authentification, ils ne passent que par l'API
+PRIVATE_ROOT = BASE_DIR / 'private'
+
+# Cache des PDF générés (LRU sur disque)
+PDF_CACHE_ENABLED = config('PDF_CACHE_ENABLED', default=True, cast=bool)
+PDF_CACHE_DIR = PRIVATE_ROOT / 'pdf_cache'
+PDF_CACHE_MAX_BYTES = config('PDF_CACHE_MAX_MB', default=200, cast=int) * 1024 * 1024
+
+# Génération PDF asynchrone (manage.py pdf_worker)
+PDF_WORKER_PROCESSES = config('PDF_WORKER_PROCESSES', default=2, cast=int)
+# PDF terminés conservés (heures) avant suppression par le worker
+PDF_JOB_RETENTION_HOURS = config('PDF_JOB_RETENTION_HOURS', default=24, cast=int)
+
+# Rendu des PDF à la demande dans un pool de processus (0 : dans le thread
+# de la requête). Utile sous ASGI, où un rendu bloquerait tout le worker.
+PDF_RENDER_PROCESSES = config('PDF_RENDER_PROCESSES', default=0, cast=int)
+
+# Export PDF groupé en ZIP, diffusé au fil du rendu. Sous ASGI le ZIP est
+# produit dans des threads et ne bloque pas le worker : limite haute (un
+# mois de factures). Un worker synchrone reste occupé pendant tout l'export,
+# qui doit tenir dans le --timeout de gunicorn (300 s dans deploy/).
+PDF_EXPORT_PROCESSES = config('PDF_EXPORT_PROCESSES', default=os.cpu_count() or 1, cast=int)
+PDF_EXPORT_MAX_DOCUMENTS = config('PDF_EXPORT_MAX_DOCUMENTS', default=5000, cast=int)
+PDF_EXPORT_SYNC_MAX_DOCUMENTS = config('PDF_EXPORT_SYNC_MAX_DOCUMENTS', default=500, cast=int)
+
+# Export CSV / XLSX des listes (?format=csv|xlsx) : lignes lues par lot
+EXPORT_CHUNK_SIZE = config('EXPORT_CHUNK_SIZE', default=2000, cast=int)
+
+# Import CSV / XLSX des clients et produits (POST .../import/)
+IMPORT_BATCH_SIZE = config('IMPORT_BATCH_SIZE', default=2000, cast=int)
+IMPORT_MAX_ROWS = config('IMPORT_MAX_ROWS', default=100000, cast=int)
+IMPORT_MAX_ERRORS = 500
+
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
 AUTH_USER_MODEL = 'accounts.User'
@@ -104,22 +158,66 @@ AUTH_USER_MODEL = 'accounts.User'
 # REST Framework
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': [
-        'rest_framework_simplejwt.authentication.JWTAuthentication',
+        'apps.accounts.authentication.CachedJWTAuthentication',
     ],
     'DEFAULT_PERMISSION_CLASSES': [
         'rest_framework.permissions.IsAuthenticated',
     ],
-    'DEFAULT_PAGINATION_CLASS': 'rest_framework.pagination.PageNumberPagination',
+    'DEFAULT_PAGINATION_CLASS': 'apps.invoices.pagination.AsyncPageNumberPagination',
     'PAGE_SIZE': 20,
 }
 
+# Analytique des ventes
+ANALYTICS_MAX_ROWS = 1000
+ANALYTICS_CACHE_SECONDS = config('ANALYTICS_CACHE_SECONDS', default=300, cast=int)
+
+# Cache Django : mémoire locale par défaut, propre à chaque worker. REDIS_URL
+# (pip install redis) active un cache partagé aux incréments atomiques ;
+# CACHE_DIR, un cache fichiers partagé mais sans incrément atomique.
+REDIS_URL = config('REDIS_URL', default='')
+CACHE_DIR = config('CACHE_DIR', default='')
+if REDIS_URL:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': REDIS_URL,
+        }
+    }
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache' if CACHE_DIR
+            else 'django.core.cache.backends.locmem.LocMemCache',
+            'LOCATION': CACHE_DIR or 'moultazam',
+            'OPTIONS': {'MAX_ENTRIES': config('CACHE_MAX_ENTRIES', default=5000, cast=int)},
+        }
+    }
+
+# Cache des réponses list / retrieve de l'API (0 pour désactiver). Une
+# écriture invalide par incrément des compteurs de version : activé par
+# défaut avec Redis seulement, sinon les autres workers gunicorn (cache
+# local) ou un incrément perdu (cache fichiers) servent des données périmées.
+RESPONSE_CACHE_SECONDS = config('RESPONSE_CACHE_SECONDS', default=300 if REDIS_URL else 0, cast=int)
+
+# Lectures asynchrones (voir AsyncReadMixin), activées par config/asgi.py
+ASYNC_VIEWS = config('ASYNC_VIEWS', default=False, cast=bool)
+
+# Autocomplétion produits / clients (/api/lookup/)
+LOOKUP_REFRESH_SECONDS = config('LOOKUP_REFRESH_SECONDS', default=5, cast=int)
+LOOKUP_MAX_RESULTS = 50
+
 # JWT Settings
 SIMPLE_JWT = {
     'ACCESS_TOKEN_LIFETIME': timedelta(hours=12),
     'REFRESH_TOKEN_LIFETIME': timedelta(days=7),
     'ROTATE_REFRESH_TOKENS': True,
+    'TOKEN_OBTAIN_SERIALIZER': 'apps.accounts.serializers.UserTokenObtainPairSerializer',
+    'TOKEN_REFRESH_SERIALIZER': 'apps.accounts.serializers.UserTokenRefreshSerializer',
 }
 
+# Durée de vie des utilisateurs authentifiés gardés en mémoire (0 pour désactiver)
+AUTH_USER_CACHE_SECONDS = config('AUTH_USER_CACHE_SECONDS', default=60, cast=int)
+
 # CORS
 CORS_ALLOWED_ORIGINS = [
     'http://localhost:3000',
@@ -146,3 +244,22 @@ COMPANY_NINEA = '07225664'
 COMPANY_RCCM = 'SN DKR 2025 A 45478'
 TVA_RATE = 18  # 18%
 CURRENCY = 'FCFA'
+
+# Emails des documents (POST .../send_email/, envoyés par manage.py email_worker).
+# Console en développement ; en production, SMTP configuré par l'environnement.
+EMAIL_BACKEND = config(
+    'EMAIL_BACKEND',
+    default='django.core.mail.backends.console.EmailBackend' if DEBUG
+    else 'django.core.mail.backends.smtp.EmailBackend',
+)
+EMAIL_HOST = config('EMAIL_HOST', default='localhost')
+EMAIL_PORT = config('EMAIL_PORT', default=25, cast=int)
+EMAIL_HOST_USER = config('EMAIL_HOST_USER', default='')
+EMAIL_HOST_PASSWORD = config('EMAIL_HOST_PASSWORD', default='')
+EMAIL_USE_TLS = config('EMAIL_USE_TLS', default=False, cast=bool)
+EMAIL_TIMEOUT = 30
+DEFAULT_FROM_EMAIL = config('DEFAULT_FROM_EMAIL', default=f'Moultazam Distribution <{COMPANY_EMAIL}>')
+EMAIL_BATCH_SIZE = config('EMAIL_BATCH_SIZE', default=50, cast=int)
+# Nouvel essai après EMAIL_RETRY_SECONDS, délai doublé à chaque échec
+EMAIL_MAX_ATTEMPTS = config('EMAIL_MAX_ATTEMPTS', default=5, cast=int)
+EMAIL_RETRY_SECONDS = config('EMAIL_RETRY_SECONDS', default=60, cast=int)
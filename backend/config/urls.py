@@ -3,6 +3,7 @@ from django.urls import path, include
 from django.conf import settings
 from django.conf.urls.static import static
 from rest_framework_simplejwt.views import TokenObtainPairView, TokenRefreshView
+from apps.products.views import LookupView
 
 urlpatterns = [
     path('admin/', admin.site.urls),
@@ -11,6 +12,7 @@ urlpatterns = [
     path('api/accounts/', include('apps.accounts.urls')),
     path('api/clients/', include('apps.clients.urls')),
     path('api/products/', include('apps.products.urls')),
+    path('api/lookup/', LookupView.as_view(), name='lookup'),
     path('api/invoices/', include('apps.invoices.urls')),
     path('api/proformas/', include('apps.proformas.urls')),
     path('api/delivery-notes/', include('apps.delivery_notes.urls')),
@@ -23,6 +23,7 @@ sudo apt update && sudo apt upgrade -y
 echo "[2/10] Installation des dépendances..."
 sudo apt install -y python3 python3-pip python3-venv python3-dev \
     postgresql postgresql-contrib \
+    redis-server \
     nginx \
     nodejs npm \
     git curl \
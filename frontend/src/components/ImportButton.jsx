@@ -0,0 +1,62 @@
+import { useRef, useState } from 'react'
+import api from '../services/api'
+import toast from 'react-hot-toast'
+import { Upload } from 'lucide-react'
+
+// Import CSV / XLSX : simulation (dry_run) puis confirmation avant écriture
+export default function ImportButton({ endpoint, onImported }) {
+  const input = useRef(null)
+  const [importing, setImporting] = useState(false)
+
+  const send = (file, dryRun) => {
+    const data = new FormData()
+    data.append('file', file)
+    if (dryRun) data.append('dry_run', '1')
+    return api.post(endpoint, data)
+  }
+
+  const handleFile = async (e) => {
+    const file = e.target.files[0]
+    e.target.value = ''
+    if (!file) return
+
+    setImporting(true)
+    try {
+      const { data: preview } = await send(file, true)
+      const errors = preview.errors.slice(0, 5).map(error =>
+        `Ligne ${error.row} : ${Object.values(error.errors).flat().join(', ')}`
+      )
+      const message = [
+        `${preview.created} création(s), ${preview.updated} mise(s) à jour, ${preview.error_count} ligne(s) en erreur.`,
+        ...errors,
+        'Lancer l\'import ?',
+      ].join('\n')
+      if (!preview.created && !preview.updated) {
+        toast.error(errors[0] || 'Aucune ligne à importer')
+      } else if (confirm(message)) {
+        const { data: report } = await send(file, false)
+        toast.success(`${report.created} création(s), ${report.updated} mise(s) à jour`)
+        onImported()
+      }
+    } catch (error) {
+      toast.error(error.response?.data?.error || 'Import impossible')
+    } finally {
+      setImporting(false)
+    }
+  }
+
+  return (
+    <>
+      <input ref={input} type="file" accept=".csv,.xlsx" className="hidden" onChange={handleFile} />
+      <button
+        type="button"
+        onClick={() => input.current.click()}
+        disabled={importing}
+        className="btn-secondary flex items-center gap-2 w-fit"
+      >
+        <Upload size={20} />
+        {importing ? 'Import...' : 'Importer'}
+      </button>
+    </>
+  )
+}
@@ -0,0 +1,69 @@
+import { useState, useEffect, useRef } from 'react'
+import api from '../services/api'
+
+export default function ProductLookup({ value, onChange, onSelect, placeholder }) {
+  const [results, setResults] = useState([])
+  const [open, setOpen] = useState(false)
+  const timer = useRef(null)
+
+  useEffect(() => () => clearTimeout(timer.current), [])
+
+  const search = (q) => {
+    clearTimeout(timer.current)
+    if (!q.trim()) {
+      setResults([])
+      return
+    }
+    timer.current = setTimeout(async () => {
+      try {
+        const response = await api.get('/lookup/', { params: { q, type: 'product', limit: 8 } })
+        setResults(response.data.results)
+        setOpen(true)
+      } catch (error) {
+        setResults([])
+      }
+    }, 150)
+  }
+
+  const handleChange = (e) => {
+    onChange(e.target.value)
+    search(e.target.value)
+  }
+
+  const handleSelect = (product) => {
+    onSelect(product)
+    setResults([])
+    setOpen(false)
+  }
+
+  return (
+    <div className="relative">
+      <input
+        type="text"
+        value={value}
+        onChange={handleChange}
+        onFocus={() => setOpen(results.length > 0)}
+        onBlur={() => setTimeout(() => setOpen(false), 150)}
+        className="input-field"
+        placeholder={placeholder}
+        required
+      />
+      {open && results.length > 0 && (
+        <ul className="absolute z-10 mt-1 w-full bg-white border border-gray-200 rounded-lg shadow-lg max-h-60 overflow-auto">
+          {results.map(product => (
+            <li
+              key={product.id}
+              onMouseDown={() => handleSelect(product)}
+              className="px-3 py-2 cursor-pointer hover:bg-gray-100 flex justify-between text-sm"
+            >
+              <span>{product.label}</span>
+              <span className="text-gray-500">
+                {new Intl.NumberFormat('fr-FR').format(product.unit_price)} FCFA
+              </span>
+            </li>
+          ))}
+        </ul>
+      )}
+    </div>
+  )
+}
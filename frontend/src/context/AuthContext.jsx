@@ -3,13 +3,41 @@ import api from '../services/api'
 
 const AuthContext = createContext(null)
 
+// Profil porté par les claims du jeton d'accès (voir set_user_claims côté API)
+const userFromToken = (token) => {
+  try {
+    const payload = token.split('.')[1].replace(/-/g, '+').replace(/_/g, '/')
+    const bytes = Uint8Array.from(atob(payload), (char) => char.charCodeAt(0))
+    const claims = JSON.parse(new TextDecoder().decode(bytes))
+    if (!claims.username) {
+      return null
+    }
+    return {
+      id: Number(claims.user_id),
+      username: claims.username,
+      first_name: claims.first_name,
+      last_name: claims.last_name,
+      email: claims.email,
+      role: claims.role,
+      is_active: claims.is_active,
+    }
+  } catch (error) {
+    return null
+  }
+}
+
 export function AuthProvider({ children }) {
   const [user, setUser] = useState(null)
   const [loading, setLoading] = useState(true)
 
   useEffect(() => {
     const token = localStorage.getItem('access_token')
-    if (token) {
+    const tokenUser = token && userFromToken(token)
+    if (tokenUser) {
+      setUser(tokenUser)
+      setLoading(false)
+    } else if (token) {
+      // Jeton émis avant l'ajout des claims
       fetchUser()
     } else {
       setLoading(false)
@@ -32,7 +60,12 @@ export function AuthProvider({ children }) {
     const response = await api.post('/token/', { username, password })
     localStorage.setItem('access_token', response.data.access)
     localStorage.setItem('refresh_token', response.data.refresh)
-    await fetchUser()
+    const tokenUser = userFromToken(response.data.access)
+    if (tokenUser) {
+      setUser(tokenUser)
+    } else {
+      await fetchUser()
+    }
     return response.data
   }
 
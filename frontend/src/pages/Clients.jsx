@@ -1,6 +1,7 @@
 import { useState, useEffect } from 'react'
 import { Link } from 'react-router-dom'
 import api from '../services/api'
+import ImportButton from '../components/ImportButton'
 import toast from 'react-hot-toast'
 import { Plus, Search, Edit, Trash2, Phone, Mail } from 'lucide-react'
 
@@ -54,10 +55,13 @@ export default function Clients() {
     <div className="space-y-6">
       <div className="flex flex-col sm:flex-row sm:items-center sm:justify-between gap-4">
         <h1 className="text-2xl font-bold text-gray-800">Clients</h1>
-        <Link to="/clients/new" className="btn-primary flex items-center gap-2 w-fit">
-          <Plus size={20} />
-          Nouveau client
-        </Link>
+        <div className="flex items-center gap-2">
+          <ImportButton endpoint="/clients/import/" onImported={fetchClients} />
+          <Link to="/clients/new" className="btn-primary flex items-center gap-2 w-fit">
+            <Plus size={20} />
+            Nouveau client
+          </Link>
+        </div>
       </div>
 
       <div className="card">
@@ -1,6 +1,8 @@
 import { useState, useEffect } from 'react'
 import { useNavigate, useParams } from 'react-router-dom'
 import api from '../services/api'
+import ClientLookup from '../components/ClientLookup'
+import ProductLookup from '../components/ProductLookup'
 import toast from 'react-hot-toast'
 import { ArrowLeft, Save, Plus, Trash2 } from 'lucide-react'
 
@@ -8,7 +10,7 @@ export default function DeliveryNoteForm() {
   const { id } = useParams()
   const navigate = useNavigate()
   const [loading, setLoading] = useState(false)
-  const [clients, setClients] = useState([])
+  const [clientName, setClientName] = useState('')
   const [formData, setFormData] = useState({
     client: '',
     date: new Date().toISOString().split('T')[0],
@@ -19,23 +21,14 @@ export default function DeliveryNoteForm() {
   })
 
   useEffect(() => {
-    fetchClients()
     if (id) fetchDeliveryNote()
   }, [id])
 
-  const fetchClients = async () => {
-    try {
-      const response = await api.get('/clients/')
-      setClients(response.data.results || response.data)
-    } catch (error) {
-      toast.error('Erreur lors du chargement des clients')
-    }
-  }
-
   const fetchDeliveryNote = async () => {
     try {
       const response = await api.get(`/delivery-notes/${id}/`)
       const note = response.data
+      setClientName(note.client_detail?.name || '')
       setFormData({
         client: note.client,
         date: note.date,
@@ -43,6 +36,8 @@ export default function DeliveryNoteForm() {
         delivered_by: note.delivered_by || '',
         notes: note.notes || '',
         items: note.items.map(item => ({
+          id: item.id,
+          product: item.product,
           description: item.description,
           quantity: item.quantity,
           observation: item.observation || ''
@@ -60,6 +55,16 @@ export default function DeliveryNoteForm() {
     setFormData({ ...formData, items: newItems })
   }
 
+  const selectProduct = (index, product) => {
+    const newItems = [...formData.items]
+    newItems[index] = {
+      ...newItems[index],
+      product: product.id,
+      description: product.label
+    }
+    setFormData({ ...formData, items: newItems })
+  }
+
   const addItem = () => {
     setFormData({
       ...formData,
@@ -121,17 +126,18 @@ export default function DeliveryNoteForm() {
           <div className="grid grid-cols-1 md:grid-cols-2 lg:grid-cols-4 gap-4">
             <div>
               <label className="block text-sm font-medium text-gray-700 mb-1">Client *</label>
-              <select
-                value={formData.client}
-                onChange={(e) => setFormData({ ...formData, client: e.target.value })}
-                className="input-field"
-                required
-              >
-                <option value="">Sélectionner un client</option>
-                {clients.map(client => (
-                  <option key={client.id} value={client.id}>{client.name}</option>
-                ))}
-              </select>
+              <ClientLookup
+                value={clientName}
+                onChange={(value) => {
+                  setClientName(value)
+                  setFormData({ ...formData, client: '' })
+                }}
+                onSelect={(client) => {
+                  setClientName(client.label)
+                  setFormData({ ...formData, client: client.id })
+                }}
+                placeholder="Rechercher un client"
+              />
             </div>
             <div>
               <label className="block text-sm font-medium text-gray-700 mb-1">Date *</label>
@@ -185,13 +191,11 @@ export default function DeliveryNoteForm() {
                 <div className="grid grid-cols-1 md:grid-cols-12 gap-4">
                   <div className="md:col-span-5">
                     <label className="block text-sm font-medium text-gray-700 mb-1">Description *</label>
-                    <input
-                      type="text"
+                    <ProductLookup
                       value={item.description}
-                      onChange={(e) => handleItemChange(index, 'description', e.target.value)}
-                      className="input-field"
+                      onChange={(value) => handleItemChange(index, 'description', value)}
+                      onSelect={(product) => selectProduct(index, product)}
                       placeholder="Description du produit"
-                      required
                     />
                   </div>
                   <div className="md:col-span-2">
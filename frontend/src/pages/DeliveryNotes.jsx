@@ -1,6 +1,6 @@
 import { useState, useEffect } from 'react'
 import { Link } from 'react-router-dom'
-import api from '../services/api'
+import api, { toApiPath } from '../services/api'
 import toast from 'react-hot-toast'
 import { Plus, Search, Eye, Download, Truck } from 'lucide-react'
 import { format } from 'date-fns'
@@ -9,6 +9,8 @@ import { fr } from 'date-fns/locale'
 export default function DeliveryNotes() {
   const [deliveryNotes, setDeliveryNotes] = useState([])
   const [loading, setLoading] = useState(true)
+  const [nextUrl, setNextUrl] = useState(null)
+  const [loadingMore, setLoadingMore] = useState(false)
   const [search, setSearch] = useState('')
 
   useEffect(() => {
@@ -17,8 +19,9 @@ export default function DeliveryNotes() {
 
   const fetchDeliveryNotes = async () => {
     try {
-      const response = await api.get('/delivery-notes/')
+      const response = await api.get('/delivery-notes/?pagination=cursor')
       setDeliveryNotes(response.data.results || response.data)
+      setNextUrl(response.data.next || null)
     } catch (error) {
       toast.error('Erreur lors du chargement des bordereaux')
     } finally {
@@ -26,6 +29,20 @@ export default function DeliveryNotes() {
     }
   }
 
+  const loadMore = async () => {
+    if (!nextUrl) return
+    setLoadingMore(true)
+    try {
+      const response = await api.get(toApiPath(nextUrl))
+      setDeliveryNotes((current) => [...current, ...response.data.results])
+      setNextUrl(response.data.next || null)
+    } catch (error) {
+      toast.error('Erreur lors du chargement des bordereaux')
+    } finally {
+      setLoadingMore(false)
+    }
+  }
+
   const handleDownloadPdf = async (id, number) => {
     try {
       const response = await api.get(`/delivery-notes/${id}/pdf/`, { responseType: 'blob' })
@@ -43,7 +60,7 @@ export default function DeliveryNotes() {
 
   const filteredNotes = deliveryNotes.filter(note =>
     note.number.toLowerCase().includes(search.toLowerCase()) ||
-    note.client_detail?.name.toLowerCase().includes(search.toLowerCase()) ||
+    note.client_name.toLowerCase().includes(search.toLowerCase()) ||
     note.delivered_by?.toLowerCase().includes(search.toLowerCase())
   )
 
@@ -103,7 +120,7 @@ export default function DeliveryNotes() {
                     <td className="py-3 px-4">
                       <span className="font-medium text-primary-600">{note.number}</span>
                     </td>
-                    <td className="py-3 px-4 text-gray-800">{note.client_detail?.name}</td>
+                    <td className="py-3 px-4 text-gray-800">{note.client_name}</td>
                     <td className="py-3 px-4 hidden md:table-cell text-gray-600">
                       {format(new Date(note.date), 'dd MMM yyyy', { locale: fr })}
                     </td>
@@ -137,6 +154,14 @@ export default function DeliveryNotes() {
             </table>
           </div>
         )}
+
+        {nextUrl && (
+          <div className="flex justify-center mt-4">
+            <button onClick={loadMore} disabled={loadingMore} className="btn-secondary">
+              {loadingMore ? 'Chargement...' : 'Charger plus'}
+            </button>
+          </div>
+        )}
       </div>
     </div>
   )
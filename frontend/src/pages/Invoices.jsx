@@ -1,6 +1,6 @@
 import { useState, useEffect } from 'react'
 import { Link } from 'react-router-dom'
-import api from '../services/api'
+import api, { toApiPath } from '../services/api'
 import toast from 'react-hot-toast'
 import { Plus, Search, Eye, Download, FileText } from 'lucide-react'
 import { format } from 'date-fns'
@@ -16,6 +16,8 @@ const statusColors = {
 export default function Invoices() {
   const [invoices, setInvoices] = useState([])
   const [loading, setLoading] = useState(true)
+  const [nextUrl, setNextUrl] = useState(null)
+  const [loadingMore, setLoadingMore] = useState(false)
   const [search, setSearch] = useState('')
   const [statusFilter, setStatusFilter] = useState('')
 
@@ -25,10 +27,11 @@ export default function Invoices() {
 
   const fetchInvoices = async () => {
     try {
-      let url = '/invoices/'
-      if (statusFilter) url += `?status=${statusFilter}`
+      let url = '/invoices/?pagination=cursor'
+      if (statusFilter) url += `&status=${statusFilter}`
       const response = await api.get(url)
       setInvoices(response.data.results || response.data)
+      setNextUrl(response.data.next || null)
     } catch (error) {
       toast.error('Erreur lors du chargement des factures')
     } finally {
@@ -36,6 +39,20 @@ export default function Invoices() {
     }
   }
 
+  const loadMore = async () => {
+    if (!nextUrl) return
+    setLoadingMore(true)
+    try {
+      const response = await api.get(toApiPath(nextUrl))
+      setInvoices((current) => [...current, ...response.data.results])
+      setNextUrl(response.data.next || null)
+    } catch (error) {
+      toast.error('Erreur lors du chargement des factures')
+    } finally {
+      setLoadingMore(false)
+    }
+  }
+
   const handleDownloadPdf = async (id, number) => {
     try {
       const response = await api.get(`/invoices/${id}/pdf/`, { responseType: 'blob' })
@@ -57,7 +74,7 @@ export default function Invoices() {
 
   const filteredInvoices = invoices.filter(invoice =>
     invoice.number.toLowerCase().includes(search.toLowerCase()) ||
-    invoice.client_detail?.name.toLowerCase().includes(search.toLowerCase())
+    invoice.client_name.toLowerCase().includes(search.toLowerCase())
   )
 
   if (loading) {
@@ -127,7 +144,7 @@ export default function Invoices() {
                     <td className="py-3 px-4">
                       <span className="font-medium text-primary-600">{invoice.number}</span>
                     </td>
-                    <td className="py-3 px-4 text-gray-800">{invoice.client_detail?.name}</td>
+                    <td className="py-3 px-4 text-gray-800">{invoice.client_name}</td>
                     <td className="py-3 px-4 hidden md:table-cell text-gray-600">
                       {format(new Date(invoice.date), 'dd MMM yyyy', { locale: fr })}
                     </td>
@@ -163,6 +180,14 @@ export default function Invoices() {
             </table>
           </div>
         )}
+
+        {nextUrl && (
+          <div className="flex justify-center mt-4">
+            <button onClick={loadMore} disabled={loadingMore} className="btn-secondary">
+              {loadingMore ? 'Chargement...' : 'Charger plus'}
+            </button>
+          </div>
+        )}
       </div>
     </div>
   )
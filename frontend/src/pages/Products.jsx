@@ -1,6 +1,7 @@
 import { useState, useEffect } from 'react'
 import { Link } from 'react-router-dom'
 import api from '../services/api'
+import ImportButton from '../components/ImportButton'
 import toast from 'react-hot-toast'
 import { Plus, Search, Edit, Trash2 } from 'lucide-react'
 
@@ -57,10 +58,13 @@ export default function Products() {
     <div className="space-y-6">
       <div className="flex flex-col sm:flex-row sm:items-center sm:justify-between gap-4">
         <h1 className="text-2xl font-bold text-gray-800">Produits</h1>
-        <Link to="/products/new" className="btn-primary flex items-center gap-2 w-fit">
-          <Plus size={20} />
-          Nouveau produit
-        </Link>
+        <div className="flex items-center gap-2">
+          <ImportButton endpoint="/products/import/" onImported={fetchProducts} />
+          <Link to="/products/new" className="btn-primary flex items-center gap-2 w-fit">
+            <Plus size={20} />
+            Nouveau produit
+          </Link>
+        </div>
       </div>
 
       <div className="card">
@@ -1,6 +1,8 @@
 import { useState, useEffect } from 'react'
 import { useNavigate, useParams } from 'react-router-dom'
 import api from '../services/api'
+import ClientLookup from '../components/ClientLookup'
+import ProductLookup from '../components/ProductLookup'
 import toast from 'react-hot-toast'
 import { ArrowLeft, Save, Plus, Trash2 } from 'lucide-react'
 
@@ -8,7 +10,7 @@ export default function ProformaForm() {
   const { id } = useParams()
   const navigate = useNavigate()
   const [loading, setLoading] = useState(false)
-  const [clients, setClients] = useState([])
+  const [clientName, setClientName] = useState('')
   const [formData, setFormData] = useState({
     client: '',
     date: new Date().toISOString().split('T')[0],
@@ -18,29 +20,22 @@ export default function ProformaForm() {
   })
 
   useEffect(() => {
-    fetchClients()
     if (id) fetchProforma()
   }, [id])
 
-  const fetchClients = async () => {
-    try {
-      const response = await api.get('/clients/')
-      setClients(response.data.results || response.data)
-    } catch (error) {
-      toast.error('Erreur lors du chargement des clients')
-    }
-  }
-
   const fetchProforma = async () => {
     try {
       const response = await api.get(`/proformas/${id}/`)
       const proforma = response.data
+      setClientName(proforma.client_detail?.name || '')
       setFormData({
         client: proforma.client,
         date: proforma.date,
         validity_date: proforma.validity_date || '',
         notes: proforma.notes || '',
         items: proforma.items.map(item => ({
+          id: item.id,
+          product: item.product,
           description: item.description,
           quantity: item.quantity,
           unit_price: item.unit_price,
@@ -59,6 +54,18 @@ export default function ProformaForm() {
     setFormData({ ...formData, items: newItems })
   }
 
+  const selectProduct = (index, product) => {
+    const newItems = [...formData.items]
+    newItems[index] = {
+      ...newItems[index],
+      product: product.id,
+      description: product.label,
+      unit_price: parseFloat(product.unit_price),
+      tva_rate: parseFloat(product.tva_rate)
+    }
+    setFormData({ ...formData, items: newItems })
+  }
+
   const addItem = () => {
     setFormData({
       ...formData,
@@ -138,17 +145,18 @@ export default function ProformaForm() {
           <div className="grid grid-cols-1 md:grid-cols-3 gap-4">
             <div>
               <label className="block text-sm font-medium text-gray-700 mb-1">Client *</label>
-              <select
-                value={formData.client}
-                onChange={(e) => setFormData({ ...formData, client: e.target.value })}
-                className="input-field"
-                required
-              >
-                <option value="">Sélectionner un client</option>
-                {clients.map(client => (
-                  <option key={client.id} value={client.id}>{client.name}</option>
-                ))}
-              </select>
+              <ClientLookup
+                value={clientName}
+                onChange={(value) => {
+                  setClientName(value)
+                  setFormData({ ...formData, client: '' })
+                }}
+                onSelect={(client) => {
+                  setClientName(client.label)
+                  setFormData({ ...formData, client: client.id })
+                }}
+                placeholder="Rechercher un client"
+              />
             </div>
             <div>
               <label className="block text-sm font-medium text-gray-700 mb-1">Date *</label>
@@ -186,13 +194,11 @@ export default function ProformaForm() {
                 <div className="grid grid-cols-1 md:grid-cols-5 gap-4">
                   <div className="md:col-span-2">
                     <label className="block text-sm font-medium text-gray-700 mb-1">Description *</label>
-                    <input
-                      type="text"
+                    <ProductLookup
                       value={item.description}
-                      onChange={(e) => handleItemChange(index, 'description', e.target.value)}
-                      className="input-field"
+                      onChange={(value) => handleItemChange(index, 'description', value)}
+                      onSelect={(product) => selectProduct(index, product)}
                       placeholder="Description de l'article"
-                      required
                     />
                   </div>
                   <div>
@@ -1,6 +1,6 @@
 import { useState, useEffect } from 'react'
 import { Link } from 'react-router-dom'
-import api from '../services/api'
+import api, { toApiPath } from '../services/api'
 import toast from 'react-hot-toast'
 import { Plus, Search, Eye, Download, FileCheck } from 'lucide-react'
 import { format } from 'date-fns'
@@ -17,6 +17,8 @@ const statusColors = {
 export default function Proformas() {
   const [proformas, setProformas] = useState([])
   const [loading, setLoading] = useState(true)
+  const [nextUrl, setNextUrl] = useState(null)
+  const [loadingMore, setLoadingMore] = useState(false)
   const [search, setSearch] = useState('')
   const [statusFilter, setStatusFilter] = useState('')
 
@@ -26,10 +28,11 @@ export default function Proformas() {
 
   const fetchProformas = async () => {
     try {
-      let url = '/proformas/'
-      if (statusFilter) url += `?status=${statusFilter}`
+      let url = '/proformas/?pagination=cursor'
+      if (statusFilter) url += `&status=${statusFilter}`
       const response = await api.get(url)
       setProformas(response.data.results || response.data)
+      setNextUrl(response.data.next || null)
     } catch (error) {
       toast.error('Erreur lors du chargement des proformas')
     } finally {
@@ -37,6 +40,20 @@ export default function Proformas() {
     }
   }
 
+  const loadMore = async () => {
+    if (!nextUrl) return
+    setLoadingMore(true)
+    try {
+      const response = await api.get(toApiPath(nextUrl))
+      setProformas((current) => [...current, ...response.data.results])
+      setNextUrl(response.data.next || null)
+    } catch (error) {
+      toast.error('Erreur lors du chargement des proformas')
+    } finally {
+      setLoadingMore(false)
+    }
+  }
+
   const handleDownloadPdf = async (id, number) => {
     try {
       const response = await api.get(`/proformas/${id}/pdf/`, { responseType: 'blob' })
@@ -58,7 +75,7 @@ export default function Proformas() {
 
   const filteredProformas = proformas.filter(proforma =>
     proforma.number.toLowerCase().includes(search.toLowerCase()) ||
-    proforma.client_detail?.name.toLowerCase().includes(search.toLowerCase())
+    proforma.client_name.toLowerCase().includes(search.toLowerCase())
   )
 
   if (loading) {
@@ -129,7 +146,7 @@ export default function Proformas() {
                     <td className="py-3 px-4">
                       <span className="font-medium text-primary-600">{proforma.number}</span>
                     </td>
-                    <td className="py-3 px-4 text-gray-800">{proforma.client_detail?.name}</td>
+                    <td className="py-3 px-4 text-gray-800">{proforma.client_name}</td>
                     <td className="py-3 px-4 hidden md:table-cell text-gray-600">
                       {format(new Date(proforma.date), 'dd MMM yyyy', { locale: fr })}
                     </td>
@@ -165,6 +182,14 @@ export default function Proformas() {
             </table>
           </div>
         )}
+
+        {nextUrl && (
+          <div className="flex justify-center mt-4">
+            <button onClick={loadMore} disabled={loadingMore} className="btn-secondary">
+              {loadingMore ? 'Chargement...' : 'Charger plus'}
+            </button>
+          </div>
+        )}
       </div>
     </div>
   )
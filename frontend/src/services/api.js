@@ -44,4 +44,10 @@ api.interceptors.response.use(
   }
 )
 
+// Les liens de pagination renvoyés par l'API sont absolus : on garde le chemin relatif à /api
+export const toApiPath = (url) => {
+  const parsed = new URL(url, window.location.origin)
+  return parsed.pathname.replace(/^\/api/, '') + parsed.search
+}
+
 export default api